@@ -0,0 +1,129 @@
+"""
+Benchmark offline da coleta: sobe o servidor de replay local, aponta todas
+as fontes para ele e mede tempo total e por fonte, tempo de parse, bytes
+transferidos e pico de memória de coletar_todos_dados_reais
+
+Uso:
+    python benchmarks/bench_coleta.py --latencia 0.05 --jitter 0.02 --repeticoes 3
+    python benchmarks/bench_coleta.py --taxa-erro 0.1 --json resultado.json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# O scraper não configura o logging (quem configura é a CLI): aqui só os erros aparecem
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import LimitadorTaxa, MaceioCondominiosScraperReal  # noqa: E402
+from servidor_replay import ServidorReplay  # noqa: E402
+
+
+def tempo_parse(scraper: MaceioCondominiosScraperReal) -> float:
+    """
+    Soma o tempo de parse registrado pela instrumentação do scraper em todas as fontes
+    """
+    return sum(m['parse_ms'] or 0 for m in scraper.metricas.resumo().values())
+
+
+def criar_scraper(servidor: ServidorReplay, args) -> MaceioCondominiosScraperReal:
+    limitador = None if args.limite_real else LimitadorTaxa(taxa=1000, rajada=1000)
+    return MaceioCondominiosScraperReal(
+        usar_cache=args.com_cache,
+        limitador=limitador,
+        usar_navegador=False,
+        data_dir=tempfile.mkdtemp(prefix='bench_coleta_'),
+        urls=servidor.urls()
+    )
+
+
+def medir(servidor: ServidorReplay, args, nome: str, executar) -> dict:
+    """
+    Executa o cenário `repeticoes` vezes para tempo/parse/bytes e uma vez
+    extra sob tracemalloc para o pico de memória
+    """
+    tempos, parses, transferidos, registros = [], [], [], 0
+    for _ in range(args.repeticoes):
+        scraper = criar_scraper(servidor, args)
+        servidor.zerar_estatisticas()
+        inicio = time.perf_counter()
+        registros = executar(scraper)
+        tempos.append(time.perf_counter() - inicio)
+        parses.append(tempo_parse(scraper))
+        transferidos.append(sum(e['bytes'] for e in servidor.estatisticas.values()))
+        scraper.encerrar()
+
+    scraper = criar_scraper(servidor, args)
+    tracemalloc.start()
+    executar(scraper)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scraper.encerrar()
+
+    return {
+        'cenario': nome,
+        'registros': registros,
+        'tempo_ms': statistics.median(tempos) * 1000,
+        'parse_ms': statistics.median(parses),
+        'bytes': int(statistics.median(transferidos)),
+        'pico_memoria_mib': pico / 2 ** 20
+    }
+
+
+def contar_registros(dados: dict) -> int:
+    return dados['metadados']['total_registros']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latencia', type=float, default=0.05, help='Atraso fixo por requisição (s)')
+    parser.add_argument('--jitter', type=float, default=0.02, help='Atraso aleatório adicional máximo (s)')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de requisições respondidas com 503')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--com-cache', action='store_true', help='Mantém o cache HTTP ativo')
+    parser.add_argument('--limite-real', action='store_true', help='Usa os limites de taxa de produção')
+    parser.add_argument('--json', help='Grava os resultados também neste arquivo JSON')
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(latencia=args.latencia, jitter=args.jitter, taxa_erro=args.taxa_erro, semente=42)
+    servidor.iniciar()
+
+    resultados = []
+    try:
+        for nome in MaceioCondominiosScraperReal(
+                usar_cache=False, usar_navegador=False, data_dir=tempfile.mkdtemp()).fontes_coleta():
+            resultados.append(medir(servidor, args, nome,
+                                    lambda s, nome=nome: len(s.fontes_coleta()[nome]())))
+
+        resultados.append(medir(servidor, args, 'agregados IBGE (lote)',
+                                lambda s: len(s.buscar_agregados_ibge())))
+        resultados.append(medir(servidor, args, 'anuncios (crawler)',
+                                lambda s: sum(1 for _ in s.crawler_anuncios())))
+        resultados.append(medir(servidor, args, 'coleta sequencial',
+                                lambda s: contar_registros(s.coletar_todos_dados_reais())))
+        resultados.append(medir(servidor, args, 'coleta concorrente',
+                                lambda s: contar_registros(s.coletar_todos_dados_reais(concorrente=True))))
+    finally:
+        servidor.parar()
+
+    print(f"latência {args.latencia}s ± {args.jitter}s, erros {args.taxa_erro:.0%}, "
+          f"mediana de {args.repeticoes} execuções")
+    print(f"{'cenário':<26}{'registros':>10}{'tempo (ms)':>12}{'parse (ms)':>12}{'KiB':>9}{'pico (MiB)':>12}")
+    for r in resultados:
+        print(f"{r['cenario']:<26}{r['registros']:>10}{r['tempo_ms']:>12.1f}{r['parse_ms']:>12.2f}"
+              f"{r['bytes'] / 1024:>9.1f}{r['pico_memoria_mib']:>12.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'parametros': vars(args), 'resultados': resultados}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark da deduplicação de anúncios: gera anúncios sintéticos de prédios
+de Maceió, cada imóvel repetido em VivaReal/ZapImóveis e por vários
+corretores com pequenas variações, e mede tempo, pares comparados e a
+qualidade dos agrupamentos para tamanhos crescentes
+
+Uso:
+    python benchmarks/bench_deduplicacao.py --tamanhos 10000 50000 100000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import DeduplicadorAnuncios  # noqa: E402
+
+BAIRROS = ['Ponta Verde', 'Pajuçara', 'Jatiúca', 'Cruz das Almas', 'Mangabeiras', 'Farol', 'Gruta de Lourdes',
+           'Poço', 'Jacarecica', 'Stella Maris', 'Serraria', 'Barro Duro', 'Feitosa', 'Pitanguinha', 'Guaxuma']
+RUAS = ['Rua Engenheiro Mário de Gusmão', 'Avenida Álvaro Otacílio', 'Rua Desembargador Almeida Guimarães',
+        'Avenida Doutor Antônio Gouveia', 'Rua Professor Sandoval Arroxelas', 'Rua Jangadeiros Alagoanos',
+        'Avenida Fernandes Lima', 'Rua Durval Guimarães', 'Avenida Comendador Gustavo Paiva']
+ABREVIADAS = {'Rua': 'R.', 'Avenida': 'Av.', 'Engenheiro': 'Eng.', 'Desembargador': 'Des.',
+              'Doutor': 'Dr.', 'Professor': 'Prof.'}
+
+
+def abreviar(endereco: str) -> str:
+    for completa, abreviada in ABREVIADAS.items():
+        endereco = endereco.replace(completa, abreviada)
+    return endereco
+
+
+def gerar_anuncios(total: int, semente: int = 42) -> pd.DataFrame:
+    """
+    Gera cerca de `total` anúncios; a coluna imovel_real identifica o imóvel verdadeiro
+    """
+    aleatorio = random.Random(semente)
+    registros = []
+    imovel = 0
+    while len(registros) < total:
+        bairro = aleatorio.choice(BAIRROS)
+        rua = aleatorio.choice(RUAS)
+        numero = aleatorio.randint(10, 3000)
+        condominio_base = aleatorio.randint(4, 20) * 100
+        for _ in range(aleatorio.randint(1, 6)):
+            imovel += 1
+            quartos = aleatorio.randint(1, 4)
+            area = round(aleatorio.uniform(35, 60) + quartos * 25, 1)
+            preco = round(area * aleatorio.uniform(6000, 12000), -3)
+            for _ in range(aleatorio.randint(1, 4)):
+                endereco = f"{rua}, {numero} - {bairro}, Maceió - AL"
+                registros.append({
+                    'id': f"{imovel}-{len(registros)}",
+                    'site': aleatorio.choice(['VivaReal', 'ZapImóveis']),
+                    'titulo': f"Apartamento com {quartos} quartos, {area:.0f} m² em {bairro}"
+                              + aleatorio.choice(['', ' vista mar', ' nascente', ' andar alto']),
+                    'endereco': abreviar(endereco) if aleatorio.random() < 0.5 else endereco,
+                    'bairro': bairro,
+                    'preco': preco * aleatorio.uniform(0.97, 1.03),
+                    'condominio': condominio_base if aleatorio.random() < 0.8 else None,
+                    'area_m2': area if aleatorio.random() < 0.9 else round(area * aleatorio.uniform(0.97, 1.03)),
+                    'quartos': quartos,
+                    'imovel_real': imovel,
+                    'predio_real': f"{bairro}|{rua}|{numero}"
+                })
+    return pd.DataFrame(registros[:total])
+
+
+def pureza(tabela: pd.DataFrame, previsto: str, real: str) -> float:
+    """
+    Fração de anúncios cujo grupo previsto tem como maioria o seu grupo real
+    """
+    maioria = tabela.groupby(previsto)[real].agg(lambda valores: valores.value_counts().iloc[0])
+    return maioria.sum() / len(tabela)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--limiar', type=float, default=0.85)
+    args = parser.parse_args()
+
+    print(f"{'anúncios':>10}{'tempo (s)':>11}{'µs/anúncio':>12}{'pares':>12}{'imóveis':>10}"
+          f"{'reais':>8}{'pureza':>8}{'prédios':>9}{'reais':>8}")
+    for tamanho in args.tamanhos:
+        anuncios = gerar_anuncios(tamanho)
+        deduplicador = DeduplicadorAnuncios(limiar=args.limiar)
+        inicio = time.perf_counter()
+        tabela = deduplicador.deduplicar(anuncios)
+        tempo = time.perf_counter() - inicio
+        e = deduplicador.estatisticas
+        print(f"{tamanho:>10}{tempo:>11.2f}{tempo / tamanho * 1e6:>12.1f}{e['pares_comparados']:>12}"
+              f"{e['clusters']:>10}{anuncios['imovel_real'].nunique():>8}"
+              f"{pureza(tabela, 'cluster_id', 'imovel_real'):>8.1%}"
+              f"{e['predios']:>9}{anuncios['predio_real'].nunique():>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Micro-benchmark do tempo de parse por página: implementação anterior
+(BeautifulSoup + varreduras com get_text) contra o motor lxml declarativo,
+e leitura completa contra o extrator incremental em blocos (streaming),
+que para quando o conteúdo principal da página fecha
+
+Uso: python benchmarks/bench_extracao.py [--repeticoes 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maceioCondominios import ESPECIFICACOES_EXTRACAO, ExtratorHTMLIncremental, extrair_html  # noqa: E402
+
+
+def pagina_marketplace(cartoes: int = 300) -> bytes:
+    """
+    Página de listagem no formato atual do VivaReal/ZapImóveis
+    """
+    itens = []
+    for i in range(cartoes):
+        itens.append(
+            f'<li data-cy="rp-property-cd"><a href="/imovel/apartamento-id-{i}/">'
+            f'<div><section><h2 data-cy="rp-cardProperty-location-txt">Apartamento para comprar em Ponta Verde, Maceió</h2>'
+            f'<p data-cy="rp-cardProperty-street-txt">Rua Jangadeiros Alagoanos, {i}</p>'
+            f'<ul><li data-cy="rp-cardProperty-propertyArea-txt">{60 + i % 90} m²</li>'
+            f'<li data-cy="rp-cardProperty-bedroomQuantity-txt">{1 + i % 4} quartos</li></ul>'
+            f'<div data-cy="rp-cardProperty-price-txt"><p>R$ {300 + i}.000</p><p>Cond. R$ {500 + i % 700} • IPTU R$ 90</p></div>'
+            f'</section></div></a></li>'
+        )
+    ruido = '<div class="menu"><section><div>Condomínio edifício apartamento Maceió</div></section></div>' * 200
+    return f'<html><head><meta charset="utf-8"></head><body>{ruido}<ul>{"".join(itens)}</ul></body></html>'.encode()
+
+
+def pagina_portal(links: int = 800) -> bytes:
+    """
+    Página de portal com muitos links, poucos deles sobre imóveis, e um
+    rodapé do mesmo tamanho depois do conteúdo principal
+    """
+    itens = ''.join(
+        f'<li><a href="/servico/{i}"><span>{"Consulta IPTU predial" if i % 40 == 0 else "Serviço municipal"} {i}</span></a></li>'
+        for i in range(links)
+    )
+    rodape = ''.join(f'<li><a href="/noticia/{i}"><span>Notícia {i}</span></a></li>' for i in range(links))
+    return (f'<html><head><meta charset="utf-8"></head><body><main><form action="/busca"><input name="q"></form>'
+            f'<ul>{itens}</ul></main><footer><ul>{rodape}</ul></footer></body></html>').encode()
+
+
+def marketplace_antes(conteudo: bytes) -> int:
+    """
+    Contagem por palavras-chave da versão anterior de buscar_dados_sites_imobiliarios_real
+    """
+    soup = BeautifulSoup(conteudo, 'html.parser')
+    resultados = soup.find_all(['div', 'article', 'section'])
+    encontrados = 0
+    for resultado in resultados[:10]:
+        texto = resultado.get_text().lower()
+        if any(termo in texto for termo in ['apartamento', 'condomínio', 'edifício', 'maceió']):
+            encontrados += 1
+    return encontrados
+
+
+def portal_antes(conteudo: bytes) -> int:
+    """
+    Varredura de links da versão anterior de buscar_dados_portal_cidadao
+    """
+    soup = BeautifulSoup(conteudo, 'html.parser')
+    for form in soup.find_all('form'):
+        form.get('action', '')
+    servicos = []
+    for link in soup.find_all('a', href=True):
+        texto = link.get_text().lower()
+        if any(palavra in texto for palavra in ['imóvel', 'imovel', 'cadastr', 'iptu', 'predial']):
+            servicos.append({'servico': link.get_text().strip(), 'url': link['href']})
+    return len(servicos)
+
+
+def extrair_em_blocos(conteudo: bytes, especificacao: dict, tamanho_bloco: int = 16384) -> int:
+    """
+    Simula _extrair_em_stream sem rede; retorna quantos bytes foram lidos
+    """
+    extrator = ExtratorHTMLIncremental(especificacao)
+    lidos = 0
+    for inicio in range(0, len(conteudo), tamanho_bloco):
+        extrator.alimentar(conteudo[inicio:inicio + tamanho_bloco])
+        lidos += min(tamanho_bloco, len(conteudo) - inicio)
+        if extrator.concluido:
+            break
+    extrator.finalizar()
+    return lidos
+
+
+def cronometrar(funcao, conteudo: bytes, repeticoes: int) -> float:
+    """
+    Melhor tempo (ms) entre as repetições
+    """
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(conteudo)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+    
+    especificacao_anuncios = {
+        'anuncios': {
+            'itens': 'li[data-cy="rp-property-cd"]',
+            'campos': {
+                'url': {'css': 'a[href]', 'atributo': 'href'},
+                'titulo': {'css': '[data-cy="rp-cardProperty-location-txt"]'},
+                'endereco': {'css': '[data-cy="rp-cardProperty-street-txt"]'},
+                'preco': {'css': '[data-cy="rp-cardProperty-price-txt"] p'},
+                'condominio': {'css': '[data-cy="rp-cardProperty-price-txt"]'},
+                'area_m2': {'css': '[data-cy="rp-cardProperty-propertyArea-txt"]'},
+                'quartos': {'css': '[data-cy="rp-cardProperty-bedroomQuantity-txt"]'}
+            },
+            'descartar': True
+        }
+    }
+    
+    casos = [
+        ('marketplace (300 cartões)', pagina_marketplace(),
+         marketplace_antes, lambda c: extrair_html(c, especificacao_anuncios)),
+        ('portal (800 links)', pagina_portal(),
+         portal_antes, lambda c: extrair_html(c, ESPECIFICACOES_EXTRACAO['portal_cidadao_maceio']))
+    ]
+    
+    print(f"{'página':<28}{'KiB':>8}{'antes (ms)':>14}{'depois (ms)':>14}{'ganho':>8}")
+    for nome, conteudo, antes, depois in casos:
+        tempo_antes = cronometrar(antes, conteudo, args.repeticoes)
+        tempo_depois = cronometrar(depois, conteudo, args.repeticoes)
+        print(f"{nome:<28}{len(conteudo) / 1024:>8.0f}{tempo_antes:>14.2f}{tempo_depois:>14.2f}"
+              f"{tempo_antes / tempo_depois:>7.1f}x")
+    
+    # Portal grande: o extrator incremental para quando <main> fecha e não baixa o rodapé
+    portal = ESPECIFICACOES_EXTRACAO['portal_cidadao_maceio']
+    print(f"\n{'portal em streaming':<28}{'KiB':>8}{'lidos (KiB)':>14}{'tempo (ms)':>14}")
+    for links in (800, 20000):
+        conteudo = pagina_portal(links)
+        completo = lambda c: extrair_html(c, portal)
+        em_blocos = lambda c: extrair_em_blocos(c, portal)
+        for nome, funcao, lidos in (('completo', completo, len(conteudo)),
+                                    ('incremental', em_blocos, extrair_em_blocos(conteudo, portal))):
+            print(f"{f'{links} links, {nome}':<28}{len(conteudo) / 1024:>8.0f}{lidos / 1024:>14.0f}"
+                  f"{cronometrar(funcao, conteudo, args.repeticoes):>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark do crawl distribuído: planeja unidades (site, bairro, faixa de
+páginas) numa fila SQLite, sobe o servidor de replay e mede a vazão com
+1, 2, 4... processos trabalhadores compartilhando a fila, o limite de taxa
+global e o dataset
+
+Uso:
+    python benchmarks/bench_fila.py --processos 1 2 4 8 --latencia 0.1
+    python benchmarks/bench_fila.py --taxa 20   # orçamento global de 20 req/s por host
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import (FilaTrabalho, MaceioCondominiosScraperReal,  # noqa: E402
+                               executar_trabalhador_fila)
+from servidor_replay import ServidorReplay  # noqa: E402
+
+BAIRROS = ['Ponta Verde', 'Pajuçara', 'Jatiúca', 'Cruz das Almas', 'Mangabeiras',
+           'Farol', 'Gruta de Lourdes', 'Poço', 'Jacarecica', 'Stella Maris']
+
+
+def rodada(servidor: ServidorReplay, processos: int, args) -> dict:
+    diretorio = tempfile.mkdtemp(prefix='bench_fila_')
+    scraper = MaceioCondominiosScraperReal(usar_cache=False, usar_navegador=False,
+                                           data_dir=diretorio, urls=servidor.urls())
+    fila = FilaTrabalho(os.path.join(diretorio, 'fila.sqlite3'))
+    # O servidor de replay tem 5 páginas por listagem: 10 páginas planejadas exercitam o descarte do fim da série
+    unidades = scraper.planejar_unidades_anuncios(fila, max_paginas=10, bairros=BAIRROS[:args.bairros],
+                                                  paginas_por_unidade=args.paginas_por_unidade)
+    scraper.encerrar()
+
+    servidor.zerar_estatisticas()
+    contexto = multiprocessing.get_context('spawn')
+    limites = {'taxa': args.taxa, 'rajada': 1, 'por_host': {}}
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+        inicio = time.perf_counter()
+        futuros = [executor.submit(executar_trabalhador_fila, diretorio, urls=servidor.urls(),
+                                   data_dir=os.path.join(diretorio, f'local_{i}'), usar_navegador=False,
+                                   limites=limites, intervalo_espera=0.2)
+                   for i in range(processos)]
+        totais = [futuro.result() for futuro in futuros]
+        tempo = time.perf_counter() - inicio
+
+    resumo = fila.resumo()
+    fila.fechar()
+    return {
+        'processos': processos,
+        'unidades': unidades,
+        'concluidas': resumo.get('concluida', 0),
+        'descartadas': resumo.get('descartada', 0),
+        'requisicoes': sum(e['requisicoes'] for e in servidor.estatisticas.values()),
+        'anuncios': sum(t['anuncios'] for t in totais),
+        'tempo': tempo
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processos', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--latencia', type=float, default=0.1, help='Atraso fixo por requisição (s)')
+    parser.add_argument('--taxa', type=float, default=1000.0, help='Orçamento global por host (req/s)')
+    parser.add_argument('--bairros', type=int, default=10)
+    parser.add_argument('--paginas-por-unidade', type=int, default=2)
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(latencia=args.latencia, semente=42).iniciar()
+    try:
+        print(f"latência {args.latencia}s, orçamento {args.taxa:g} req/s por host")
+        print(f"{'processos':>10}{'unidades':>10}{'concluídas':>12}{'descartadas':>13}"
+              f"{'requisições':>13}{'anúncios':>10}{'tempo (s)':>11}{'req/s':>8}")
+        for processos in args.processos:
+            r = rodada(servidor, processos, args)
+            print(f"{r['processos']:>10}{r['unidades']:>10}{r['concluidas']:>12}{r['descartadas']:>13}"
+                  f"{r['requisicoes']:>13}{r['anuncios']:>10}{r['tempo']:>11.2f}{r['requisicoes'] / r['tempo']:>8.1f}")
+    finally:
+        servidor.parar()
+
+
+if __name__ == '__main__':
+    main()
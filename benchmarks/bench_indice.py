@@ -0,0 +1,70 @@
+"""
+Benchmark do índice SQLite local: indexa anúncios sintéticos (mesmo gerador
+do benchmark de deduplicação) e mede o tempo de ingestão e das consultas
+típicas para tamanhos crescentes de histórico
+
+Uso:
+    python benchmarks/bench_indice.py --tamanhos 10000 100000 500000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import DeduplicadorAnuncios, IndiceLocal  # noqa: E402
+from bench_deduplicacao import gerar_anuncios  # noqa: E402
+
+CONSULTAS = {
+    'bairro + condomínio': lambda indice: indice.buscar_anuncios(bairro='Ponta Verde', condominio_max=800),
+    'faixa de preço': lambda indice: indice.buscar_anuncios(preco_min=500000, preco_max=520000),
+    'área + quartos': lambda indice: indice.buscar_anuncios(area_min=110, area_max=115, quartos=3),
+    'texto (endereço)': lambda indice: indice.buscar_anuncios(texto='alvaro otacilio 1200'),
+    'texto + bairro': lambda indice: indice.buscar_anuncios(texto='mario gusmao', bairro='Jatiúca', limite=20),
+    'prédios do bairro': lambda indice: indice.buscar_condominios(bairro='Pajuçara'),
+    'busca geral': lambda indice: indice.buscar('jangadeiros 150'),
+}
+
+
+def medir_consulta(indice: IndiceLocal, consulta, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        consulta(indice)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'anúncios':>10}{'ingestão (s)':>14}{'prédios (s)':>13}  " +
+          ''.join(f"{nome:>20}" for nome in CONSULTAS) + "   (ms, mediana)")
+    for tamanho in args.tamanhos:
+        anuncios = gerar_anuncios(tamanho)
+        indice = IndiceLocal(tempfile.mkdtemp(prefix='bench_indice_'))
+
+        inicio = time.perf_counter()
+        indice.indexar_anuncios(anuncios.to_dict('records'))
+        ingestao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        indice.indexar_condominios(DeduplicadorAnuncios().deduplicar(anuncios))
+        predios = time.perf_counter() - inicio
+
+        tempos = [medir_consulta(indice, consulta, args.repeticoes) for consulta in CONSULTAS.values()]
+        print(f"{tamanho:>10}{ingestao:>14.2f}{predios:>13.2f}  " + ''.join(f"{t:>20.2f}" for t in tempos))
+        indice.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark do tempo de início da CLI: mede, em processos novos, o custo de
+importar cada dependência pesada, o import do módulo (sob demanda x com
+todas as dependências carregadas antes, como era) e o tempo total de
+comandos típicos de cron contra o servidor de replay, informando quais
+dependências pesadas cada comando acabou importando
+
+Uso:
+    python benchmarks/bench_inicializacao.py --repeticoes 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor_replay import ServidorReplay  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADAS = ['requests', 'lxml.etree', 'numpy', 'pandas', 'pyarrow.parquet', 'pyarrow.dataset',
+           'selenium.webdriver.support.ui']
+
+# Executa main() no processo filho com as fontes apontadas para o servidor de replay
+EXECUTOR = """
+import json, sys
+sys.path.insert(0, {raiz!r})
+import maceioCondominios as m
+original = m.MaceioCondominiosScraperReal.__init__
+def iniciar(self, *args, **kwargs):
+    kwargs.update(urls={urls!r}, limitador=m.LimitadorTaxa(1000, 1000))
+    original(self, *args, **kwargs)
+m.MaceioCondominiosScraperReal.__init__ = iniciar
+m.main({argv!r})
+print('@@' + json.dumps([nome for nome in ('pandas', 'pyarrow', 'selenium') if nome in sys.modules]))
+"""
+
+
+def medir(codigo: str, repeticoes: int, diretorio: str) -> tuple:
+    """
+    Mediana do tempo de parede (ms) de `python -c codigo` e as dependências pesadas que ele importou
+    """
+    tempos, carregadas = [], []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = subprocess.run([sys.executable, '-c', codigo], cwd=diretorio, capture_output=True, text=True,
+                               check=True).stdout
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        marcadas = [linha for linha in saida.splitlines() if linha.startswith('@@')]
+        carregadas = json.loads(marcadas[-1][2:]) if marcadas else []
+    return statistics.median(tempos), carregadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='bench_inicializacao_')
+    interpretador, _ = medir('pass', args.repeticoes, diretorio)
+    print(f"interpretador vazio: {interpretador:.0f} ms\n")
+
+    print(f"{'dependência':<32}{'import (ms)':>12}")
+    for modulo in PESADAS:
+        tempo, _ = medir(f'import {modulo}', args.repeticoes, diretorio)
+        print(f"{modulo:<32}{tempo - interpretador:>12.0f}")
+
+    importar = f"import json, sys; sys.path.insert(0, {RAIZ!r}); {{}}import maceioCondominios; " \
+               "print('@@' + json.dumps([n for n in ('pandas', 'pyarrow', 'selenium') if n in sys.modules]))"
+    ansioso = ''.join(f'import {modulo}; ' for modulo in PESADAS)
+    print(f"\n{'cenário':<90}{'tempo (ms)':>11}  dependências pesadas carregadas")
+    cenarios = [
+        ('import maceioCondominios (sob demanda)', importar.format('')),
+        ('import maceioCondominios (tudo carregado antes, como era)', importar.format(ansioso)),
+    ]
+    for rotulo, codigo in cenarios:
+        tempo, carregadas = medir(codigo, args.repeticoes, diretorio)
+        print(f"{rotulo:<90}{tempo:>11.0f}  {', '.join(carregadas) or '-'}")
+
+    servidor = ServidorReplay(semente=42).iniciar()
+    comandos = [
+        ['--help'],
+        ['buscar', 'ponta verde'],
+        ['coletar', '--fontes', 'portal_cidadao_maceio', '--sem-navegador'],
+        ['coletar', '--fontes', 'ibge_oficial', '--sem-navegador'],
+        ['coletar', '--fontes', 'anuncios_imobiliarios', '--sites', 'vivareal', '--max-paginas', '2', '--sem-navegador'],
+        ['coletar', '--sem-navegador'],
+    ]
+    try:
+        for argv in comandos:
+            codigo = EXECUTOR.format(raiz=RAIZ, urls=servidor.urls(), argv=argv)
+            if argv == ['--help']:
+                codigo = codigo.replace('m.main(', 'import contextlib\nwith contextlib.suppress(SystemExit):\n    m.main(')
+            tempo, carregadas = medir(codigo, args.repeticoes, diretorio)
+            print(f"{' '.join(argv):<90}{tempo:>11.0f}  {', '.join(carregadas) or '-'}")
+    finally:
+        servidor.parar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark da consulta de IPTU em lote: sobe o servidor de replay (que
+simula o POST da consulta com token de sessão), gera inscrições sintéticas
+e mede vazão, taxa de erro e renovações do formulário para cada nível de
+concorrência; a última rodada é repetida na mesma saída para medir a retomada
+
+Uso:
+    python benchmarks/bench_iptu.py --inscricoes 500 --concorrencia 1 4 8 16 --latencia 0.05
+    python benchmarks/bench_iptu.py --taxa-erro 0.05 --usos-por-token 100
+    python benchmarks/bench_iptu.py --taxa 10   # orçamento de 10 consultas/s no host
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import LimitadorTaxa, MaceioCondominiosScraperReal  # noqa: E402
+from servidor_replay import ServidorReplay  # noqa: E402
+
+
+def gerar_inscricoes(total: int, semente: int = 42) -> list:
+    aleatorio = random.Random(semente)
+    return [f"{aleatorio.randint(0, 999):03d}.{aleatorio.randint(0, 999):03d}."
+            f"{aleatorio.randint(0, 9999):04d}.{aleatorio.randint(0, 999):03d}" for _ in range(total)]
+
+
+def rodada(servidor: ServidorReplay, inscricoes: list, concorrencia: int, saida: str, args) -> dict:
+    scraper = MaceioCondominiosScraperReal(usar_cache=False, usar_navegador=False,
+                                           limitador=LimitadorTaxa(taxa=args.taxa, rajada=max(1, int(args.taxa))),
+                                           data_dir=tempfile.mkdtemp(prefix='bench_iptu_'), urls=servidor.urls())
+    servidor.zerar_estatisticas()
+    resumo = scraper.consultar_iptu_em_lote(inscricoes, saida, concorrencia=concorrencia)
+    latencia = scraper.metricas.resumo().get('sefaz_iptu', {}).get('latencia_ms', {})
+    scraper.encerrar()
+    estatisticas = servidor.estatisticas.get('sefaz_maceio', {'requisicoes': 0, 'erros': 0})
+    return {**resumo, 'concorrencia': concorrencia, 'requisicoes': estatisticas['requisicoes'],
+            'erros_http': estatisticas['erros'], 'p50': latencia.get('p50'), 'p95': latencia.get('p95')}
+
+
+def imprimir(r: dict, rotulo: str) -> None:
+    taxa_erro = r['erro'] / r['consultadas'] if r['consultadas'] else 0.0
+    print(f"{rotulo:>13}{r['consultadas']:>11}{r['ja_gravadas']:>9}{r['requisicoes']:>13}{r['erros_http']:>11}"
+          f"{r['renovacoes_formulario']:>11}{taxa_erro:>12.1%}{r['tempo']:>11.2f}{r['por_segundo']:>10.1f}"
+          f"{r['p50'] or 0:>9.0f}{r['p95'] or 0:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--inscricoes', type=int, default=300)
+    parser.add_argument('--concorrencia', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--latencia', type=float, default=0.05, help='Atraso fixo por requisição (s)')
+    parser.add_argument('--jitter', type=float, default=0.02, help='Atraso aleatório adicional máximo (s)')
+    parser.add_argument('--taxa-erro', type=float, default=0.02, help='Fração de requisições respondidas com 503')
+    parser.add_argument('--usos-por-token', type=int, default=50,
+                        help='Consultas aceitas por token de sessão antes de expirar')
+    parser.add_argument('--taxa', type=float, default=1000.0, help='Orçamento de consultas/s no host')
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(latencia=args.latencia, jitter=args.jitter, taxa_erro=args.taxa_erro,
+                              usos_por_token=args.usos_por_token, semente=42).iniciar()
+    inscricoes = gerar_inscricoes(args.inscricoes)
+    try:
+        print(f"{args.inscricoes} inscrições, latência {args.latencia}s ± {args.jitter}s, erros {args.taxa_erro:.0%}, "
+              f"token válido por {args.usos_por_token or '∞'} consultas, orçamento {args.taxa:g}/s")
+        print(f"{'concorrência':>13}{'consultas':>11}{'puladas':>9}{'requisições':>13}{'HTTP erro':>11}"
+              f"{'renovações':>11}{'taxa erro':>12}{'tempo (s)':>11}{'/s':>10}{'p50 ms':>9}{'p95 ms':>9}")
+        saida = None
+        for concorrencia in args.concorrencia:
+            saida = os.path.join(tempfile.mkdtemp(prefix='bench_iptu_saida_'), 'iptu.ndjson')
+            imprimir(rodada(servidor, inscricoes, concorrencia, saida, args), str(concorrencia))
+
+        # Mesma saída de novo: só as inscrições que terminaram em erro são consultadas
+        imprimir(rodada(servidor, inscricoes, args.concorrencia[-1], saida, args), 'retomada')
+    finally:
+        servidor.parar()
+
+
+if __name__ == '__main__':
+    main()
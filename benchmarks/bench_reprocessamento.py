@@ -0,0 +1,121 @@
+"""
+Benchmark do arquivo bruto: mede o custo de arquivar as respostas durante o
+crawl de anúncios (servidor de replay, com e sem arquivo), monta um
+histórico sintético de N dias a partir das listagens das fixtures (parte
+das páginas repetida de um dia para o outro, para medir a deduplicação) e
+mede o reprocessamento offline com 1, 2, 4... processos contra o tempo de
+baixar de novo as mesmas páginas dentro do limite de taxa dos marketplaces
+
+Uso:
+    python benchmarks/bench_reprocessamento.py --dias 30 --paginas 50 --processos 1 2 4
+    python benchmarks/bench_reprocessamento.py --fracao-repetida 0.8
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import ArquivoRespostas, LimitadorTaxa, MaceioCondominiosScraperReal  # noqa: E402
+from servidor_replay import DIRETORIO_FIXTURES, ServidorReplay  # noqa: E402
+
+
+def medir_crawl(servidor: ServidorReplay, arquivar: bool, paginas: int) -> tuple:
+    scraper = MaceioCondominiosScraperReal(usar_cache=False, usar_navegador=False,
+                                           limitador=LimitadorTaxa(taxa=1000, rajada=1000),
+                                           data_dir=tempfile.mkdtemp(prefix='bench_reprocessamento_'),
+                                           urls=servidor.urls(), arquivar_respostas=arquivar)
+    inicio = time.perf_counter()
+    anuncios = sum(1 for _ in scraper.crawler_anuncios(max_paginas=paginas))
+    tempo = time.perf_counter() - inicio
+    scraper.encerrar()
+    return tempo, anuncios
+
+
+def montar_historico(diretorio: str, sites: list, dias: int, paginas: int, fracao_repetida: float) -> dict:
+    """
+    Grava dias × sites × páginas capturas no arquivo; cada página muda os
+    preços com probabilidade 1 - fracao_repetida em relação ao dia anterior
+    """
+    arquivo = ArquivoRespostas(diretorio)
+    aleatorio = random.Random(42)
+    listagens = {
+        'VivaReal': open(os.path.join(DIRETORIO_FIXTURES, 'vivareal_listagem.html'), encoding='utf-8').read(),
+        'ZapImóveis': open(os.path.join(DIRETORIO_FIXTURES, 'zapimoveis_listagem.html'), encoding='utf-8').read()
+    }
+    versoes = {}
+    inicio_historico = time.time() - dias * 86400
+    tempos = []
+    for dia in range(dias):
+        for site in sites:
+            for pagina in range(1, paginas + 1):
+                chave = (site['nome'], pagina)
+                if chave not in versoes or aleatorio.random() >= fracao_repetida:
+                    deslocamento = aleatorio.randint(-50, 50)
+                    versoes[chave] = re.sub(
+                        r'R\$ (\d{1,3}(?:\.\d{3})+)',
+                        lambda m: f"R$ {int(m.group(1).replace('.', '')) + 1000 * deslocamento:,}".replace(',', '.'),
+                        listagens[site['nome']].replace('{{pagina}}', str(pagina))
+                    ).encode('utf-8')
+                url = MaceioCondominiosScraperReal._url_pagina(site, pagina)
+                inicio = time.perf_counter()
+                arquivo.guardar(url, versoes[chave], tipo_conteudo='text/html; charset=utf-8',
+                                fonte='anuncios_imobiliarios', capturado_em=inicio_historico + dia * 86400 + pagina)
+                tempos.append(time.perf_counter() - inicio)
+    resumo = arquivo.resumo()
+    arquivo.fechar()
+    return {**resumo, 'guardar_ms': 1000 * sum(tempos) / len(tempos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=30)
+    parser.add_argument('--paginas', type=int, default=50, help='Páginas de listagem por site e por dia')
+    parser.add_argument('--fracao-repetida', type=float, default=0.5,
+                        help='Fração das páginas idêntica à do dia anterior')
+    parser.add_argument('--processos', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--latencia', type=float, default=0.05, help='Atraso por requisição no crawl (s)')
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(latencia=args.latencia, semente=42).iniciar()
+    try:
+        sem_arquivo, anuncios = medir_crawl(servidor, False, 5)
+        com_arquivo, _ = medir_crawl(servidor, True, 5)
+    finally:
+        servidor.parar()
+    print(f"crawl de {anuncios} anúncios: {sem_arquivo:.2f}s sem arquivo, {com_arquivo:.2f}s com arquivo "
+          f"({(com_arquivo / sem_arquivo - 1):+.1%})")
+
+    diretorio = tempfile.mkdtemp(prefix='bench_reprocessamento_')
+    scraper = MaceioCondominiosScraperReal(usar_cache=False, usar_navegador=False, data_dir=diretorio)
+    resumo = montar_historico(scraper.arquivo_bruto.diretorio, scraper.sites_imobiliarios, args.dias,
+                              args.paginas, args.fracao_repetida)
+    print(f"histórico: {resumo['capturas']} capturas, {resumo['objetos']} corpos distintos "
+          f"({resumo['objetos'] / resumo['capturas']:.0%}), {resumo['bytes_capturados'] / 2 ** 20:.1f} MiB capturados, "
+          f"{resumo['bytes_armazenados'] / 2 ** 20:.1f} MiB em disco "
+          f"({resumo['bytes_capturados'] / resumo['bytes_armazenados']:.0f}x), "
+          f"guardar {resumo['guardar_ms']:.2f} ms/captura ({scraper.arquivo_bruto.compressao})")
+
+    # Baixar de novo: cada página passa pelo limite de taxa do host do marketplace
+    taxa = min(t for t, _ in MaceioCondominiosScraperReal.TAXA_POR_HOST.values())
+    recrawl = resumo['capturas'] / len(scraper.sites_imobiliarios) / taxa
+    print(f"baixar de novo: ~{recrawl / 3600:.1f} h ({taxa:.2f} req/s por marketplace, sites em paralelo)")
+
+    print(f"{'processos':>10}{'capturas':>10}{'anúncios':>10}{'tempo (s)':>11}{'capturas/s':>12}{'vs. rede':>10}")
+    for processos in args.processos:
+        r = scraper.reprocessar_arquivo(destino=os.path.join(diretorio, f'reprocessado_{processos}'),
+                                        processos=processos)
+        print(f"{processos:>10}{r['capturas']:>10}{r['registros'].get('anuncios_imobiliarios', 0):>10}"
+              f"{r['tempo']:>11.2f}{r['capturas'] / r['tempo']:>12.0f}{recrawl / r['tempo']:>9.0f}x")
+    scraper.encerrar()
+
+
+if __name__ == '__main__':
+    main()
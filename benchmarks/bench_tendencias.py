@@ -0,0 +1,84 @@
+"""
+Benchmark dos agregados de tendências: simula N dias de coletas diárias de
+anúncios sintéticos (mesmo gerador do benchmark de deduplicação) e compara,
+à medida que o histórico cresce, o custo de atualizar os agregados com o
+snapshot do dia contra reagrupar o histórico inteiro, e o tempo do relatório
+
+Uso:
+    python benchmarks/bench_tendencias.py --dias 90 --anuncios 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.ERROR)
+
+from maceioCondominios import MaceioCondominiosScraperReal, RollupsAnuncios  # noqa: E402
+from bench_deduplicacao import gerar_anuncios  # noqa: E402
+
+
+def reagrupar_historico(historico: pd.DataFrame) -> pd.DataFrame:
+    """
+    Alternativa sem agregados: relê o histórico inteiro e refaz o groupby por dia × bairro × tipologia
+    """
+    tabela = historico.assign(
+        dia=historico['data_coleta'].str[:10],
+        tipologia=RollupsAnuncios.tipologia(historico['quartos']),
+        preco_m2=historico['preco'] / historico['area_m2']
+    )
+    return tabela.groupby(['dia', 'bairro', 'tipologia']).agg(
+        anuncios=('id', 'size'), preco_m2=('preco_m2', 'mean'), condominio=('condominio', 'mean'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=90)
+    parser.add_argument('--anuncios', type=int, default=20000, help='Anúncios ativos no mercado')
+    parser.add_argument('--fracao', type=float, default=0.6, help='Fração dos anúncios vista em cada coleta')
+    parser.add_argument('--a-cada', type=int, default=15, help='Imprime uma linha a cada N dias')
+    args = parser.parse_args()
+
+    mercado = gerar_anuncios(args.anuncios)
+    diretorio = tempfile.mkdtemp(prefix='bench_tendencias_')
+    scraper = MaceioCondominiosScraperReal(usar_cache=False, usar_navegador=False, data_dir=diretorio)
+    rollups = scraper.obter_rollups()
+    historico = []
+    hoje = pd.Timestamp.now().normalize()
+
+    print(f"{args.anuncios} anúncios no mercado, {args.fracao:.0%} vistos por coleta")
+    print(f"{'dias':>6}{'histórico':>12}{'atualização (ms)':>18}{'reagrupar (ms)':>16}{'relatório (ms)':>16}")
+    for dia in range(args.dias):
+        snapshot = mercado.sample(frac=args.fracao, random_state=dia).assign(
+            data_coleta=(hoje - pd.Timedelta(days=args.dias - 1 - dia)).isoformat())
+        historico.append(snapshot)
+
+        inicio = time.perf_counter()
+        rollups.atualizar(snapshot)
+        atualizacao = time.perf_counter() - inicio
+
+        if (dia + 1) % args.a_cada and dia + 1 != args.dias:
+            continue
+
+        inicio = time.perf_counter()
+        reagrupar_historico(pd.concat(historico, ignore_index=True))
+        reagrupar = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        scraper._tabelas_tendencias(args.dias)
+        relatorio = time.perf_counter() - inicio
+
+        total = sum(len(s) for s in historico)
+        print(f"{dia + 1:>6}{total:>12}{atualizacao * 1000:>18.1f}{reagrupar * 1000:>16.1f}{relatorio * 1000:>16.1f}")
+
+    scraper.encerrar()
+
+
+if __name__ == '__main__':
+    main()
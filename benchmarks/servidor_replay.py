@@ -0,0 +1,308 @@
+"""
+Servidor HTTP local que reproduz as fixtures gravadas de cada fonte
+(Portal do Cidadão, SEFAZ, IBGE, Transparência AL, CNR, VivaReal e
+ZapImóveis), com latência e erros injetáveis
+
+A consulta de IPTU da SEFAZ é simulada: cada GET do formulário emite um
+token de sessão (cookie + campo oculto) e o POST da consulta responde com
+a ficha do imóvel, gerada deterministicamente a partir da inscrição.
+
+Uso:
+    python benchmarks/servidor_replay.py --porta 8000 --latencia 0.05
+    python benchmarks/servidor_replay.py --gravar   # regrava as fixtures a partir das fontes reais
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+DIRETORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Prefixo de cada entrada de urls_reais no servidor local
+PREFIXOS = {
+    'portal_cidadao': '/portal/',
+    'sefaz_maceio': '/sefaz/',
+    'transparencia_estado': '/transparencia/',
+    'ibge_api': '/ibge/',
+    'ibge_agregados': '/ibge3/',
+    'cnr': '/cnr/',
+    'vivareal': '/vivareal/',
+    'zapimoveis': '/zapimoveis/'
+}
+
+TIPOS_CONTEUDO = {
+    '.html': 'text/html; charset=utf-8',
+    '.json': 'application/json; charset=utf-8'
+}
+
+
+class ServidorReplay:
+    """
+    Serve as rotas de fixtures/manifesto.json em uma thread de fundo e
+    contabiliza requisições, bytes e erros por fonte
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_FIXTURES, latencia: float = 0.0, jitter: float = 0.0,
+                 taxa_erro: float = 0.0, semente: Optional[int] = None, porta: int = 0, usos_por_token: int = 0):
+        """
+        usos_por_token: consultas aceitas por token de sessão antes de ele
+        expirar (403); 0 significa sem limite
+        """
+        self.diretorio = diretorio
+        self.latencia = latencia
+        self.jitter = jitter
+        self.taxa_erro = taxa_erro
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self.usos_por_token = usos_por_token
+        self._tokens = {}  # token -> consultas restantes (None = sem limite)
+
+        with open(os.path.join(diretorio, 'manifesto.json'), 'r', encoding='utf-8') as f:
+            self.rotas = {rota['caminho']: rota for rota in json.load(f)['rotas']}
+        self.estatisticas = {}
+
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                servidor._atender(self)
+
+            def do_POST(self):
+                servidor._atender(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', porta), Manipulador)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url_base(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def urls(self) -> Dict[str, str]:
+        """
+        Entradas de urls_reais apontando para este servidor
+        """
+        return {chave: self.url_base + prefixo for chave, prefixo in PREFIXOS.items()}
+
+    def iniciar(self) -> 'ServidorReplay':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def zerar_estatisticas(self) -> None:
+        with self._lock:
+            self.estatisticas = {}
+
+    def _contabilizar(self, fonte: str, bytes_enviados: int, erro: bool) -> None:
+        with self._lock:
+            estatistica = self.estatisticas.setdefault(fonte, {'requisicoes': 0, 'bytes': 0, 'erros': 0})
+            estatistica['requisicoes'] += 1
+            estatistica['bytes'] += bytes_enviados
+            estatistica['erros'] += int(erro)
+
+    def _atender(self, requisicao: BaseHTTPRequestHandler) -> None:
+        partes = urllib.parse.urlsplit(requisicao.path)
+        rota = self.rotas.get(partes.path)
+        corpo_requisicao = requisicao.rfile.read(int(requisicao.headers.get('Content-Length') or 0))
+        if rota is None:
+            self._responder(requisicao, 404, b'', 'text/plain', 'desconhecida')
+            return
+        if requisicao.command != rota.get('metodo', 'GET'):
+            self._responder(requisicao, 405, b'', 'text/plain', rota['fonte'], erro=True)
+            return
+
+        with self._lock:
+            atraso = rota.get('latencia', self.latencia) + self._aleatorio.uniform(0, self.jitter)
+            falhar = self._aleatorio.random() < rota.get('taxa_erro', self.taxa_erro)
+        if atraso > 0:
+            time.sleep(atraso)
+        if falhar:
+            self._responder(requisicao, 503, b'Servico indisponivel', 'text/plain', rota['fonte'], erro=True)
+            return
+
+        if 'consulta' in rota:
+            self._consultar(requisicao, rota, urllib.parse.parse_qs(corpo_requisicao.decode('utf-8')))
+            return
+
+        arquivo = rota['arquivo']
+        pagina = 1
+        if 'paginas' in rota:
+            consulta = urllib.parse.parse_qs(partes.query)
+            pagina = int(consulta.get('pagina', ['1'])[0])
+            if pagina > rota['paginas']:
+                arquivo = rota['arquivo_vazio']
+
+        with open(os.path.join(self.diretorio, arquivo), 'rb') as f:
+            corpo = f.read().replace(b'{{pagina}}', str(pagina).encode())
+
+        # Formulários com token: cada exibição abre uma sessão nova
+        cookie = None
+        if b'{{token}}' in corpo:
+            token = uuid.uuid4().hex[:16]
+            with self._lock:
+                self._tokens[token] = self.usos_por_token or None
+            corpo = corpo.replace(b'{{token}}', token.encode())
+            cookie = f'sessao={token}; Path=/; HttpOnly'
+
+        etag = '"' + hashlib.sha1(corpo).hexdigest()[:16] + '"'
+        if requisicao.headers.get('If-None-Match') == etag:
+            self._responder(requisicao, 304, b'', None, rota['fonte'], etag=etag)
+            return
+
+        tipo = TIPOS_CONTEUDO.get(os.path.splitext(arquivo)[1], 'application/octet-stream')
+        self._responder(requisicao, 200, corpo, tipo, rota['fonte'], etag=etag, cookie=cookie)
+
+    def _consultar(self, requisicao: BaseHTTPRequestHandler, rota: Dict, formulario: Dict) -> None:
+        """
+        Valida o token da sessão e responde com a ficha do imóvel ou com a
+        página de inscrição não encontrada (cerca de 10% das inscrições)
+        """
+        consulta = rota['consulta']
+        token = formulario.get(consulta['token'], [''])[0]
+        cookies = dict(parte.strip().split('=', 1) for parte in requisicao.headers.get('Cookie', '').split(';')
+                       if '=' in parte)
+        with self._lock:
+            restantes = self._tokens.get(token, 0)
+            valido = token == cookies.get('sessao') and (restantes is None or restantes > 0)
+            if valido and restantes is not None:
+                self._tokens[token] = restantes - 1
+        if not valido:
+            self._responder(requisicao, 403, b'Sessao expirada', 'text/plain', rota['fonte'], erro=True)
+            return
+
+        inscricao = formulario.get(consulta['inscricao'], [''])[0]
+        digitos = ''.join(c for c in inscricao if c.isdigit())
+        semente = hashlib.sha1(digitos.encode()).digest()
+        encontrada = len(digitos) >= 10 and semente[0] >= 26
+        with open(os.path.join(self.diretorio, rota['arquivo'] if encontrada else rota['arquivo_vazio']), 'rb') as f:
+            corpo = f.read().decode('utf-8')
+
+        area_terreno = 200 + int.from_bytes(semente[1:3], 'big') % 3000
+        area_construida = 40 + int.from_bytes(semente[3:5], 'big') % 400
+        valor_venal = area_construida * (2500 + semente[5] * 20) + area_terreno * 150
+        valores = {
+            'inscricao': inscricao,
+            'exercicio': formulario.get(consulta['exercicio'], ['2025'])[0],
+            'logradouro': ['Rua Engenheiro Mário de Gusmão', 'Avenida Álvaro Otacílio',
+                           'Rua Jangadeiros Alagoanos', 'Avenida Fernandes Lima'][semente[6] % 4],
+            'numero': str(10 + int.from_bytes(semente[7:9], 'big') % 3000),
+            'bairro': ['Ponta Verde', 'Pajuçara', 'Jatiúca', 'Farol', 'Poço'][semente[9] % 5],
+            'area_terreno': formatar_numero(area_terreno),
+            'area_construida': formatar_numero(area_construida),
+            'valor_venal': formatar_numero(valor_venal),
+            'valor_iptu': formatar_numero(valor_venal * 0.008),
+            'uso': ['Residencial', 'Residencial', 'Comercial'][semente[10] % 3]
+        }
+        for chave, valor in valores.items():
+            corpo = corpo.replace('{{' + chave + '}}', valor)
+        self._responder(requisicao, 200, corpo.encode('utf-8'), TIPOS_CONTEUDO['.html'], rota['fonte'])
+
+    def _responder(self, requisicao: BaseHTTPRequestHandler, status: int, corpo: bytes,
+                   tipo: Optional[str], fonte: str, etag: Optional[str] = None, erro: bool = False,
+                   cookie: Optional[str] = None) -> None:
+        requisicao.send_response(status)
+        if tipo:
+            requisicao.send_header('Content-Type', tipo)
+        if etag:
+            requisicao.send_header('ETag', etag)
+        if cookie:
+            requisicao.send_header('Set-Cookie', cookie)
+        requisicao.send_header('Content-Length', str(len(corpo)))
+        requisicao.end_headers()
+        requisicao.wfile.write(corpo)
+        self._contabilizar(fonte, len(corpo), erro)
+
+
+def formatar_numero(valor: float) -> str:
+    """
+    Número no formato brasileiro: 1.234,56
+    """
+    return f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def gravar_fixtures(diretorio: str = DIRETORIO_FIXTURES) -> None:
+    """
+    Baixa das fontes reais cada rota do manifesto e substitui a fixture
+    correspondente (a primeira página das listagens apenas)
+
+    Rotas dos agregados do IBGE com 'recorte' (uma chave de LOCALIDADES_IBGE)
+    ou 'localidades' são baixadas com esse recorte territorial.
+    """
+    import requests
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from maceioCondominios import LOCALIDADES_IBGE, MaceioCondominiosScraperReal
+
+    scraper = MaceioCondominiosScraperReal(usar_cache=False, usar_navegador=False)
+    urls_reais = scraper.urls_reais
+
+    with open(os.path.join(diretorio, 'manifesto.json'), 'r', encoding='utf-8') as f:
+        rotas = json.load(f)['rotas']
+
+    for rota in rotas:
+        if rota.get('metodo', 'GET') != 'GET':
+            continue
+        chave, prefixo = next((c, p) for c, p in PREFIXOS.items() if rota['caminho'].startswith(p))
+        url = urls_reais[chave] + rota['caminho'][len(prefixo):]
+        localidades = LOCALIDADES_IBGE[rota['recorte']] if 'recorte' in rota else rota.get('localidades')
+        if localidades:
+            url += f"?localidades={localidades}"
+        try:
+            resposta = scraper.session.get(url, timeout=20)
+            resposta.raise_for_status()
+        except requests.RequestException as e:
+            print(f"⚠️ {url}: {e}")
+            continue
+        with open(os.path.join(diretorio, rota['arquivo']), 'wb') as f:
+            f.write(resposta.content)
+        print(f"💾 {url} -> {rota['arquivo']} ({len(resposta.content)} bytes)")
+
+    scraper.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--latencia', type=float, default=0.0, help='Atraso fixo por requisição (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Atraso aleatório adicional máximo (s)')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de requisições respondidas com 503')
+    parser.add_argument('--usos-por-token', type=int, default=0,
+                        help='Consultas de IPTU aceitas por token de sessão (0 = sem limite)')
+    parser.add_argument('--gravar', action='store_true', help='Regrava as fixtures a partir das fontes reais')
+    args = parser.parse_args()
+
+    if args.gravar:
+        gravar_fixtures()
+        return
+
+    servidor = ServidorReplay(latencia=args.latencia, jitter=args.jitter, taxa_erro=args.taxa_erro, porta=args.porta,
+                              usos_por_token=args.usos_por_token)
+    print(f"Servindo fixtures em {servidor.url_base}")
+    for chave, url in servidor.urls().items():
+        print(f"  {chave:<22}{url}")
+    servidor.iniciar()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == '__main__':
+    main()
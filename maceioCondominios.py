@@ -1,19 +1,2687 @@
+from __future__ import annotations
+
 import requests
-import pandas as pd
 import json
 import time
-from bs4 import BeautifulSoup
+import argparse
+import threading
+import sqlite3
+import hashlib
+import io
+import csv
+import queue
+import uuid
+import gzip
+import random
+import signal
+import socket
+import multiprocessing
+import shutil
+import shlex
+import unicodedata
+import importlib
+import importlib.util
+from itertools import islice
+from lxml import etree
+from cssselect import GenericTranslator
+from functools import lru_cache
+from contextlib import contextmanager
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable, Iterable, Iterator
 import os
+import sys
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FuturesTimeoutError, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.response import HTTPResponse
 import re
 import urllib.parse
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+
+try:
+    import zstandard
+except ImportError:  # compressão zstd é opcional
+    zstandard = None
+
+
+class _ModuloSobDemanda:
+    """
+    Representa um módulo pesado e só o importa no primeiro acesso a um
+    atributo: comandos que não leem nem gravam tabelas (busca no índice,
+    consultas de IPTU, fontes só em JSON) não pagam o import do pandas e
+    do pyarrow. O selenium é importado dentro das funções que usam o Chrome.
+    """
+    
+    def __init__(self, nome: str):
+        self._nome = nome
+        self._modulo = None
+    
+    def __getattr__(self, atributo: str):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome)
+        return getattr(self._modulo, atributo)
+
+
+pd = _ModuloSobDemanda('pandas')
+np = _ModuloSobDemanda('numpy')
+pa = _ModuloSobDemanda('pyarrow')
+ds = _ModuloSobDemanda('pyarrow.dataset')
+pq = _ModuloSobDemanda('pyarrow.parquet')
+
+
+class PrazoFonteExcedido(Exception):
+    """
+    Sinaliza que a fonte em execução esgotou seu prazo ou foi cancelada
+    """
+
+
+class LimitadorTaxa:
+    """
+    Limitador de taxa por host no modelo token bucket: cada host recebe
+    `taxa` requisições por segundo, acumulando no máximo `rajada` fichas
+    """
+    
+    def __init__(self, taxa: float = 2.0, rajada: int = 4, por_host: Optional[Dict[str, tuple]] = None):
+        """
+        por_host mapeia host -> (taxa, rajada) para sobrescrever o padrão
+        """
+        self.padrao = (taxa, rajada)
+        self.por_host = por_host or {}
+        self._baldes = {}
+        self._lock = threading.Lock()
+    
+    def adquirir(self, host: str) -> float:
+        """
+        Reserva uma ficha para o host, dormindo só o necessário; retorna a espera
+        """
+        taxa, rajada = self.por_host.get(host, self.padrao)
+        
+        with self._lock:
+            agora = time.monotonic()
+            fichas, ultimo = self._baldes.get(host, (rajada, agora))
+            fichas = min(rajada, fichas + (agora - ultimo) * taxa) - 1
+            self._baldes[host] = (fichas, agora)
+        
+        # Saldo negativo significa que a ficha foi reservada no futuro
+        espera = -fichas / taxa if fichas < 0 else 0.0
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+class LimitadorTaxaCompartilhado(LimitadorTaxa):
+    """
+    Token bucket por host compartilhado entre processos, inclusive em máquinas
+    que montam o mesmo diretório: o saldo de cada host fica numa tabela SQLite
+    atualizada em transação exclusiva, então o orçamento é global e não por processo
+    
+    Usa o relógio de parede (o monotônico não é comparável entre processos);
+    em várias máquinas os relógios devem estar sincronizados por NTP. O
+    diário de rollback padrão do SQLite é mantido porque o WAL não funciona
+    em sistemas de arquivos de rede.
+    """
+    
+    def __init__(self, caminho: str, taxa: float = 2.0, rajada: int = 4,
+                 por_host: Optional[Dict[str, tuple]] = None):
+        super().__init__(taxa, rajada, por_host)
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS baldes (
+                host TEXT PRIMARY KEY,
+                fichas REAL NOT NULL,
+                ultimo REAL NOT NULL
+            )
+        """)
+    
+    def adquirir(self, host: str) -> float:
+        taxa, rajada = self.por_host.get(host, self.padrao)
+        
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                agora = time.time()
+                linha = self._conexao.execute(
+                    "SELECT fichas, ultimo FROM baldes WHERE host = ?", (host,)).fetchone()
+                fichas, ultimo = linha or (rajada, agora)
+                fichas = min(rajada, fichas + max(agora - ultimo, 0.0) * taxa) - 1
+                self._conexao.execute(
+                    "INSERT INTO baldes (host, fichas, ultimo) VALUES (?, ?, ?) "
+                    "ON CONFLICT(host) DO UPDATE SET fichas = excluded.fichas, ultimo = excluded.ultimo",
+                    (host, fichas, agora))
+                self._conexao.execute("COMMIT")
+            except Exception:
+                self._conexao.execute("ROLLBACK")
+                raise
+        
+        espera = -fichas / taxa if fichas < 0 else 0.0
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+    
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+class AdaptadorHTTP(HTTPAdapter):
+    """
+    Adaptador com retentativas (backoff exponencial com jitter em 429/5xx),
+    pool de conexões dimensionado para uso concorrente e limitador por host
+    """
+    
+    def __init__(self, limitador: Optional[LimitadorTaxa] = None, tentativas: int = 3,
+                 conexoes_por_host: int = 16, **kwargs):
+        self.limitador = limitador
+        kwargs.setdefault('max_retries', Retry(
+            total=tentativas,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        ))
+        kwargs.setdefault('pool_connections', 16)
+        kwargs.setdefault('pool_maxsize', conexoes_por_host)
+        super().__init__(**kwargs)
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.limitador is not None:
+            self.limitador.adquirir(urllib.parse.urlsplit(request.url).hostname or '')
+        return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+
+
+class CacheHTTP:
+    """
+    Cache persistente de respostas HTTP em SQLite, com revalidação por
+    ETag/Last-Modified, TTL por URL e descarte LRU limitado por tamanho
+    """
+    
+    # Cabeçalhos que deixam de valer porque o corpo é guardado já decodificado
+    CABECALHOS_DESCARTADOS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+    
+    def __init__(self, diretorio: str, ttls: Optional[List[tuple]] = None,
+                 tamanho_maximo: int = 200 * 1024 * 1024):
+        """
+        ttls é uma lista de (regex_da_url, segundos); None significa que a
+        resposta nunca expira e 0 obriga a revalidar a cada acesso
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.ttls = [(re.compile(padrao), ttl) for padrao, ttl in (ttls or [])]
+        self.tamanho_maximo = tamanho_maximo
+        self.estatisticas = {'acertos': 0, 'revalidacoes': 0, 'falhas': 0, 'descartes': 0}
+        
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(os.path.join(diretorio, 'cache_http.sqlite3'), check_same_thread=False)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                cabecalhos TEXT NOT NULL,
+                corpo BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                tamanho INTEGER NOT NULL,
+                armazenado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )
+        """)
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em)")
+        self._conexao.commit()
+    
+    def ttl_para(self, url: str) -> Optional[float]:
+        """
+        Retorna o TTL configurado para a URL (o primeiro padrão que casar vale)
+        """
+        for padrao, ttl in self.ttls:
+            if padrao.search(url):
+                return ttl
+        return 0
+    
+    def obter(self, url: str) -> Optional[Dict]:
+        """
+        Busca a entrada armazenada para a URL, atualizando seu último acesso
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT status, cabecalhos, corpo, etag, last_modified, armazenado_em FROM respostas WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conexao.execute("UPDATE respostas SET acessado_em = ? WHERE url = ?", (time.time(), url))
+            self._conexao.commit()
+        
+        status, cabecalhos, corpo, etag, last_modified, armazenado_em = linha
+        return {
+            'status': status,
+            'cabecalhos': json.loads(cabecalhos),
+            'corpo': corpo,
+            'etag': etag,
+            'last_modified': last_modified,
+            'armazenado_em': armazenado_em
+        }
+    
+    def esta_fresca(self, url: str, entrada: Dict) -> bool:
+        """
+        Indica se a entrada ainda está dentro do TTL e pode ser servida sem rede
+        """
+        ttl = self.ttl_para(url)
+        if ttl is None:
+            return True
+        return time.time() - entrada['armazenado_em'] < ttl
+    
+    def armazenar(self, url: str, status: int, cabecalhos: Dict[str, str], corpo: bytes) -> None:
+        """
+        Grava (ou substitui) a resposta da URL e aplica o limite de tamanho
+        """
+        cabecalhos = {chave: valor for chave, valor in cabecalhos.items()
+                      if chave.lower() not in self.CABECALHOS_DESCARTADOS}
+        agora = time.time()
+        
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(cabecalhos), corpo, cabecalhos.get('ETag'),
+                 cabecalhos.get('Last-Modified'), len(corpo), agora, agora)
+            )
+            self._descartar_excedente()
+            self._conexao.commit()
+    
+    def renovar(self, url: str, cabecalhos: Dict[str, str]) -> None:
+        """
+        Marca a entrada como revalidada (resposta 304), mesclando os novos cabeçalhos
+        """
+        entrada = self.obter(url)
+        if entrada is None:
+            return
+        
+        novos = dict(entrada['cabecalhos'])
+        novos.update({chave: valor for chave, valor in cabecalhos.items()
+                      if chave.lower() not in self.CABECALHOS_DESCARTADOS})
+        
+        with self._lock:
+            self._conexao.execute(
+                "UPDATE respostas SET cabecalhos = ?, etag = ?, last_modified = ?, armazenado_em = ? WHERE url = ?",
+                (json.dumps(novos), novos.get('ETag'), novos.get('Last-Modified'), time.time(), url)
+            )
+            self._conexao.commit()
+    
+    def _descartar_excedente(self) -> None:
+        """
+        Remove as entradas menos usadas recentemente até caber no tamanho máximo
+        """
+        total = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+        
+        for url, tamanho in self._conexao.execute(
+                "SELECT url, tamanho FROM respostas ORDER BY acessado_em").fetchall():
+            if total <= self.tamanho_maximo:
+                break
+            self._conexao.execute("DELETE FROM respostas WHERE url = ?", (url,))
+            total -= tamanho
+            self.estatisticas['descartes'] += 1
+    
+    def contar(self, evento: str) -> None:
+        """
+        Incrementa um contador de estatísticas de forma segura entre threads
+        """
+        with self._lock:
+            self.estatisticas[evento] += 1
+    
+    def resumo(self) -> str:
+        """
+        Texto curto com acertos e falhas para o log
+        """
+        e = self.estatisticas
+        return (f"{e['acertos']} acertos, {e['revalidacoes']} revalidações (304), "
+                f"{e['falhas']} falhas, {e['descartes']} descartes")
+
+
+class AdaptadorHTTPCache(AdaptadorHTTP):
+    """
+    Adaptador do requests que consulta o CacheHTTP antes de ir à rede e
+    transforma respostas 304 na versão armazenada; acertos no cache não
+    consomem fichas do limitador
+    """
+    
+    def __init__(self, cache: CacheHTTP, limitador: Optional[LimitadorTaxa] = None, **kwargs):
+        self.cache = cache
+        super().__init__(limitador, **kwargs)
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        # Cache-Control: no-cache na requisição pede uma cópia nova (formulários com token de sessão)
+        if request.method != 'GET' or 'no-cache' in request.headers.get('Cache-Control', ''):
+            return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        
+        url = request.url
+        entrada = self.cache.obter(url)
+        
+        if entrada is not None and self.cache.esta_fresca(url, entrada):
+            self.cache.contar('acertos')
+            return self._resposta_armazenada(request, entrada, 'acerto')
+        
+        if entrada is not None:
+            if entrada['etag']:
+                request.headers['If-None-Match'] = entrada['etag']
+            if entrada['last_modified']:
+                request.headers['If-Modified-Since'] = entrada['last_modified']
+        
+        resposta = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        
+        if resposta.status_code == 304 and entrada is not None:
+            self.cache.contar('revalidacoes')
+            self.cache.renovar(url, dict(resposta.headers))
+            resposta.close()
+            entrada['cabecalhos'].update(resposta.headers)
+            return self._resposta_armazenada(request, entrada, 'revalidado')
+        
+        self.cache.contar('falhas')
+        resposta.cache_status = 'falha'
+        
+        if resposta.status_code == 200 and self._armazenavel(resposta):
+            if stream:
+                # Respostas em streaming não são lidas aqui: quem consome o corpo
+                # o entrega ao cache só se o leu até o fim (corpos truncados não entram)
+                cabecalhos = dict(resposta.headers)
+                resposta.armazenar_no_cache = lambda corpo: self.cache.armazenar(url, 200, cabecalhos, corpo)
+            else:
+                self.cache.armazenar(url, resposta.status_code, dict(resposta.headers), resposta.content)
+        
+        return resposta
+    
+    def _armazenavel(self, resposta: requests.Response) -> bool:
+        """
+        Só vale guardar respostas que podem ser revalidadas ou que têm TTL
+        """
+        if 'no-store' in resposta.headers.get('Cache-Control', ''):
+            return False
+        tem_validador = 'ETag' in resposta.headers or 'Last-Modified' in resposta.headers
+        return tem_validador or self.cache.ttl_para(resposta.url) != 0
+    
+    def _resposta_armazenada(self, request, entrada: Dict, cache_status: str) -> requests.Response:
+        """
+        Monta uma Response do requests a partir de uma entrada do cache
+        """
+        cabecalhos = {chave: valor for chave, valor in entrada['cabecalhos'].items()
+                      if chave.lower() not in CacheHTTP.CABECALHOS_DESCARTADOS}
+        cabecalhos['Content-Length'] = str(len(entrada['corpo']))
+        
+        raw = HTTPResponse(
+            body=io.BytesIO(entrada['corpo']),
+            headers=cabecalhos,
+            status=entrada['status'],
+            preload_content=False,
+            decode_content=False
+        )
+        resposta = self.build_response(request, raw)
+        resposta.cache_status = cache_status
+        return resposta
+
+
+
+class PoolDriversChrome:
+    """
+    Pool limitado de drivers Chrome headless de longa duração: cada driver
+    é reciclado após `paginas_por_driver` páginas ou quando falha
+    """
+    
+    def __init__(self, fabrica: Callable[[], Optional[webdriver.Chrome]], tamanho: int = 2,
+                 paginas_por_driver: int = 50, espera_maxima: float = 60):
+        self.fabrica = fabrica
+        self.tamanho = tamanho
+        self.paginas_por_driver = paginas_por_driver
+        self.espera_maxima = espera_maxima
+        self.indisponivel = False
+        
+        self._ociosos = queue.LifoQueue()
+        self._usos = {}
+        self._criados = 0
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def sessao(self) -> Iterator[webdriver.Chrome]:
+        """
+        Empresta um driver do pool; erros do WebDriver descartam o driver
+        """
+        from selenium.common.exceptions import WebDriverException
+        
+        driver = self._obter()
+        try:
+            yield driver
+        except WebDriverException:
+            self._descartar(driver)
+            raise
+        else:
+            with self._lock:
+                self._usos[id(driver)] += 1
+                esgotado = self._usos[id(driver)] >= self.paginas_por_driver
+            if esgotado:
+                self._descartar(driver)
+            else:
+                self._ociosos.put(driver)
+    
+    def _obter(self) -> webdriver.Chrome:
+        """
+        Reaproveita um driver ocioso ou cria um novo enquanto houver vaga;
+        levanta TimeoutException (um WebDriverException) se nenhum driver
+        ficar livre em `espera_maxima` segundos
+        """
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        
+        prazo = time.monotonic() + self.espera_maxima
+        while True:
+            try:
+                return self._ociosos.get_nowait()
+            except queue.Empty:
+                pass
+            
+            if self.indisponivel:
+                raise WebDriverException("Chrome headless indisponível")
+            
+            with self._lock:
+                pode_criar = self._criados < self.tamanho
+                if pode_criar:
+                    self._criados += 1
+            if pode_criar:
+                break
+            
+            # Pool cheio: aguarda uma devolução, reavaliando periodicamente
+            if time.monotonic() >= prazo:
+                raise TimeoutException(f"Nenhum driver do pool ficou livre em {self.espera_maxima:.0f}s")
+            try:
+                return self._ociosos.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        
+        driver = self.fabrica()
+        if driver is None:
+            with self._lock:
+                self._criados -= 1
+            self.indisponivel = True
+            raise WebDriverException("Não foi possível iniciar o Chrome headless")
+        
+        with self._lock:
+            self._usos[id(driver)] = 0
+        return driver
+    
+    def _descartar(self, driver: webdriver.Chrome) -> None:
+        """
+        Encerra o driver e libera a vaga para um novo
+        """
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._usos.pop(id(driver), None)
+            self._criados -= 1
+    
+    def encerrar(self) -> None:
+        """
+        Encerra todos os drivers ociosos do pool
+        """
+        while True:
+            try:
+                self._descartar(self._ociosos.get_nowait())
+            except queue.Empty:
+                break
+
+
+
+class ArmazemParquet:
+    """
+    Dataset colunar append-only, particionado por fonte e data de coleta
+    (fonte=<fonte>/data=<AAAA-MM-DD>/part-*.parquet), com esquema
+    tipado por fonte
+    """
+    
+    # Fábricas dos tipos Arrow (chamadas só ao montar o esquema, para não importar o pyarrow antes)
+    TIPOS = {
+        'texto': lambda: pa.string(),
+        'inteiro': lambda: pa.int64(),
+        'decimal': lambda: pa.float64(),
+        'data_hora': lambda: pa.timestamp('us'),
+        'json': lambda: pa.string()
+    }
+    
+    ESQUEMAS = {
+        'portal_cidadao_maceio': {'servico': 'texto', 'url': 'texto', 'tipo': 'texto'},
+        'sefaz_maceio': {
+            'url': 'texto', 'tipo': 'texto', 'status': 'texto',
+            'formularios_disponiveis': 'inteiro', 'campos_consulta': 'json'
+        },
+        'ibge_oficial': {
+            'fonte': 'texto', 'codigo_ibge': 'inteiro', 'nome': 'texto', 'microrregiao': 'texto',
+            'mesorregiao': 'texto', 'uf': 'texto', 'regiao': 'texto', 'total_domicilios': 'decimal',
+            'ano_referencia': 'texto', 'tipo': 'texto'
+        },
+        'transparencia_alagoas': {
+            'titulo': 'texto', 'url': 'texto', 'categoria': 'texto', 'fonte': 'texto',
+            'status': 'texto', 'datasets_patrimonio': 'inteiro', 'data_acesso': 'data_hora'
+        },
+        'cartorios_reais': {
+            'nome': 'texto', 'endereco': 'texto', 'telefone': 'texto', 'responsavel': 'texto',
+            'servicos': 'json', 'fonte': 'texto', 'url': 'texto', 'servicos_disponiveis': 'json',
+            'abrangencia': 'texto', 'status': 'texto'
+        },
+        'sites_imobiliarios': {
+            'site': 'texto', 'url': 'texto', 'status': 'texto', 'imoveis_detectados': 'inteiro',
+            'data_acesso': 'data_hora', 'tipo': 'texto'
+        },
+        'agregados_ibge': {
+            'agregado': 'inteiro', 'variavel_id': 'inteiro', 'variavel': 'texto', 'unidade': 'texto',
+            'classificacao': 'texto', 'codigo_ibge': 'inteiro', 'municipio': 'texto', 'uf': 'texto',
+            'periodo': 'texto', 'valor': 'decimal'
+        },
+        'anuncios_imobiliarios': {
+            'id': 'texto', 'site': 'texto', 'titulo': 'texto', 'endereco': 'texto', 'bairro': 'texto',
+            'preco': 'decimal', 'condominio': 'decimal', 'area_m2': 'decimal', 'quartos': 'inteiro',
+            'url': 'texto', 'pagina': 'inteiro', 'data_coleta': 'data_hora'
+        },
+        'iptu_inscricoes': {
+            'inscricao': 'texto', 'status': 'texto', 'exercicio': 'texto', 'logradouro': 'texto',
+            'numero': 'texto', 'bairro': 'texto', 'area_terreno_m2': 'decimal', 'area_construida_m2': 'decimal',
+            'uso': 'texto', 'valor_venal': 'decimal', 'valor_iptu': 'decimal', 'mensagem': 'texto',
+            'tentativas': 'inteiro', 'data_consulta': 'data_hora'
+        }
+    }
+    
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.logger = logging.getLogger(__name__)
+    
+    def esquema(self, fonte: str) -> pa.Schema:
+        """
+        Esquema Arrow da fonte, acrescido do instante da coleta
+        """
+        campos = [(coluna, self.TIPOS[tipo]()) for coluna, tipo in self.ESQUEMAS[fonte].items()]
+        campos.append(('coletado_em', pa.timestamp('us')))
+        return pa.schema(campos)
+    
+    def gravar(self, fonte: str, registros: List[Dict], coletado_em: Optional[datetime] = None) -> Optional[str]:
+        """
+        Acrescenta os registros como um novo arquivo na partição da fonte e do dia
+        """
+        if not registros:
+            return None
+        
+        coletado_em = coletado_em or datetime.now()
+        df = pd.DataFrame(registros)
+        
+        desconhecidas = set(df.columns) - set(self.ESQUEMAS[fonte])
+        if desconhecidas:
+            self.logger.warning(f"Colunas fora do esquema de {fonte} ignoradas: {sorted(desconhecidas)}")
+        
+        for coluna, tipo in self.ESQUEMAS[fonte].items():
+            if coluna not in df.columns:
+                df[coluna] = None
+            if tipo in ('inteiro', 'decimal'):
+                df[coluna] = pd.to_numeric(df[coluna], errors='coerce')
+                if tipo == 'inteiro':
+                    df[coluna] = df[coluna].round().astype('Int64')
+            elif tipo == 'data_hora':
+                df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+            elif tipo == 'json':
+                df[coluna] = df[coluna].map(
+                    lambda v: v if v is None or isinstance(v, str) else json.dumps(v, ensure_ascii=False))
+            else:
+                df[coluna] = df[coluna].astype('string')
+        df['coletado_em'] = pd.Timestamp(coletado_em)
+        
+        esquema = self.esquema(fonte)
+        tabela = pa.Table.from_pandas(df[esquema.names], schema=esquema, preserve_index=False)
+        
+        particao = os.path.join(self.diretorio, f'fonte={fonte}', f"data={coletado_em.strftime('%Y-%m-%d')}")
+        os.makedirs(particao, exist_ok=True)
+        caminho = os.path.join(particao, f"part-{coletado_em.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(tabela, caminho, compression='zstd')
+        return caminho
+    
+    def ler(self, fonte: str, colunas: Optional[List[str]] = None, filtros: Optional[List[tuple]] = None,
+            data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lê a fonte lendo só as partições, colunas e row groups necessários
+        
+        filtros é uma lista de (coluna, operador, valor) com operadores
+        '==', '!=', '<', '<=', '>', '>=' e 'in'; data_inicio e data_fim
+        (AAAA-MM-DD) selecionam as partições de data.
+        """
+        raiz = os.path.join(self.diretorio, f'fonte={fonte}')
+        esquema = self.esquema(fonte)
+        if not os.path.isdir(raiz):
+            return pd.DataFrame(columns=colunas or esquema.names)
+        
+        dataset = ds.dataset(
+            raiz,
+            format='parquet',
+            schema=esquema.append(pa.field('data', pa.string())),
+            partitioning=ds.partitioning(pa.schema([('data', pa.string())]), flavor='hive')
+        )
+        
+        condicoes = list(filtros or [])
+        if data_inicio:
+            condicoes.append(('data', '>=', data_inicio))
+        if data_fim:
+            condicoes.append(('data', '<=', data_fim))
+        
+        expressao = None
+        for coluna, operador, valor in condicoes:
+            campo = ds.field(coluna)
+            condicao = {
+                '==': lambda: campo == valor,
+                '!=': lambda: campo != valor,
+                '<': lambda: campo < valor,
+                '<=': lambda: campo <= valor,
+                '>': lambda: campo > valor,
+                '>=': lambda: campo >= valor,
+                'in': lambda: campo.isin(list(valor))
+            }[operador]()
+            expressao = condicao if expressao is None else expressao & condicao
+        
+        return dataset.to_table(columns=colunas, filter=expressao).to_pandas()
+
+
+
+class EscritorNDJSON:
+    """
+    Grava registros um por linha (NDJSON), opcionalmente comprimidos com
+    gzip ou zstd, sem manter nada além da linha atual em memória
+    """
+    
+    EXTENSOES = {None: '.ndjson', 'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+    
+    def __init__(self, caminho_base: str, compressao: Optional[str] = None):
+        if compressao not in self.EXTENSOES:
+            raise ValueError(f"Compressão não suportada: {compressao}")
+        
+        self.caminho = caminho_base + self.EXTENSOES[compressao]
+        self.total = 0
+        
+        if compressao == 'gzip':
+            self._arquivo = gzip.open(self.caminho, 'wt', encoding='utf-8')
+        elif compressao == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("Compressão zstd requer o pacote 'zstandard'")
+            self._bruto = open(self.caminho, 'wb')
+            self._arquivo = io.TextIOWrapper(
+                zstandard.ZstdCompressor().stream_writer(self._bruto), encoding='utf-8')
+        else:
+            self._arquivo = open(self.caminho, 'w', encoding='utf-8')
+    
+    def escrever(self, registro: Dict) -> None:
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False, default=str))
+        self._arquivo.write('\n')
+        self.total += 1
+    
+    def fechar(self) -> None:
+        self._arquivo.close()
+        if hasattr(self, '_bruto'):
+            self._bruto.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def ler_ndjson(caminho: str) -> Iterator[Dict]:
+    """
+    Lê um arquivo NDJSON (comprimido ou não) registro a registro
+    """
+    if caminho.endswith('.gz'):
+        arquivo = gzip.open(caminho, 'rt', encoding='utf-8')
+    elif caminho.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Leitura de zstd requer o pacote 'zstandard'")
+        arquivo = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(caminho, 'rb')), encoding='utf-8')
+    else:
+        arquivo = open(caminho, 'r', encoding='utf-8')
+    
+    with arquivo:
+        for linha in arquivo:
+            if linha.strip():
+                yield json.loads(linha)
+
+
+def ler_inscricoes(caminho: str) -> Iterator[str]:
+    """
+    Lê as inscrições imobiliárias de um arquivo texto (uma por linha) ou CSV
+    (coluna 'inscricao'), sem repetições e na ordem do arquivo
+    """
+    vistas = set()
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+        if caminho.lower().endswith('.csv'):
+            valores = (linha.get('inscricao') or '' for linha in csv.DictReader(f))
+        else:
+            valores = f
+        for valor in valores:
+            inscricao = valor.strip()
+            if inscricao and not inscricao.startswith('#') and inscricao not in vistas:
+                vistas.add(inscricao)
+                yield inscricao
+
+
+class ArquivoRespostas:
+    """
+    Arquivo bruto das respostas baixadas, endereçado pelo conteúdo: cada
+    corpo distinto é gravado uma única vez, comprimido, em
+    objetos/<aa>/<sha256>, e o índice SQLite registra cada captura (URL,
+    método, corpo da requisição, status, fonte e instante) apontando para o hash
+    
+    Com ele o histórico pode ser reinterpretado por parsers novos sem acesso
+    à rede (ver MaceioCondominiosScraperReal.reprocessar_arquivo).
+    """
+    
+    EXTENSOES = {'zstd': '.zst', 'gzip': '.gz'}
+    
+    def __init__(self, diretorio: str, compressao: Optional[str] = None):
+        """
+        compressao: 'zstd' (padrão quando o pacote está instalado) ou 'gzip'
+        """
+        self.diretorio = diretorio
+        self.compressao = compressao or ('zstd' if zstandard is not None else 'gzip')
+        if self.compressao not in self.EXTENSOES or (self.compressao == 'zstd' and zstandard is None):
+            raise ValueError(f"Compressão não suportada: {self.compressao}")
+        os.makedirs(os.path.join(diretorio, 'objetos'), exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(os.path.join(diretorio, 'indice.sqlite3'), timeout=60,
+                                        check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode = WAL")
+        self._conexao.execute("PRAGMA synchronous = NORMAL")
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS objetos (
+                sha256 TEXT PRIMARY KEY,
+                compressao TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                tamanho_comprimido INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS capturas (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                metodo TEXT NOT NULL,
+                requisicao TEXT,
+                status INTEGER NOT NULL,
+                tipo_conteudo TEXT,
+                fonte TEXT,
+                completo INTEGER NOT NULL,
+                sha256 TEXT NOT NULL REFERENCES objetos (sha256),
+                capturado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS capturas_url ON capturas (url, capturado_em);
+            CREATE INDEX IF NOT EXISTS capturas_fonte ON capturas (fonte, capturado_em);
+            CREATE INDEX IF NOT EXISTS capturas_data ON capturas (capturado_em);
+        """)
+    
+    @classmethod
+    def caminho_objeto(cls, diretorio: str, sha256: str, compressao: str) -> str:
+        return os.path.join(diretorio, 'objetos', sha256[:2], sha256 + cls.EXTENSOES[compressao])
+    
+    @classmethod
+    def ler_objeto(cls, diretorio: str, sha256: str, compressao: str) -> bytes:
+        """
+        Lê um corpo direto do disco, sem abrir o índice (usado pelos processos do reprocessamento)
+        """
+        with open(cls.caminho_objeto(diretorio, sha256, compressao), 'rb') as f:
+            dados = f.read()
+        if compressao == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(dados)
+        return gzip.decompress(dados)
+    
+    def guardar(self, url: str, corpo: bytes, status: int = 200, metodo: str = 'GET',
+                requisicao: Optional[str] = None, tipo_conteudo: Optional[str] = None,
+                fonte: Optional[str] = None, completo: bool = True,
+                capturado_em: Optional[float] = None) -> str:
+        """
+        Registra a captura e grava o corpo se o hash ainda não estiver no arquivo; retorna o hash
+        """
+        sha256 = hashlib.sha256(corpo).hexdigest()
+        with self._lock:
+            existente = self._conexao.execute(
+                "SELECT compressao FROM objetos WHERE sha256 = ?", (sha256,)).fetchone()
+        
+        if existente is None:
+            # A compressão roda fora do lock; duas threads com o mesmo corpo gravam o mesmo arquivo
+            if self.compressao == 'zstd':
+                comprimido = zstandard.ZstdCompressor(level=10).compress(corpo)
+            else:
+                comprimido = gzip.compress(corpo, compresslevel=6)
+            caminho = self.caminho_objeto(self.diretorio, sha256, self.compressao)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            temporario = f"{caminho}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(temporario, 'wb') as f:
+                f.write(comprimido)
+            os.replace(temporario, caminho)
+        
+        with self._lock:
+            if existente is None:
+                self._conexao.execute("INSERT OR IGNORE INTO objetos VALUES (?, ?, ?, ?)",
+                                      (sha256, self.compressao, len(corpo), len(comprimido)))
+            self._conexao.execute(
+                "INSERT INTO capturas (url, metodo, requisicao, status, tipo_conteudo, fonte, completo, "
+                "sha256, capturado_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, metodo, requisicao, status, tipo_conteudo, fonte, int(completo), sha256,
+                 capturado_em or time.time()))
+            self._conexao.commit()
+        return sha256
+    
+    def ler(self, sha256: str) -> bytes:
+        with self._lock:
+            linha = self._conexao.execute("SELECT compressao FROM objetos WHERE sha256 = ?", (sha256,)).fetchone()
+        if linha is None:
+            raise KeyError(sha256)
+        return self.ler_objeto(self.diretorio, sha256, linha[0])
+    
+    def capturas(self, desde: Optional[str] = None, ate: Optional[str] = None,
+                 fontes: Optional[List[str]] = None, url: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Capturas em ordem cronológica, opcionalmente entre as datas AAAA-MM-DD
+        (inclusivas), de algumas fontes ou de uma URL
+        """
+        condicoes, parametros = [], []
+        if desde:
+            condicoes.append("c.capturado_em >= ?")
+            parametros.append(datetime.fromisoformat(desde).timestamp())
+        if ate:
+            condicoes.append("c.capturado_em < ?")
+            parametros.append((pd.Timestamp(ate) + pd.Timedelta(days=1)).to_pydatetime().timestamp())
+        if fontes:
+            condicoes.append(f"c.fonte IN ({','.join('?' * len(fontes))})")
+            parametros.extend(fontes)
+        if url:
+            condicoes.append("c.url = ?")
+            parametros.append(url)
+        
+        sql = ("SELECT c.*, o.compressao FROM capturas c JOIN objetos o ON o.sha256 = c.sha256"
+               + (" WHERE " + " AND ".join(condicoes) if condicoes else "") + " ORDER BY c.capturado_em, c.id")
+        with self._lock:
+            cursor = self._conexao.execute(sql, parametros)
+            colunas = [descricao[0] for descricao in cursor.description]
+            linhas = cursor.fetchall()
+        for linha in linhas:
+            yield dict(zip(colunas, linha))
+    
+    def resumo(self) -> Dict:
+        with self._lock:
+            capturas, bytes_capturados = self._conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(o.tamanho), 0) FROM capturas c JOIN objetos o USING (sha256)").fetchone()
+            objetos, bytes_objetos, bytes_armazenados = self._conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0), COALESCE(SUM(tamanho_comprimido), 0) FROM objetos").fetchone()
+        return {'capturas': capturas, 'objetos': objetos, 'bytes_capturados': bytes_capturados,
+                'bytes_distintos': bytes_objetos, 'bytes_armazenados': bytes_armazenados}
+    
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+class DiarioColeta:
+    """
+    Diário de progresso de uma coleta longa, gravado evento a evento para que
+    uma execução interrompida (queda, Ctrl-C) seja retomada de onde parou
+    
+    - diario.jsonl: fontes concluídas ou com falha, páginas do crawler disparadas,
+      concluídas e com falha
+    - fontes/<nome>.json: registros de cada fonte concluída
+    - anuncios.ndjson: anúncios das páginas já concluídas do crawler
+    
+    Cada gravação faz flush e fsync; uma linha cortada pela interrupção é
+    descartada ao reabrir o diário. Páginas e fontes que falharam continuam
+    pendentes: a coleta só descarta o diário quando não resta nada pendente,
+    e a próxima execução tenta de novo exatamente o que faltou.
+    """
+    
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        self._diario = None
+        self._anuncios = None
+        self._carregar()
+    
+    @property
+    def retomando(self) -> bool:
+        return bool(self.fontes_concluidas or self.paginas_concluidas or self.pendentes or self.fontes_com_falha)
+    
+    def incompleto(self, fontes: Iterable[str] = ()) -> bool:
+        """
+        Indica se resta alguma página pendente ou com falha, alguma fonte com
+        falha ou alguma das `fontes` ainda não concluída
+        """
+        return bool(self.pendentes or self.fontes_com_falha
+                    or any(nome not in self.fontes_concluidas for nome in fontes))
+    
+    def _caminho(self, *partes: str) -> str:
+        return os.path.join(self.diretorio, *partes)
+    
+    def _carregar(self) -> None:
+        """
+        Reconstrói o estado a partir do diário em disco, se houver
+        """
+        self.fontes_concluidas = {}   # nome -> total de registros
+        self.paginas_concluidas = {}  # site -> páginas já entregues
+        self.pendentes = {}           # (site, página) -> URL em andamento na interrupção ou com falha
+        self.falhas = {}              # (site, página) -> último erro
+        self.fontes_com_falha = {}    # nome -> último erro
+        self.total_anuncios = 0
+        
+        caminho = self._caminho('diario.jsonl')
+        if not os.path.exists(caminho):
+            return
+        self._reparar(caminho)
+        self._reparar(self._caminho('anuncios.ndjson'))
+        
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                evento = json.loads(linha)
+                if evento['evento'] == 'fonte':
+                    self.fontes_concluidas[evento['nome']] = evento['registros']
+                    self.fontes_com_falha.pop(evento['nome'], None)
+                elif evento['evento'] == 'fonte_falhou':
+                    self.fontes_com_falha[evento['nome']] = evento['erro']
+                elif evento['evento'] == 'pendente':
+                    self.pendentes[(evento['site'], evento['pagina'])] = evento['url']
+                elif evento['evento'] == 'falha':
+                    self.falhas[(evento['site'], evento['pagina'])] = evento['erro']
+                elif evento['evento'] == 'pagina':
+                    self.paginas_concluidas.setdefault(evento['site'], set()).add(evento['pagina'])
+                    self.pendentes.pop((evento['site'], evento['pagina']), None)
+                    self.falhas.pop((evento['site'], evento['pagina']), None)
+                    self.total_anuncios += evento['anuncios']
+    
+    @staticmethod
+    def _reparar(caminho: str) -> None:
+        """
+        Trunca o arquivo na última quebra de linha, descartando um registro
+        gravado pela metade
+        """
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, 'rb+') as f:
+            tamanho = posicao = f.seek(0, os.SEEK_END)
+            while posicao > 0:
+                bloco = min(65536, posicao)
+                f.seek(posicao - bloco)
+                fim = f.read(bloco).rfind(b'\n')
+                if fim >= 0:
+                    posicao = posicao - bloco + fim + 1
+                    break
+                posicao -= bloco
+            if posicao < tamanho:
+                f.truncate(posicao)
+    
+    @staticmethod
+    def _sincronizar(arquivo) -> None:
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    
+    def _registrar(self, evento: Dict) -> None:
+        if self._diario is None:
+            os.makedirs(self.diretorio, exist_ok=True)
+            self._diario = open(self._caminho('diario.jsonl'), 'a', encoding='utf-8')
+        self._diario.write(json.dumps(evento, ensure_ascii=False) + '\n')
+        self._sincronizar(self._diario)
+    
+    def fonte_concluida(self, nome: str) -> bool:
+        return nome in self.fontes_concluidas
+    
+    def carregar_fonte(self, nome: str) -> List[Dict]:
+        with open(self._caminho('fontes', f'{nome}.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def concluir_fonte(self, nome: str, registros: List[Dict]) -> None:
+        """
+        Grava os registros da fonte e só então marca a fonte como concluída
+        """
+        with self._lock:
+            os.makedirs(self._caminho('fontes'), exist_ok=True)
+            temporario = self._caminho('fontes', f'{nome}.json.tmp')
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(registros, f, ensure_ascii=False, default=str)
+                self._sincronizar(f)
+            os.replace(temporario, self._caminho('fontes', f'{nome}.json'))
+            self._registrar({'evento': 'fonte', 'nome': nome, 'registros': len(registros),
+                             'em': datetime.now().isoformat()})
+            self.fontes_concluidas[nome] = len(registros)
+            self.fontes_com_falha.pop(nome, None)
+    
+    def fonte_falhou(self, nome: str, erro: str) -> None:
+        """
+        Registra a fonte como não concluída: ela é tentada de novo na próxima execução
+        """
+        with self._lock:
+            self._registrar({'evento': 'fonte_falhou', 'nome': nome, 'erro': erro, 'em': datetime.now().isoformat()})
+            self.fontes_com_falha[nome] = erro
+    
+    def pagina_concluida(self, site: str, pagina: int) -> bool:
+        return pagina in self.paginas_concluidas.get(site, ())
+    
+    def pagina_pendente(self, site: str, pagina: int, url: str) -> None:
+        with self._lock:
+            self._registrar({'evento': 'pendente', 'site': site, 'pagina': pagina, 'url': url})
+            self.pendentes[(site, pagina)] = url
+    
+    def pagina_falhou(self, site: str, pagina: int, erro: str) -> None:
+        """
+        Registra a falha da página, que continua pendente para a próxima execução
+        """
+        with self._lock:
+            self._registrar({'evento': 'falha', 'site': site, 'pagina': pagina, 'erro': erro})
+            self.falhas[(site, pagina)] = erro
+    
+    def concluir_pagina(self, site: str, pagina: int, anuncios: List[Dict]) -> None:
+        """
+        Acrescenta os anúncios da página ao anuncios.ndjson e então marca a
+        página como concluída; se a interrupção cair entre os dois passos a
+        página é baixada de novo e os repetidos são descartados pelo id
+        """
+        with self._lock:
+            if self._anuncios is None:
+                os.makedirs(self.diretorio, exist_ok=True)
+                self._anuncios = open(self._caminho('anuncios.ndjson'), 'a', encoding='utf-8')
+            for anuncio in anuncios:
+                self._anuncios.write(json.dumps(anuncio, ensure_ascii=False, default=str) + '\n')
+            self._sincronizar(self._anuncios)
+            self._registrar({'evento': 'pagina', 'site': site, 'pagina': pagina, 'anuncios': len(anuncios)})
+            self.paginas_concluidas.setdefault(site, set()).add(pagina)
+            self.pendentes.pop((site, pagina), None)
+            self.falhas.pop((site, pagina), None)
+            self.total_anuncios += len(anuncios)
+    
+    def anuncios_salvos(self) -> Iterator[Dict]:
+        caminho = self._caminho('anuncios.ndjson')
+        if os.path.exists(caminho):
+            yield from ler_ndjson(caminho)
+    
+    def resumo(self) -> str:
+        paginas = sum(len(p) for p in self.paginas_concluidas.values())
+        return (f"{len(self.fontes_concluidas)} fonte(s) concluída(s), {len(self.fontes_com_falha)} com falha, "
+                f"{paginas} página(s) com {self.total_anuncios} anúncios já baixadas, "
+                f"{len(self.pendentes)} página(s) pendente(s) ({len(self.falhas)} com falha)")
+    
+    def fechar(self) -> None:
+        with self._lock:
+            for arquivo in (self._diario, self._anuncios):
+                if arquivo is not None:
+                    arquivo.close()
+            self._diario = self._anuncios = None
+    
+    def descartar(self) -> None:
+        """
+        Apaga o diário: chamado ao fim de uma coleta sem pendências ou para recomeçar do zero
+        """
+        self.fechar()
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+        self._carregar()
+
+
+class FilaTrabalho:
+    """
+    Fila de unidades de trabalho com lease, em SQLite, compartilhada por
+    vários processos ou por máquinas que montam o mesmo diretório
+    
+    Cada trabalhador reivindica a próxima unidade pendente e recebe um lease
+    de `duracao_lease` segundos, renovado a cada progresso. Se o processo
+    morrer, o lease expira e a unidade volta a ser reivindicável; unidades
+    que esgotam `max_tentativas` ficam como 'falhou'. Uma unidade devolvida
+    por falhar só volta a ser reivindicada depois de um backoff exponencial
+    com jitter (`backoff_inicial` · 2^(tentativas-1), até `backoff_maximo`).
+    
+    Unidades de um mesmo `grupo` (por exemplo, site e bairro) têm uma
+    `ordem`; quando a série acaba antes do previsto, descartar_grupo retira
+    as unidades posteriores ainda pendentes.
+    """
+    
+    def __init__(self, caminho: str, duracao_lease: float = 300.0, max_tentativas: int = 3,
+                 backoff_inicial: float = 30.0, backoff_maximo: float = 1800.0):
+        self.caminho = caminho
+        self.duracao_lease = duracao_lease
+        self.max_tentativas = max_tentativas
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS unidades (
+                id INTEGER PRIMARY KEY,
+                chave TEXT NOT NULL UNIQUE,
+                grupo TEXT,
+                ordem INTEGER NOT NULL DEFAULT 0,
+                dados TEXT NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'pendente',
+                trabalhador TEXT,
+                lease_ate REAL,
+                disponivel_em REAL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                resultado TEXT,
+                erro TEXT,
+                atualizado_em REAL
+            );
+            CREATE INDEX IF NOT EXISTS unidades_estado ON unidades (estado, ordem);
+            CREATE INDEX IF NOT EXISTS unidades_grupo ON unidades (grupo, ordem);
+        """)
+        # Filas criadas antes do backoff não têm a coluna
+        colunas = {linha['name'] for linha in self._conexao.execute("PRAGMA table_info(unidades)")}
+        if 'disponivel_em' not in colunas:
+            self._conexao.execute("ALTER TABLE unidades ADD COLUMN disponivel_em REAL")
+    
+    def enfileirar(self, unidades: Iterable[Dict]) -> int:
+        """
+        Acrescenta unidades ({'chave', 'grupo', 'ordem', 'dados'}); chaves já
+        existentes são ignoradas, então planejar de novo é seguro
+        """
+        linhas = [(u['chave'], u.get('grupo'), u.get('ordem', 0), json.dumps(u['dados'], ensure_ascii=False))
+                  for u in unidades]
+        with self._lock:
+            antes = self._conexao.total_changes
+            self._conexao.execute("BEGIN IMMEDIATE")
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO unidades (chave, grupo, ordem, dados) VALUES (?, ?, ?, ?)", linhas)
+            self._conexao.execute("COMMIT")
+            return self._conexao.total_changes - antes
+    
+    def reivindicar(self, trabalhador: str) -> Optional[Dict]:
+        """
+        Reserva a próxima unidade pendente fora do backoff (ou com lease
+        expirado) para o trabalhador; None quando não há nada disponível agora
+        """
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                agora = time.time()
+                # Leases expirados de unidades que já esgotaram as tentativas não voltam para a fila
+                self._conexao.execute(
+                    "UPDATE unidades SET estado = 'falhou', erro = COALESCE(erro, 'lease expirado'), "
+                    "atualizado_em = ? WHERE estado = 'em_andamento' AND lease_ate < ? AND tentativas >= ?",
+                    (agora, agora, self.max_tentativas))
+                linha = self._conexao.execute(
+                    "SELECT * FROM unidades WHERE (estado = 'pendente' AND COALESCE(disponivel_em, 0) <= ?) "
+                    "OR (estado = 'em_andamento' AND lease_ate < ?) ORDER BY ordem, id LIMIT 1",
+                    (agora, agora)).fetchone()
+                if linha is not None:
+                    self._conexao.execute(
+                        "UPDATE unidades SET estado = 'em_andamento', trabalhador = ?, lease_ate = ?, "
+                        "tentativas = tentativas + 1, atualizado_em = ? WHERE id = ?",
+                        (trabalhador, agora + self.duracao_lease, agora, linha['id']))
+                self._conexao.execute("COMMIT")
+            except Exception:
+                self._conexao.execute("ROLLBACK")
+                raise
+        
+        if linha is None:
+            return None
+        if linha['estado'] == 'em_andamento':
+            self.logger.warning(f"♻️ Lease expirado de {linha['trabalhador']} em {linha['chave']}: unidade reivindicada")
+        return {'id': linha['id'], 'chave': linha['chave'], 'grupo': linha['grupo'], 'ordem': linha['ordem'],
+                'dados': json.loads(linha['dados']), 'tentativas': linha['tentativas'] + 1}
+    
+    def _atualizar(self, sql: str, parametros: tuple) -> bool:
+        with self._lock:
+            return self._conexao.execute(sql, parametros).rowcount == 1
+    
+    def renovar(self, unidade: Dict, trabalhador: str) -> bool:
+        """
+        Estende o lease; False se o lease já expirou e a unidade foi reivindicada por outro
+        """
+        agora = time.time()
+        return self._atualizar(
+            "UPDATE unidades SET lease_ate = ?, atualizado_em = ? "
+            "WHERE id = ? AND trabalhador = ? AND estado = 'em_andamento'",
+            (agora + self.duracao_lease, agora, unidade['id'], trabalhador))
+    
+    def concluir(self, unidade: Dict, trabalhador: str, resultado: Optional[Dict] = None) -> bool:
+        return self._atualizar(
+            "UPDATE unidades SET estado = 'concluida', lease_ate = NULL, resultado = ?, erro = NULL, "
+            "atualizado_em = ? WHERE id = ? AND trabalhador = ? AND estado = 'em_andamento'",
+            (json.dumps(resultado or {}, ensure_ascii=False), time.time(), unidade['id'], trabalhador))
+    
+    def falhar(self, unidade: Dict, trabalhador: str, erro: str) -> bool:
+        """
+        Devolve a unidade à fila, reivindicável só após o backoff, ou a marca
+        como 'falhou' se esgotou as tentativas
+        """
+        agora = time.time()
+        espera = min(self.backoff_maximo, self.backoff_inicial * 2 ** (unidade['tentativas'] - 1))
+        return self._atualizar(
+            "UPDATE unidades SET estado = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END, "
+            "lease_ate = NULL, disponivel_em = ?, erro = ?, atualizado_em = ? "
+            "WHERE id = ? AND trabalhador = ? AND estado = 'em_andamento'",
+            (self.max_tentativas, agora + espera * random.uniform(0.5, 1.5), erro, agora, unidade['id'],
+             trabalhador))
+    
+    def descartar_grupo(self, grupo: str, apos_ordem: int) -> int:
+        with self._lock:
+            return self._conexao.execute(
+                "UPDATE unidades SET estado = 'descartada', atualizado_em = ? "
+                "WHERE grupo = ? AND ordem > ? AND estado = 'pendente'",
+                (time.time(), grupo, apos_ordem)).rowcount
+    
+    def restantes(self) -> int:
+        """
+        Unidades pendentes ou em andamento (em qualquer trabalhador)
+        """
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT COUNT(*) FROM unidades WHERE estado IN ('pendente', 'em_andamento')").fetchone()[0]
+    
+    def resumo(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conexao.execute("SELECT estado, COUNT(*) FROM unidades GROUP BY estado").fetchall())
+    
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+class MetricasColeta:
+    """
+    Instrumentação por fonte: latência das requisições (histograma), tempo
+    até os cabeçalhos, bytes, status HTTP, retentativas, resultado do cache
+    e tempo de parse
+    """
+    
+    LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fontes = {}
+    
+    def _fonte(self, fonte: str) -> Dict:
+        if fonte not in self._fontes:
+            self._fontes[fonte] = {
+                'requisicoes': 0,
+                'erros': 0,
+                'status_http': {},
+                'bytes': 0,
+                'retentativas': 0,
+                'cache': {},
+                'latencias': [],
+                'tempo_cabecalhos': 0.0,
+                'parse_segundos': 0.0,
+                'parses': 0,
+                'duracao_segundos': None,
+                'registros': None
+            }
+        return self._fontes[fonte]
+    
+    def registrar_requisicao(self, fonte: str, duracao: float, resposta: Optional[requests.Response] = None,
+                             erro: Optional[Exception] = None) -> None:
+        retentativas = 0
+        if resposta is not None:
+            historico = getattr(getattr(resposta.raw, 'retries', None), 'history', None)
+            retentativas = len(historico or ())
+        
+        with self._lock:
+            m = self._fonte(fonte)
+            m['requisicoes'] += 1
+            m['latencias'].append(duracao)
+            m['retentativas'] += retentativas
+            if erro is not None or resposta is None:
+                m['erros'] += 1
+                return
+            
+            status = str(resposta.status_code)
+            m['status_http'][status] = m['status_http'].get(status, 0) + 1
+            m['tempo_cabecalhos'] += resposta.elapsed.total_seconds()
+            if not resposta.raw or resposta._content_consumed:
+                m['bytes'] += len(resposta.content or b'')
+            cache = getattr(resposta, 'cache_status', None)
+            if cache:
+                m['cache'][cache] = m['cache'].get(cache, 0) + 1
+    
+    def registrar_bytes(self, fonte: str, total: int) -> None:
+        """
+        Bytes de corpos lidos em streaming (não contabilizados na requisição)
+        """
+        with self._lock:
+            self._fonte(fonte)['bytes'] += total
+    
+    def registrar_parse(self, fonte: str, duracao: float) -> None:
+        with self._lock:
+            m = self._fonte(fonte)
+            m['parse_segundos'] += duracao
+            m['parses'] += 1
+    
+    def registrar_fonte(self, fonte: str, duracao: float, registros: int) -> None:
+        with self._lock:
+            m = self._fonte(fonte)
+            m['duracao_segundos'] = duracao
+            m['registros'] = registros
+    
+    def reiniciar_fonte(self, fonte: str) -> None:
+        """
+        Descarta as métricas acumuladas da fonte (no agendador, cada execução
+        substitui a anterior em vez de acumular latências indefinidamente)
+        """
+        with self._lock:
+            self._fontes.pop(fonte, None)
+    
+    @staticmethod
+    def _percentil(valores: List[float], fracao: float) -> Optional[float]:
+        if not valores:
+            return None
+        ordenados = sorted(valores)
+        return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+    
+    def resumo(self) -> Dict[str, Dict]:
+        """
+        Resumo por fonte para o bloco de metadados (tempos em milissegundos)
+        """
+        with self._lock:
+            resumo = {}
+            for fonte, m in self._fontes.items():
+                latencias = m['latencias']
+                ms = lambda v: None if v is None else round(v * 1000, 1)
+                resumo[fonte] = {
+                    'requisicoes': m['requisicoes'],
+                    'erros': m['erros'],
+                    'status_http': dict(m['status_http']),
+                    'bytes': m['bytes'],
+                    'retentativas': m['retentativas'],
+                    'cache': dict(m['cache']),
+                    'latencia_ms': {
+                        'p50': ms(self._percentil(latencias, 0.5)),
+                        'p95': ms(self._percentil(latencias, 0.95)),
+                        'max': ms(max(latencias) if latencias else None),
+                        'total': ms(sum(latencias))
+                    },
+                    'tempo_ate_cabecalhos_ms': ms(m['tempo_cabecalhos']),
+                    'parse_ms': ms(m['parse_segundos']),
+                    'duracao_ms': ms(m['duracao_segundos']),
+                    'registros': m['registros']
+                }
+            return resumo
+    
+    def exportar_json(self, caminho: str) -> None:
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({'gerado_em': datetime.now().isoformat(), 'fontes': self.resumo()}, f,
+                      ensure_ascii=False, indent=2)
+    
+    def exportar_prometheus(self, caminho: str) -> None:
+        """
+        Grava no formato textfile do node_exporter (arquivo substituído atomicamente)
+        """
+        linhas = [
+            '# HELP maceio_coleta_latencia_segundos Latência das requisições HTTP por fonte',
+            '# TYPE maceio_coleta_latencia_segundos histogram'
+        ]
+        with self._lock:
+            fontes = {fonte: dict(m, latencias=list(m['latencias'])) for fonte, m in self._fontes.items()}
+        
+        for fonte, m in fontes.items():
+            acumulado = 0
+            for limite in self.LIMITES_LATENCIA:
+                acumulado = sum(1 for v in m['latencias'] if v <= limite)
+                linhas.append(f'maceio_coleta_latencia_segundos_bucket{{fonte="{fonte}",le="{limite}"}} {acumulado}')
+            linhas.append(f'maceio_coleta_latencia_segundos_bucket{{fonte="{fonte}",le="+Inf"}} {len(m["latencias"])}')
+            linhas.append(f'maceio_coleta_latencia_segundos_sum{{fonte="{fonte}"}} {sum(m["latencias"]):.6f}')
+            linhas.append(f'maceio_coleta_latencia_segundos_count{{fonte="{fonte}"}} {len(m["latencias"])}')
+        
+        contadores = [
+            ('maceio_coleta_bytes_total', 'Bytes de corpo recebidos', lambda m: [('', m['bytes'])]),
+            ('maceio_coleta_retentativas_total', 'Retentativas HTTP', lambda m: [('', m['retentativas'])]),
+            ('maceio_coleta_erros_total', 'Requisições sem resposta', lambda m: [('', m['erros'])]),
+            ('maceio_coleta_respostas_total', 'Respostas por status HTTP',
+             lambda m: [(f',status="{k}"', v) for k, v in m['status_http'].items()]),
+            ('maceio_coleta_cache_total', 'Resultado do cache HTTP',
+             lambda m: [(f',resultado="{k}"', v) for k, v in m['cache'].items()]),
+            ('maceio_coleta_parse_segundos_total', 'Tempo gasto em parse', lambda m: [('', m['parse_segundos'])])
+        ]
+        for nome, ajuda, valores in contadores:
+            linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} counter']
+            for fonte, m in fontes.items():
+                for rotulos, valor in valores(m):
+                    linhas.append(f'{nome}{{fonte="{fonte}"{rotulos}}} {valor}')
+        
+        linhas += ['# HELP maceio_coleta_duracao_segundos Duração da última coleta da fonte',
+                   '# TYPE maceio_coleta_duracao_segundos gauge']
+        linhas += [f'maceio_coleta_duracao_segundos{{fonte="{fonte}"}} {m["duracao_segundos"]:.6f}'
+                   for fonte, m in fontes.items() if m['duracao_segundos'] is not None]
+        linhas += ['# HELP maceio_coleta_registros Registros obtidos na última coleta da fonte',
+                   '# TYPE maceio_coleta_registros gauge']
+        linhas += [f'maceio_coleta_registros{{fonte="{fonte}"}} {m["registros"]}'
+                   for fonte, m in fontes.items() if m['registros'] is not None]
+        
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(linhas) + '\n')
+        os.replace(temporario, caminho)
+
+
+# Especificações declarativas de extração: cada grupo lista os itens (CSS) e os
+# campos lidos de cada item. Campos aceitam 'css' (ou lista de alternativas),
+# 'xpath' e 'atributo'; sem atributo o valor é o texto normalizado do nó.
+# 'limite' encerra o grupo após esse número de itens e 'termina_em' (CSS) quando
+# fecha o primeiro elemento que satisfaz o seletor, normalmente o contêiner dos
+# itens; na leitura em streaming o download para quando todos os grupos terminaram.
+ESPECIFICACOES_EXTRACAO = {
+    'portal_cidadao_maceio': {
+        'formularios': {
+            'itens': 'form',
+            'campos': {'action': {'xpath': '.', 'atributo': 'action'}},
+            'termina_em': 'main'
+        },
+        'servicos': {
+            'itens': 'a[href]',
+            'campos': {
+                'servico': {'xpath': '.'},
+                'url': {'xpath': '.', 'atributo': 'href'}
+            },
+            'filtro': {'campo': 'servico', 'contem': ['imóvel', 'imovel', 'cadastr', 'iptu', 'predial']},
+            'termina_em': 'main'
+        }
+    },
+    'sefaz_maceio': {
+        'formularios': {
+            'itens': 'form',
+            'campos': {'action': {'xpath': '.', 'atributo': 'action'}}
+        },
+        'campos_consulta': {
+            'itens': 'input[name]',
+            'campos': {
+                'campo': {'xpath': '.', 'atributo': 'name'},
+                'tipo': {'xpath': '.', 'atributo': 'type', 'padrao': 'text'},
+                'placeholder': {'xpath': '.', 'atributo': 'placeholder', 'padrao': ''}
+            }
+        }
+    },
+    # Campos do formulário de consulta do IPTU (valores iniciais e token de sessão incluídos)
+    'sefaz_iptu_formulario': {
+        'campos': {
+            'itens': 'input[name], select[name]',
+            'campos': {
+                'nome': {'xpath': '.', 'atributo': 'name'},
+                'tipo': {'xpath': '.', 'atributo': 'type', 'padrao': 'text'},
+                'valor': {'xpath': '.', 'atributo': 'value', 'padrao': ''},
+                'opcao': {'css': ['option[selected]', 'option']},
+                'formulario': {'xpath': 'ancestor::form[1]', 'atributo': 'action', 'padrao': ''},
+                'metodo': {'xpath': 'ancestor::form[1]', 'atributo': 'method', 'padrao': 'get'}
+            }
+        }
+    },
+    # Resposta da consulta: ficha do imóvel em pares rótulo/valor, ou mensagem de erro
+    'sefaz_iptu_resultado': {
+        'linhas': {
+            'itens': 'tr',
+            'campos': {'rotulo': {'css': 'th'}, 'valor': {'css': 'td'}}
+        },
+        'mensagens': {
+            'itens': '.alert, .mensagem, .erro',
+            'campos': {'texto': {'xpath': '.'}}
+        },
+        'formularios': {
+            'itens': 'form',
+            'campos': {'action': {'xpath': '.', 'atributo': 'action'}}
+        }
+    },
+    'transparencia_alagoas': {
+        'datasets': {
+            'itens': 'a[href]',
+            'campos': {
+                'titulo': {'xpath': '.'},
+                'url': {'xpath': '.', 'atributo': 'href'}
+            },
+            'filtro': {'campo': 'titulo', 'contem': ['imóv', 'patrim', 'bem', 'propriedade']},
+            'termina_em': 'main'
+        }
+    }
+}
+
+
+@lru_cache(maxsize=256)
+def _css_para_xpath(css: str, prefixo: str) -> str:
+    """
+    Traduz (e memoriza) um seletor CSS para XPath com o eixo indicado
+    """
+    return GenericTranslator().css_to_xpath(css, prefix=prefixo)
+
+
+@lru_cache(maxsize=256)
+def _tags_do_seletor(css: str) -> Optional[tuple]:
+    """
+    Tags dos elementos finais de um seletor CSS; None quando algum aceita qualquer tag
+    """
+    tags = set()
+    for parte in css.split(','):
+        ultimo = parte.strip().split()[-1]
+        encontrado = re.match(r'[a-zA-Z][\w-]*', ultimo)
+        if not encontrado:
+            return None
+        tags.add(encontrado.group(0).lower())
+    return tuple(sorted(tags))
+
+
+_xpaths_por_thread = threading.local()
+
+
+def _xpath(expressao: str) -> etree.XPath:
+    """
+    XPath compilado, memorizado por thread (avaliadores do lxml não são compartilháveis)
+    """
+    cache = getattr(_xpaths_por_thread, 'cache', None)
+    if cache is None:
+        cache = _xpaths_por_thread.cache = {}
+    if expressao not in cache:
+        cache[expressao] = etree.XPath(expressao)
+    return cache[expressao]
+
+
+def _valor_campo(elemento, definicao: Dict) -> Optional[str]:
+    """
+    Lê um campo de um item a partir da definição declarativa
+    """
+    if 'xpath' in definicao:
+        alternativas = [definicao['xpath']]
+    else:
+        css = definicao['css']
+        alternativas = [_css_para_xpath(c, 'descendant-or-self::') for c in ([css] if isinstance(css, str) else css)]
+    
+    for expressao in alternativas:
+        # '.' é o próprio item: dispensa a avaliação de XPath
+        encontrados = [elemento] if expressao == '.' else _xpath(expressao)(elemento)
+        if not encontrados:
+            continue
+        alvo = encontrados[0]
+        if definicao.get('atributo'):
+            valor = alvo.get(definicao['atributo'])
+            if valor is None:
+                continue
+            return valor
+        return ' '.join(' '.join(alvo.itertext()).split())
+    
+    return definicao.get('padrao')
+
+
+def _compilar_especificacao(especificacao: Dict[str, Dict]) -> tuple:
+    """
+    Grupos (nome, definição, XPath do item, XPath do fim) e tags de interesse
+    para o filtro do parser; tags é None quando algum seletor aceita qualquer tag
+    """
+    grupos = []
+    tags = set()
+    for nome, grupo in especificacao.items():
+        seletores = [grupo['itens']] + ([grupo['termina_em']] if grupo.get('termina_em') else [])
+        for seletor in seletores:
+            tags_grupo = _tags_do_seletor(seletor)
+            if tags_grupo is None:
+                tags = None
+            elif tags is not None:
+                tags.update(tags_grupo)
+        fim = _css_para_xpath(grupo['termina_em'], 'self::') if grupo.get('termina_em') else None
+        grupos.append((nome, grupo, _css_para_xpath(grupo['itens'], 'self::'), fim))
+    return grupos, sorted(tags) if tags else None
+
+
+def _codificacao_padrao(inicio: bytes, codificacao: Optional[str]) -> Optional[str]:
+    # Sem <meta charset> o libxml2 assumiria latin-1; os portais servem UTF-8
+    if codificacao is None and not re.search(rb'<meta[^>]+charset', inicio[:4096], re.IGNORECASE):
+        return 'utf-8'
+    return codificacao
+
+
+def _extrair_elemento(elemento, grupos: List[tuple], resultado: Dict[str, List[Dict]], encerrados: set) -> None:
+    """
+    Extrai o elemento fechado em cada grupo cujo seletor de item ele satisfaz
+    e marca em `encerrados` os grupos que atingiram o limite ou o elemento final
+    """
+    for nome, grupo, seletor_item, seletor_fim in grupos:
+        if nome in encerrados:
+            continue
+        if seletor_fim is not None and _xpath(seletor_fim)(elemento):
+            # Os itens do contêiner já fecharam antes dele (eventos 'end' vêm em pós-ordem)
+            encerrados.add(nome)
+            continue
+        if not _xpath(seletor_item)(elemento):
+            continue
+        
+        # O campo do filtro é lido primeiro para descartar cedo os itens irrelevantes
+        filtro = grupo.get('filtro')
+        registro = {}
+        if filtro:
+            registro[filtro['campo']] = _valor_campo(elemento, grupo['campos'][filtro['campo']])
+            texto = (registro[filtro['campo']] or '').lower()
+            if not any(palavra in texto for palavra in filtro['contem']):
+                continue
+        
+        for campo, definicao in grupo['campos'].items():
+            if campo not in registro:
+                registro[campo] = _valor_campo(elemento, definicao)
+        
+        resultado[nome].append(registro)
+        if grupo.get('limite') is not None and len(resultado[nome]) >= grupo['limite']:
+            encerrados.add(nome)
+        
+        if grupo.get('descartar'):
+            elemento.clear(keep_tail=True)
+            while elemento.getprevious() is not None:
+                del elemento.getparent()[0]
+
+
+def extrair_html(conteudo: bytes, especificacao: Dict[str, Dict],
+                 codificacao: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Motor de extração baseado em lxml: percorre o HTML em streaming
+    (iterparse) e só avalia os seletores nas subárvores dos itens pedidos
+    
+    Grupos marcados com 'descartar' liberam cada item após a extração, o
+    que mantém a memória constante em páginas de listagem grandes. Grupos
+    com 'limite' guardam no máximo esse número de itens e grupos com
+    'termina_em' ignoram os itens depois do elemento final.
+    """
+    grupos, tags = _compilar_especificacao(especificacao)
+    resultado = {nome: [] for nome in especificacao}
+    encerrados = set()
+    if not conteudo:
+        return resultado
+    
+    eventos = etree.iterparse(io.BytesIO(conteudo), events=('end',), html=True, recover=True,
+                              encoding=_codificacao_padrao(conteudo, codificacao), tag=tags)
+    try:
+        for _, elemento in eventos:
+            _extrair_elemento(elemento, grupos, resultado, encerrados)
+    except etree.XMLSyntaxError:
+        # Documento vazio ou irrecuperável: devolve o que já foi extraído
+        pass
+    
+    return resultado
+
+
+class ExtratorHTMLIncremental:
+    """
+    Versão incremental de extrair_html: recebe o HTML em blocos, à medida
+    que chega da rede, e extrai cada item assim que seu elemento fecha
+    
+    Quando todos os grupos terminaram (atingiram o 'limite' ou fecharam o
+    elemento de 'termina_em'), `concluido` fica verdadeiro e o restante do
+    documento não precisa ser baixado; nenhum item é perdido com isso. Basta
+    um grupo sem limite nem fim para o documento ser lido até o fim.
+    """
+    
+    def __init__(self, especificacao: Dict[str, Dict], codificacao: Optional[str] = None):
+        self._grupos, self._tags = _compilar_especificacao(especificacao)
+        self._codificacao = codificacao
+        self._parser = None
+        self._inicio = b''
+        self.resultado = {nome: [] for nome in especificacao}
+        self._encerrados = set()
+    
+    @property
+    def concluido(self) -> bool:
+        return bool(self._grupos) and len(self._encerrados) == len(self._grupos)
+    
+    def _criar_parser(self) -> None:
+        self._parser = etree.HTMLPullParser(events=('end',), tag=self._tags, recover=True,
+                                            encoding=_codificacao_padrao(self._inicio, self._codificacao))
+    
+    def _processar_eventos(self) -> None:
+        for _, elemento in self._parser.read_events():
+            _extrair_elemento(elemento, self._grupos, self.resultado, self._encerrados)
+    
+    def alimentar(self, bloco: bytes) -> None:
+        # Os primeiros 4 KiB são acumulados para detectar o <meta charset> antes de criar o parser
+        if self._parser is None:
+            self._inicio += bloco
+            if len(self._inicio) < 4096:
+                return
+            self._criar_parser()
+            bloco, self._inicio = self._inicio, b''
+        try:
+            self._parser.feed(bloco)
+        except etree.XMLSyntaxError:
+            pass
+        self._processar_eventos()
+    
+    def finalizar(self) -> Dict[str, List[Dict]]:
+        """
+        Fecha o parser (o documento pode ter sido interrompido) e devolve o extraído
+        """
+        if self._parser is None:
+            if not self._inicio:
+                return self.resultado
+            self._criar_parser()
+            self._parser.feed(self._inicio)
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        self._processar_eventos()
+        return self.resultado
+
+
+# Agregados do IBGE consultados em lote: todas as variáveis e períodos de um
+# agregado vão numa única requisição à API v3
+AGREGADOS_IBGE = [
+    {
+        'agregado': 4714,
+        'descricao': 'População residente, área e densidade demográfica (Censo 2022)',
+        'variaveis': [93, 6318, 614],
+        'periodos': ['2022']
+    },
+    {
+        'agregado': 4712,
+        'descricao': 'Domicílios particulares permanentes ocupados e moradores (Censo 2022)',
+        'variaveis': [381, 382, 5930],
+        'periodos': ['2022']
+    },
+    {
+        'agregado': 6579,
+        'descricao': 'População residente estimada (último período)',
+        'variaveis': [9324],
+        'periodos': ['-1']
+    }
+]
+
+# Municípios da Região Metropolitana de Maceió (código IBGE -> nome)
+MUNICIPIOS_METROPOLITANA_MACEIO = {
+    '2704302': 'Maceió',
+    '2700409': 'Atalaia',
+    '2700508': 'Barra de Santo Antônio',
+    '2700607': 'Barra de São Miguel',
+    '2702207': 'Coqueiro Seco',
+    '2704708': 'Marechal Deodoro',
+    '2705200': 'Messias',
+    '2705507': 'Murici',
+    '2706448': 'Paripueira',
+    '2706803': 'Pilar',
+    '2707701': 'Rio Largo',
+    '2708006': 'Santa Luzia do Norte',
+    '2708501': 'Satuba'
+}
+
+# Recortes territoriais: todos os municípios de Alagoas (UF 27) ou os da Região Metropolitana de Maceió
+LOCALIDADES_IBGE = {
+    'alagoas': 'N6[N3[27]]',
+    'metropolitana': 'N6[' + ','.join(MUNICIPIOS_METROPOLITANA_MACEIO) + ']'
+}
+
+COLUNAS_AGREGADOS_IBGE = [
+    'agregado', 'variavel_id', 'variavel', 'unidade', 'classificacao',
+    'codigo_ibge', 'municipio', 'uf', 'periodo', 'valor'
+]
+
+
+def normalizar_agregados_ibge(resposta: List[Dict], agregado: int) -> pd.DataFrame:
+    """
+    Converte a resposta aninhada da API de agregados (variável -> resultados ->
+    séries -> período) em uma tabela com uma linha por variável, localidade e
+    período. Símbolos especiais do IBGE ('-', '...', 'X') viram NaN.
+    """
+    if not resposta:
+        return pd.DataFrame(columns=COLUNAS_AGREGADOS_IBGE)
+    
+    df = pd.json_normalize(resposta, record_path=['resultados', 'series'],
+                           meta=['id', 'variavel', 'unidade', ['resultados', 'classificacoes']])
+    if df.empty:
+        return pd.DataFrame(columns=COLUNAS_AGREGADOS_IBGE)
+    
+    # Classificações são raras e pequenas: viram um rótulo "Nome: categoria"
+    df['classificacao'] = df['resultados.classificacoes'].map(
+        lambda classificacoes: '; '.join(
+            f"{c.get('nome')}: {', '.join(c.get('categoria', {}).values())}" for c in classificacoes or []
+        ) or None
+    )
+    
+    periodos = [coluna for coluna in df.columns if coluna.startswith('serie.')]
+    df = df.melt(id_vars=['id', 'variavel', 'unidade', 'classificacao', 'localidade.id', 'localidade.nome'],
+                 value_vars=periodos, var_name='periodo', value_name='valor')
+    
+    nomes = df['localidade.nome'].str.rsplit(' - ', n=1, expand=True).reindex(columns=[0, 1])
+    tabela = pd.DataFrame({
+        'agregado': agregado,
+        'variavel_id': pd.to_numeric(df['id'], errors='coerce').astype('Int64'),
+        'variavel': df['variavel'],
+        'unidade': df['unidade'],
+        'classificacao': df['classificacao'],
+        'codigo_ibge': pd.to_numeric(df['localidade.id'], errors='coerce').astype('Int64'),
+        'municipio': nomes[0],
+        'uf': nomes[1],
+        'periodo': df['periodo'].str.slice(len('serie.')),
+        'valor': pd.to_numeric(df['valor'], errors='coerce')
+    })
+    return tabela
+
+
+class DeduplicadorAnuncios:
+    """
+    Agrupa os anúncios do mesmo imóvel (publicado no VivaReal e no ZapImóveis
+    ou por vários corretores) e os anúncios do mesmo prédio
+    
+    Só são comparados anúncios do mesmo bloco (bairro, quartos e faixa de
+    área) com os da própria faixa e das vizinhas; anúncios com logradouro e
+    número só são comparados com os do mesmo endereço e com os que não
+    informam o número. Os pares candidatos saem de junções do pandas e a
+    similaridade de preço, área, condomínio e palavras do título (MinHash) é
+    calculada em NumPy para todos os pares de uma vez. Pares aceitos e
+    endereços idênticos são unidos por union-find, o que mantém o custo
+    próximo de linear.
+    """
+    
+    ABREVIACOES = {
+        'r': 'rua', 'av': 'avenida', 'al': 'alameda', 'tv': 'travessa', 'trav': 'travessa',
+        'pc': 'praca', 'pca': 'praca', 'rod': 'rodovia', 'lot': 'loteamento', 'cj': 'conjunto',
+        'dr': 'doutor', 'des': 'desembargador', 'eng': 'engenheiro', 'prof': 'professor',
+        'sen': 'senador', 'gov': 'governador', 'cel': 'coronel', 'pres': 'presidente',
+        'cond': 'condominio', 'ed': 'edificio', 'edf': 'edificio', 'n': '', 'no': '', 'num': ''
+    }
+    
+    PALAVRAS_IGNORADAS = {
+        'apartamento', 'apto', 'venda', 'para', 'com', 'quartos', 'quarto', 'suite', 'suites',
+        'maceio', 'alagoas', 'rua', 'avenida', 'imovel', 'm2', 'em', 'de', 'do', 'da', 'no', 'na'
+    }
+    
+    PESOS = {'preco': 0.3, 'area_m2': 0.3, 'condominio': 0.2, 'titulo': 0.2}
+    
+    def __init__(self, faixa_area: float = 10.0, limiar: float = 0.85, pesos: Optional[Dict[str, float]] = None,
+                 permutacoes: int = 64, pares_por_lote: int = 100000):
+        self.faixa_area = faixa_area
+        self.limiar = limiar
+        self.pesos = pesos or self.PESOS
+        self.pares_por_lote = pares_por_lote
+        self.estatisticas = {}
+        
+        # Parâmetros fixos das permutações do MinHash (resultado reprodutível)
+        aleatorio = np.random.default_rng(27)
+        self._xor = aleatorio.integers(0, 2 ** 63, permutacoes, dtype=np.uint64)
+        self._multiplicador = aleatorio.integers(0, 2 ** 63, permutacoes, dtype=np.uint64) | np.uint64(1)
+    
+    @classmethod
+    def normalizar(cls, textos: pd.Series) -> pd.Series:
+        """
+        Minúsculas, sem acentos e pontuação, com as abreviações de logradouro expandidas
+        
+        Cada texto distinto é normalizado uma vez (bairros e logradouros se repetem muito).
+        """
+        codigos, distintos = pd.factorize(textos.fillna('').astype(str))
+        normalizados = (pd.Series(distintos, dtype=object)
+                        .str.normalize('NFKD').str.encode('ascii', errors='ignore').str.decode('ascii')
+                        .str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True))
+        abreviacoes = r'\b(' + '|'.join(sorted(cls.ABREVIACOES, key=len, reverse=True)) + r')\b'
+        normalizados = normalizados.str.replace(abreviacoes, lambda m: cls.ABREVIACOES[m.group(1)], regex=True)
+        normalizados = normalizados.str.replace(r'\s+', ' ', regex=True).str.strip()
+        return pd.Series(normalizados.to_numpy()[codigos], index=textos.index)
+    
+    def deduplicar(self, anuncios: pd.DataFrame) -> pd.DataFrame:
+        """
+        Devolve os anúncios com endereco_normalizado, predio_chave (bairro,
+        logradouro e número normalizados, quando há número), cluster_id (mesmo
+        imóvel), predio_id (mesmo prédio) e tamanho_cluster
+        """
+        tabela = anuncios.reset_index(drop=True).copy()
+        total = len(tabela)
+        for coluna in ('titulo', 'endereco', 'bairro', 'preco', 'condominio', 'area_m2', 'quartos'):
+            if coluna not in tabela.columns:
+                tabela[coluna] = None
+        
+        # "Rua X, 123 - Ponta Verde, Maceió - AL": logradouro e número vêm antes do primeiro " - ";
+        # o número é o que segue a vírgula ou, sem vírgula, o que encerra o trecho ("Rua 15 de Novembro 300")
+        trecho = tabela['endereco'].astype('string').str.split(' - ').str[0]
+        partes = trecho.str.extract(r'^(?P<rua>[^,]+?)\s*,\s*\D{0,4}?(?P<numero>\d+)').fillna(
+            trecho.str.extract(r'^(?P<rua>.*?\D)\s*(?P<numero>\d+)\s*$'))
+        bairro = self.normalizar(tabela['bairro'])
+        tabela['endereco_normalizado'] = self.normalizar(trecho)
+        chave_endereco = (bairro + '|' + self.normalizar(partes['rua']) + ' ' + partes['numero']).where(
+            partes['numero'].notna() & (bairro != ''))
+        tabela['predio_chave'] = chave_endereco
+        
+        valores = {coluna: pd.to_numeric(tabela[coluna], errors='coerce').to_numpy(dtype=float)
+                   for coluna in ('preco', 'area_m2', 'condominio')}
+        faixa = np.floor(valores['area_m2'] / self.faixa_area)
+        blocos = pd.DataFrame({
+            'indice': np.arange(total),
+            'bairro': bairro,
+            'quartos': pd.to_numeric(tabela['quartos'], errors='coerce').fillna(-1).astype(int),
+            'faixa': np.where(np.isnan(faixa), -1, faixa).astype(int),
+            'endereco': chave_endereco
+        })[bairro != '']
+        
+        origem, destino = self._pares_candidatos(blocos)
+        assinaturas, palavras_por_anuncio = self._assinaturas(tabela['titulo'])
+        
+        aceitos = []
+        for inicio in range(0, len(origem), self.pares_por_lote):
+            i = origem[inicio:inicio + self.pares_por_lote]
+            j = destino[inicio:inicio + self.pares_por_lote]
+            pontuacao = self._pontuar(i, j, valores, assinaturas, palavras_por_anuncio)
+            acima = pontuacao >= self.limiar
+            aceitos.append((pontuacao[acima], i[acima], j[acima]))
+        
+        # Os pares mais parecidos são unidos primeiro; um grupo nunca reúne dois
+        # endereços diferentes, mesmo através de anúncios sem número
+        mesmo_imovel = _UniaoBusca(total, rotulos=chave_endereco.to_numpy(dtype=object))
+        pontuacoes, i, j = (np.concatenate(partes) for partes in zip(*aceitos)) if aceitos else ([], [], [])
+        for posicao in np.argsort(-np.asarray(pontuacoes), kind='stable'):
+            mesmo_imovel.unir(int(i[posicao]), int(j[posicao]))
+        
+        tabela['cluster_id'] = mesmo_imovel.rotulos()
+        
+        # Prédio: anúncios do mesmo imóvel mais todos os que têm o mesmo logradouro e número
+        mesmo_predio = _UniaoBusca(total)
+        mesmo_predio.pai = mesmo_imovel.pai.copy()
+        com_endereco = chave_endereco.dropna()
+        primeiro = com_endereco.index.to_series().groupby(com_endereco.to_numpy()).transform('min')
+        for a, b in zip(primeiro.to_numpy().tolist(), com_endereco.index.tolist()):
+            mesmo_predio.unir(a, b)
+        
+        tabela['predio_id'] = mesmo_predio.rotulos()
+        tabela['tamanho_cluster'] = tabela.groupby('cluster_id')['cluster_id'].transform('size')
+        
+        self.estatisticas = {
+            'anuncios': total,
+            'blocos': int(blocos.groupby(['bairro', 'quartos', 'faixa']).ngroups),
+            'pares_comparados': len(origem),
+            'pares_aceitos': len(pontuacoes),
+            'clusters': int(tabela['cluster_id'].nunique()),
+            'predios': int(tabela['predio_id'].nunique())
+        }
+        return tabela
+    
+    @staticmethod
+    def _juntar(esquerda: pd.DataFrame, direita: pd.DataFrame, chaves: List[str], deslocamento: int = 0) -> pd.DataFrame:
+        """
+        Pares (indice_i, indice_j) com as mesmas chaves e faixa_j = faixa_i + deslocamento
+        """
+        if deslocamento:
+            esquerda = esquerda[esquerda['faixa'] >= 0]
+            direita = direita[direita['faixa'] >= 0].assign(faixa=lambda d: d['faixa'] - deslocamento)
+        colunas = ['indice'] + chaves + ['faixa']
+        return esquerda[colunas].merge(direita[colunas], on=chaves + ['faixa'], suffixes=('_i', '_j'))
+    
+    def _pares_candidatos(self, blocos: pd.DataFrame) -> tuple:
+        """
+        Cada par candidato aparece uma única vez
+        """
+        com_endereco = blocos[blocos['endereco'].notna()]
+        sem_endereco = blocos[blocos['endereco'].isna()]
+        bloco = ['bairro', 'quartos']
+        
+        mesma_faixa = self._juntar(com_endereco, com_endereco, ['endereco', 'quartos'])
+        juncoes = [
+            # Mesmo endereço, na mesma faixa (uma vez por par) e na faixa seguinte
+            mesma_faixa[mesma_faixa['indice_j'] > mesma_faixa['indice_i']],
+            self._juntar(com_endereco, com_endereco, ['endereco', 'quartos'], 1)
+        ]
+        
+        # Sem número: contra todo o bloco na mesma faixa e na seguinte, e contra os
+        # anúncios com endereço da faixa anterior (os sem endereço dela já foram cobertos)
+        mesma_faixa = self._juntar(sem_endereco, blocos, bloco)
+        juncoes += [
+            mesma_faixa[(mesma_faixa['indice_j'] > mesma_faixa['indice_i'])
+                        | ~mesma_faixa['indice_j'].isin(sem_endereco['indice'])],
+            self._juntar(sem_endereco, blocos, bloco, 1),
+            self._juntar(sem_endereco, com_endereco, bloco, -1)
+        ]
+        
+        pares = pd.concat([juncao[['indice_i', 'indice_j']] for juncao in juncoes], ignore_index=True)
+        return pares['indice_i'].to_numpy(), pares['indice_j'].to_numpy()
+    
+    def _assinaturas(self, titulos: pd.Series) -> tuple:
+        """
+        Assinaturas MinHash das palavras de cada título e a quantidade de palavras
+        """
+        palavras = self.normalizar(titulos).str.split().map(
+            lambda lista: sorted({p for p in lista if len(p) > 2 and p not in self.PALAVRAS_IGNORADAS}))
+        quantidade = palavras.map(len).to_numpy()
+        
+        assinaturas = np.full((len(titulos), len(self._xor)), np.iinfo(np.uint64).max, dtype=np.uint64)
+        explodidas = palavras.explode().dropna()
+        if explodidas.empty:
+            return assinaturas, quantidade
+        
+        hashes = pd.util.hash_array(explodidas.to_numpy(dtype=object))
+        permutados = (hashes[:, None] ^ self._xor[None, :]) * self._multiplicador[None, :]
+        indices = explodidas.index.to_numpy()
+        inicios = np.flatnonzero(np.r_[True, indices[1:] != indices[:-1]])
+        assinaturas[indices[inicios]] = np.minimum.reduceat(permutados, inicios, axis=0)
+        return assinaturas, quantidade
+    
+    def _pontuar(self, i: np.ndarray, j: np.ndarray, valores: Dict[str, np.ndarray],
+                 assinaturas: np.ndarray, palavras_por_anuncio: np.ndarray) -> np.ndarray:
+        """
+        Similaridade ponderada de cada par; componentes ausentes não contam no peso
+        """
+        soma = np.zeros(len(i))
+        pesos = np.zeros(len(i))
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for coluna in ('preco', 'area_m2', 'condominio'):
+                x, y = valores[coluna][i], valores[coluna][j]
+                similaridade = np.clip(1 - np.abs(x - y) / np.fmax(np.abs(x), np.abs(y)), 0, 1)
+                presente = ~np.isnan(similaridade)
+                soma += np.where(presente, similaridade, 0) * self.pesos[coluna]
+                pesos += presente * self.pesos[coluna]
+            
+            # Fração de permutações com o mesmo mínimo estima o Jaccard das palavras
+            presente = (palavras_por_anuncio[i] > 0) & (palavras_por_anuncio[j] > 0)
+            jaccard = (assinaturas[i] == assinaturas[j]).mean(axis=1)
+            soma += np.where(presente, jaccard, 0) * self.pesos['titulo']
+            pesos += presente * self.pesos['titulo']
+            
+            return np.where(pesos >= 0.5, soma / pesos, 0.0)
+
+
+class _UniaoBusca:
+    """
+    Union-find com compressão de caminho sobre índices 0..n-1; com `rotulos`,
+    grupos com rótulos diferentes (não nulos) nunca são unidos
+    """
+    
+    def __init__(self, total: int, rotulos: Optional[np.ndarray] = None):
+        self.pai = np.arange(total)
+        self.rotulos_grupo = None
+        if rotulos is not None:
+            self.rotulos_grupo = [None if pd.isna(rotulo) else rotulo for rotulo in rotulos]
+    
+    def raiz(self, i: int) -> int:
+        while self.pai[i] != i:
+            self.pai[i] = self.pai[self.pai[i]]
+            i = self.pai[i]
+        return i
+    
+    def unir(self, i: int, j: int) -> bool:
+        raiz_i, raiz_j = self.raiz(i), self.raiz(j)
+        if raiz_i == raiz_j:
+            return False
+        
+        nova, antiga = min(raiz_i, raiz_j), max(raiz_i, raiz_j)
+        if self.rotulos_grupo is not None:
+            rotulo_nova, rotulo_antiga = self.rotulos_grupo[nova], self.rotulos_grupo[antiga]
+            if rotulo_nova is not None and rotulo_antiga is not None and rotulo_nova != rotulo_antiga:
+                return False
+            self.rotulos_grupo[nova] = rotulo_nova if rotulo_nova is not None else rotulo_antiga
+        
+        self.pai[antiga] = nova
+        return True
+    
+    def rotulos(self) -> np.ndarray:
+        """
+        Identificador compacto (0..k-1) do grupo de cada índice
+        """
+        raizes = np.array([self.raiz(i) for i in range(len(self.pai))], dtype=int)
+        return np.unique(raizes, return_inverse=True)[1]
+
+
+class IndiceLocal:
+    """
+    Índice SQLite de anúncios, condomínios (prédios) e cartórios para
+    consultas rápidas sem carregar o histórico em memória
+    
+    A ingestão é um upsert pela chave de cada registro; há índices B-tree
+    em bairro, preço, condomínio e área e um índice FTS5 (sem acentos) sobre
+    títulos, nomes e endereços, mantido por gatilhos.
+    """
+    
+    COLUNAS = {
+        'anuncios': ['chave', 'site', 'id', 'titulo', 'endereco', 'bairro', 'preco', 'condominio',
+                     'area_m2', 'quartos', 'url', 'pagina', 'predio_chave', 'data_coleta'],
+        'condominios': ['chave', 'nome', 'endereco', 'bairro', 'anuncios', 'condominio_mediano',
+                        'preco_m2_mediano', 'data_coleta'],
+        'cartorios': ['chave', 'nome', 'endereco', 'telefone', 'responsavel', 'fonte', 'url', 'dados', 'data_coleta']
+    }
+    
+    # Colunas de cada tabela cobertas pela busca textual
+    COLUNAS_TEXTO = {
+        'anuncios': ['titulo', 'endereco', 'bairro'],
+        'condominios': ['nome', 'endereco', 'bairro'],
+        'cartorios': ['nome', 'endereco']
+    }
+    
+    def __init__(self, diretorio: str):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, 'indice.sqlite3')
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode = WAL")
+        self._conexao.execute("PRAGMA synchronous = NORMAL")
+        self._conexao.execute("PRAGMA cache_size = -65536")  # 64 MiB: ingestão em lote toca vários índices
+        self._criar_esquema()
+    
+    def _criar_esquema(self) -> None:
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS anuncios (
+                rowid INTEGER PRIMARY KEY,
+                chave TEXT NOT NULL UNIQUE,
+                site TEXT, id TEXT, titulo TEXT, endereco TEXT, bairro TEXT,
+                preco REAL, condominio REAL, area_m2 REAL, quartos INTEGER,
+                url TEXT, pagina INTEGER, predio_chave TEXT,
+                data_coleta TEXT, primeira_coleta TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_anuncios_bairro_preco ON anuncios (bairro COLLATE NOCASE, preco);
+            CREATE INDEX IF NOT EXISTS idx_anuncios_bairro_condominio ON anuncios (bairro COLLATE NOCASE, condominio);
+            CREATE INDEX IF NOT EXISTS idx_anuncios_preco ON anuncios (preco);
+            CREATE INDEX IF NOT EXISTS idx_anuncios_area ON anuncios (area_m2);
+            CREATE INDEX IF NOT EXISTS idx_anuncios_quartos_preco ON anuncios (quartos, preco);
+            CREATE INDEX IF NOT EXISTS idx_anuncios_predio ON anuncios (predio_chave);
+            
+            CREATE TABLE IF NOT EXISTS condominios (
+                rowid INTEGER PRIMARY KEY,
+                chave TEXT NOT NULL UNIQUE,
+                nome TEXT, endereco TEXT, bairro TEXT, anuncios INTEGER,
+                condominio_mediano REAL, preco_m2_mediano REAL,
+                data_coleta TEXT, primeira_coleta TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_condominios_bairro ON condominios (bairro COLLATE NOCASE);
+            
+            CREATE TABLE IF NOT EXISTS cartorios (
+                rowid INTEGER PRIMARY KEY,
+                chave TEXT NOT NULL UNIQUE,
+                nome TEXT, endereco TEXT, telefone TEXT, responsavel TEXT, fonte TEXT, url TEXT,
+                dados TEXT, data_coleta TEXT, primeira_coleta TEXT NOT NULL
+            );
+        """)
+        
+        for tabela, colunas in self.COLUNAS_TEXTO.items():
+            lista = ', '.join(colunas)
+            novos = ', '.join(f'new.{coluna}' for coluna in colunas)
+            antigos = ', '.join(f'old.{coluna}' for coluna in colunas)
+            self._conexao.executescript(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {tabela}_fts USING fts5(
+                    {lista}, content='{tabela}', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS {tabela}_fts_inclusao AFTER INSERT ON {tabela} BEGIN
+                    INSERT INTO {tabela}_fts (rowid, {lista}) VALUES (new.rowid, {novos});
+                END;
+                CREATE TRIGGER IF NOT EXISTS {tabela}_fts_exclusao AFTER DELETE ON {tabela} BEGIN
+                    INSERT INTO {tabela}_fts ({tabela}_fts, rowid, {lista}) VALUES ('delete', old.rowid, {antigos});
+                END;
+                CREATE TRIGGER IF NOT EXISTS {tabela}_fts_alteracao AFTER UPDATE OF {lista} ON {tabela} BEGIN
+                    INSERT INTO {tabela}_fts ({tabela}_fts, rowid, {lista}) VALUES ('delete', old.rowid, {antigos});
+                    INSERT INTO {tabela}_fts (rowid, {lista}) VALUES (new.rowid, {novos});
+                END;
+            """)
+        self._conexao.commit()
+    
+    def _upsert(self, tabela: str, linhas: List[tuple]) -> int:
+        """
+        Insere ou atualiza as linhas pela chave, preservando a primeira coleta
+        """
+        if not linhas:
+            return 0
+        
+        colunas = self.COLUNAS[tabela]
+        atualizacoes = ', '.join(f'{coluna} = excluded.{coluna}' for coluna in colunas[1:])
+        sql = (f"INSERT INTO {tabela} ({', '.join(colunas)}, primeira_coleta) "
+               f"VALUES ({', '.join('?' * (len(colunas) + 1))}) "
+               f"ON CONFLICT (chave) DO UPDATE SET {atualizacoes}")
+        agora = datetime.now().isoformat()
+        with self._lock:
+            with self._conexao:
+                self._conexao.executemany(sql, [linha + (agora,) for linha in linhas])
+        return len(linhas)
+    
+    def _analisar(self) -> None:
+        """
+        Atualiza (por amostragem) as estatísticas usadas pelo planejador para escolher índices
+        """
+        with self._lock:
+            self._conexao.execute("PRAGMA analysis_limit = 1000")
+            self._conexao.execute("ANALYZE")
+            self._conexao.commit()
+    
+    @staticmethod
+    def _numero(valor) -> Optional[float]:
+        return None if valor is None or pd.isna(valor) else float(valor)
+    
+    def indexar_anuncios(self, anuncios: Iterable[Dict], tamanho_lote: int = 5000, analisar: bool = True) -> int:
+        """
+        Upsert dos anúncios pela chave site|id, em transações de `tamanho_lote`
+        """
+        total = 0
+        lote = []
+        for anuncio in anuncios:
+            quartos = self._numero(anuncio.get('quartos'))
+            pagina = self._numero(anuncio.get('pagina'))
+            lote.append((
+                f"{anuncio.get('site')}|{anuncio.get('id')}", anuncio.get('site'), anuncio.get('id'),
+                anuncio.get('titulo'), anuncio.get('endereco'), anuncio.get('bairro'),
+                self._numero(anuncio.get('preco')), self._numero(anuncio.get('condominio')),
+                self._numero(anuncio.get('area_m2')), None if quartos is None else int(quartos),
+                anuncio.get('url'), None if pagina is None else int(pagina), anuncio.get('predio_chave'),
+                str(anuncio.get('data_coleta') or '') or None
+            ))
+            if len(lote) >= tamanho_lote:
+                total += self._upsert('anuncios', lote)
+                lote = []
+        total += self._upsert('anuncios', lote)
+        if total and analisar:
+            self._analisar()
+        return total
+    
+    def repassar_anuncios(self, anuncios: Iterable[Dict], tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """
+        Devolve os anúncios sem alterá-los, indexando-os em lotes à medida que
+        passam (para indexar enquanto o crawler grava CSV/Parquet)
+        """
+        lote = []
+        for anuncio in anuncios:
+            lote.append(anuncio)
+            if len(lote) >= tamanho_lote:
+                self.indexar_anuncios(lote, analisar=False)
+                lote = []
+            yield anuncio
+        self.indexar_anuncios(lote)
+    
+    def indexar_condominios(self, deduplicados: pd.DataFrame) -> int:
+        """
+        Resume os anúncios deduplicados por prédio (mesmo logradouro e número)
+        e faz o upsert dos prédios e do vínculo anúncio -> prédio
+        """
+        com_endereco = deduplicados[deduplicados['predio_chave'].notna()].copy()
+        if com_endereco.empty:
+            return 0
+        
+        com_endereco['preco_m2'] = (pd.to_numeric(com_endereco['preco'], errors='coerce')
+                                    / pd.to_numeric(com_endereco['area_m2'], errors='coerce'))
+        com_endereco['condominio'] = pd.to_numeric(com_endereco['condominio'], errors='coerce')
+        if 'data_coleta' not in com_endereco:
+            com_endereco['data_coleta'] = None
+        
+        predios = com_endereco.groupby('predio_chave').agg(
+            nome=('titulo', 'first'),
+            endereco=('endereco', 'first'),
+            bairro=('bairro', 'first'),
+            anuncios=('cluster_id', 'nunique'),
+            condominio_mediano=('condominio', 'median'),
+            preco_m2_mediano=('preco_m2', 'median'),
+            data_coleta=('data_coleta', 'max')
+        ).reset_index()
+        
+        linhas = [
+            (p.predio_chave, p.nome, p.endereco, p.bairro, int(p.anuncios), self._numero(p.condominio_mediano),
+             self._numero(p.preco_m2_mediano), None if pd.isna(p.data_coleta) else str(p.data_coleta))
+            for p in predios.itertuples(index=False)
+        ]
+        total = self._upsert('condominios', linhas)
+        self._analisar()
+        
+        vinculos = [(chave, f"{site}|{id_anuncio}") for chave, site, id_anuncio in
+                    com_endereco[['predio_chave', 'site', 'id']].itertuples(index=False)]
+        with self._lock:
+            with self._conexao:
+                self._conexao.executemany("UPDATE anuncios SET predio_chave = ? WHERE chave = ?", vinculos)
+        return total
+    
+    def indexar_cartorios(self, cartorios: Iterable[Dict]) -> int:
+        """
+        Upsert dos cartórios pela chave fonte|nome
+        """
+        linhas = []
+        for cartorio in cartorios:
+            dados = {chave: valor for chave, valor in cartorio.items() if chave not in self.COLUNAS['cartorios']}
+            linhas.append((
+                f"{cartorio.get('fonte')}|{cartorio.get('nome')}", cartorio.get('nome'), cartorio.get('endereco'),
+                cartorio.get('telefone'), cartorio.get('responsavel'), cartorio.get('fonte'), cartorio.get('url'),
+                json.dumps(dados, ensure_ascii=False, default=str), datetime.now().isoformat()
+            ))
+        return self._upsert('cartorios', linhas)
+    
+    @staticmethod
+    def _consulta_fts(texto: str) -> str:
+        """
+        Converte o texto livre em uma consulta FTS5 de prefixos (todas as palavras)
+        """
+        palavras = re.findall(r'\w+', texto)
+        return ' '.join(f'"{palavra}"*' for palavra in palavras)
+    
+    def _consultar(self, sql: str, parametros: List) -> List[Dict]:
+        with self._lock:
+            return [dict(linha) for linha in self._conexao.execute(sql, parametros).fetchall()]
+    
+    def buscar_anuncios(self, bairro: Optional[str] = None, texto: Optional[str] = None,
+                        preco_min: Optional[float] = None, preco_max: Optional[float] = None,
+                        condominio_max: Optional[float] = None, area_min: Optional[float] = None,
+                        area_max: Optional[float] = None, quartos: Optional[int] = None,
+                        ordenar: Optional[str] = 'preco', limite: int = 100) -> List[Dict]:
+        """
+        Anúncios que atendem a todos os filtros informados, em ordem crescente
+        de `ordenar` (anúncios sem esse valor vêm por último; None não ordena)
+        
+        Ex.: buscar_anuncios(bairro='Ponta Verde', condominio_max=800)
+        """
+        condicoes, parametros = [], []
+        filtros = [
+            ('a.bairro = ? COLLATE NOCASE', bairro), ('a.preco >= ?', preco_min), ('a.preco <= ?', preco_max),
+            ('a.condominio <= ?', condominio_max), ('a.area_m2 >= ?', area_min), ('a.area_m2 <= ?', area_max),
+            ('a.quartos = ?', quartos)
+        ]
+        for condicao, valor in filtros:
+            if valor is not None:
+                condicoes.append(condicao)
+                parametros.append(valor)
+        
+        juncao = ''
+        if texto:
+            juncao = 'JOIN anuncios_fts f ON f.rowid = a.rowid'
+            condicoes.append('anuncios_fts MATCH ?')
+            parametros.append(self._consulta_fts(texto))
+        
+        def selecionar(extras: List[str], ordem: str, limite: int) -> List[Dict]:
+            todas = condicoes + extras
+            where = f"WHERE {' AND '.join(todas)}" if todas else ''
+            return self._consultar(f"SELECT a.* FROM anuncios a {juncao} {where} {ordem} LIMIT ?",
+                                   parametros + [limite])
+        
+        if ordenar is None:
+            return selecionar([], '', limite)
+        if ordenar not in ('preco', 'condominio', 'area_m2', 'data_coleta'):
+            raise ValueError(f"Ordenação não suportada: {ordenar}")
+        
+        # Com a coluna não nula o índice (bairro, preco) já entrega as linhas em ordem;
+        # os anúncios sem o valor completam o resultado depois
+        resultado = selecionar([f'a.{ordenar} IS NOT NULL'], f'ORDER BY a.{ordenar}', limite)
+        if len(resultado) < limite:
+            resultado += selecionar([f'a.{ordenar} IS NULL'], '', limite - len(resultado))
+        return resultado
+    
+    def buscar_condominios(self, bairro: Optional[str] = None, texto: Optional[str] = None,
+                           limite: int = 50) -> List[Dict]:
+        """
+        Prédios com anúncios, por bairro e/ou endereço
+        """
+        condicoes, parametros, juncao = [], [], ''
+        if bairro:
+            condicoes.append('c.bairro = ? COLLATE NOCASE')
+            parametros.append(bairro)
+        if texto:
+            juncao = 'JOIN condominios_fts f ON f.rowid = c.rowid'
+            condicoes.append('condominios_fts MATCH ?')
+            parametros.append(self._consulta_fts(texto))
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+        return self._consultar(f"SELECT c.* FROM condominios c {juncao} {where} ORDER BY c.anuncios DESC LIMIT ?",
+                               parametros + [limite])
+    
+    def buscar_cartorios(self, texto: Optional[str] = None, limite: int = 50) -> List[Dict]:
+        """
+        Cartórios por nome ou endereço
+        """
+        if not texto:
+            return self._consultar("SELECT * FROM cartorios ORDER BY nome LIMIT ?", [limite])
+        return self._consultar(
+            "SELECT c.* FROM cartorios c JOIN cartorios_fts f ON f.rowid = c.rowid "
+            "WHERE cartorios_fts MATCH ? ORDER BY rank LIMIT ?",
+            [self._consulta_fts(texto), limite]
+        )
+    
+    def buscar(self, texto: str, limite: int = 20) -> Dict[str, List[Dict]]:
+        """
+        Busca textual em anúncios, condomínios e cartórios, por relevância
+        """
+        consulta = self._consulta_fts(texto)
+        if not consulta:
+            return {tabela: [] for tabela in self.COLUNAS_TEXTO}
+        return {
+            tabela: self._consultar(
+                f"SELECT t.* FROM {tabela} t JOIN {tabela}_fts f ON f.rowid = t.rowid "
+                f"WHERE {tabela}_fts MATCH ? ORDER BY rank LIMIT ?",
+                [consulta, limite]
+            )
+            for tabela in self.COLUNAS_TEXTO
+        }
+    
+    def contar(self) -> Dict[str, int]:
+        with self._lock:
+            return {tabela: self._conexao.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                    for tabela in self.COLUNAS}
+    
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+class RollupsAnuncios:
+    """
+    Agregados pré-calculados dos anúncios por dia × bairro × tipologia
+    (contagem, R$/m² e condomínio), em SQLite, atualizados a cada lote
+    gravado em vez de recalculados a partir do histórico
+    
+    Cada lote é agregado com pandas e somado às linhas existentes por
+    upsert. A tabela `vistos` guarda o hash de cada anúncio já contado no
+    dia, então coletas repetidas no mesmo dia (agendador, trabalhadores)
+    não contam o mesmo anúncio duas vezes. Os hashes são mantidos por
+    `dias_vistos` dias antes do dia mais recente já agregado; lotes de dias
+    anteriores a essa janela são ignorados, porque não haveria como saber
+    se já foram contados. Como as atualizações são transações atômicas,
+    vários processos podem alimentar o mesmo arquivo.
+    """
+    
+    # Colunas somáveis de cada linha agregada
+    SOMAS = ['anuncios', 'com_preco', 'soma_preco', 'com_area', 'soma_preco_m2', 'soma_preco_m2_quadrado',
+             'com_condominio', 'soma_condominio']
+    
+    def __init__(self, diretorio: str, dias_vistos: int = 14):
+        """
+        dias_vistos: por quantos dias os hashes de anúncios já contados são mantidos
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, 'rollups.sqlite3')
+        self.dias_vistos = dias_vistos
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, timeout=60, isolation_level=None, check_same_thread=False)
+        somas = ', '.join(f'{coluna} REAL NOT NULL DEFAULT 0' for coluna in self.SOMAS)
+        self._conexao.executescript(f"""
+            CREATE TABLE IF NOT EXISTS rollups (
+                dia TEXT NOT NULL,
+                bairro TEXT NOT NULL,
+                tipologia TEXT NOT NULL,
+                {somas},
+                PRIMARY KEY (dia, bairro, tipologia)
+            );
+            CREATE TABLE IF NOT EXISTS vistos (
+                dia TEXT NOT NULL,
+                hash INTEGER NOT NULL,
+                PRIMARY KEY (dia, hash)
+            ) WITHOUT ROWID;
+        """)
+    
+    @staticmethod
+    def tipologia(quartos: pd.Series) -> pd.Series:
+        """
+        Faixa de quartos de cada anúncio ('1 quarto' ... '4+ quartos')
+        """
+        quartos = pd.to_numeric(quartos, errors='coerce')
+        rotulos = np.select(
+            [quartos.isna().to_numpy(), (quartos <= 1).to_numpy(), (quartos >= 4).to_numpy()],
+            ['sem informação', '1 quarto', '4+ quartos'],
+            default=quartos.fillna(0).astype(int).astype(str).to_numpy() + ' quartos'
+        )
+        return pd.Series(rotulos, index=quartos.index)
+    
+    def _preparar(self, anuncios: pd.DataFrame, dia: Optional[str]) -> pd.DataFrame:
+        """
+        Colunas numéricas, chaves de agrupamento e hash estável (site, id) de cada anúncio
+        """
+        def coluna(nome: str) -> pd.Series:
+            if nome in anuncios:
+                return anuncios[nome]
+            return pd.Series(None, index=anuncios.index, dtype=object)
+        
+        hoje = datetime.now().strftime('%Y-%m-%d')
+        tabela = pd.DataFrame(index=anuncios.index)
+        if dia is not None:
+            tabela['dia'] = dia
+        else:
+            datas = pd.to_datetime(coluna('data_coleta'), errors='coerce', format='ISO8601')
+            tabela['dia'] = datas.dt.strftime('%Y-%m-%d').fillna(hoje)
+        
+        tabela['bairro'] = coluna('bairro').fillna('sem bairro').astype(str)
+        tabela['tipologia'] = self.tipologia(coluna('quartos'))
+        
+        preco = pd.to_numeric(coluna('preco'), errors='coerce')
+        area = pd.to_numeric(coluna('area_m2'), errors='coerce')
+        condominio = pd.to_numeric(coluna('condominio'), errors='coerce')
+        preco_m2 = (preco / area.where(area > 0)).where(preco > 0)
+        
+        tabela['anuncios'] = 1
+        tabela['com_preco'] = preco.notna()
+        tabela['soma_preco'] = preco.fillna(0)
+        tabela['com_area'] = preco_m2.notna()
+        tabela['soma_preco_m2'] = preco_m2.fillna(0)
+        tabela['soma_preco_m2_quadrado'] = preco_m2.fillna(0) ** 2
+        tabela['com_condominio'] = condominio.notna()
+        tabela['soma_condominio'] = condominio.fillna(0)
+        
+        chave = coluna('site').fillna('').astype(str) + '|' + anuncios['id'].astype(str)
+        tabela['hash'] = pd.util.hash_pandas_object(chave, index=False).to_numpy().view(np.int64)
+        return tabela
+    
+    def atualizar(self, anuncios, dia: Optional[str] = None) -> int:
+        """
+        Soma um lote de anúncios (DataFrame ou lista de dicts) aos agregados;
+        retorna quantos anúncios ainda não tinham sido contados no dia
+        
+        Sem `dia`, usa a data de data_coleta de cada anúncio. Anúncios de dias
+        fora da janela de `dias_vistos` não são somados.
+        """
+        anuncios = anuncios if isinstance(anuncios, pd.DataFrame) else pd.DataFrame(list(anuncios))
+        if anuncios.empty or 'id' not in anuncios:
+            return 0
+        
+        tabela = self._preparar(anuncios.reset_index(drop=True), dia)
+        tabela = tabela.drop_duplicates(['dia', 'hash'])
+        
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                # A janela de deduplicação acompanha o dia mais recente já agregado, não o do lote:
+                # reprocessar dias antigos não pode contar de novo anúncios cujos hashes foram descartados
+                (mais_recente,) = self._conexao.execute("SELECT MAX(dia) FROM vistos").fetchone()
+                horizonte = max([dia_lote for dia_lote in (mais_recente, tabela['dia'].max()) if dia_lote])
+                limite = (pd.Timestamp(horizonte) - pd.Timedelta(days=self.dias_vistos)).strftime('%Y-%m-%d')
+                antigos = tabela['dia'] < limite
+                if antigos.any():
+                    self.logger.warning(f"📈 {int(antigos.sum())} anúncios de dias anteriores a {limite} ignorados: "
+                                        f"fora da janela de {self.dias_vistos} dias dos agregados")
+                    tabela = tabela[~antigos]
+                
+                # Descarta os anúncios já contados em cada dia do lote
+                ja_vistos = set()
+                for dia_lote, hashes in tabela.groupby('dia')['hash']:
+                    for inicio in range(0, len(hashes), 900):
+                        parte = hashes.iloc[inicio:inicio + 900].tolist()
+                        marcadores = ','.join('?' * len(parte))
+                        ja_vistos.update((dia_lote, h) for (h,) in self._conexao.execute(
+                            f"SELECT hash FROM vistos WHERE dia = ? AND hash IN ({marcadores})", [dia_lote, *parte]))
+                if ja_vistos:
+                    vistos = pd.MultiIndex.from_tuples(list(ja_vistos))
+                    tabela = tabela[~pd.MultiIndex.from_arrays([tabela['dia'], tabela['hash']]).isin(vistos)]
+                
+                agregado = tabela.groupby(['dia', 'bairro', 'tipologia'], sort=False)[self.SOMAS].sum().reset_index()
+                colunas = ', '.join(self.SOMAS)
+                somas = ', '.join(f'{coluna} = {coluna} + excluded.{coluna}' for coluna in self.SOMAS)
+                self._conexao.executemany(
+                    f"INSERT INTO rollups (dia, bairro, tipologia, {colunas}) "
+                    f"VALUES ({','.join('?' * (3 + len(self.SOMAS)))}) "
+                    f"ON CONFLICT(dia, bairro, tipologia) DO UPDATE SET {somas}",
+                    agregado.astype({coluna: float for coluna in self.SOMAS}).itertuples(index=False, name=None))
+                self._conexao.executemany("INSERT OR IGNORE INTO vistos (dia, hash) VALUES (?, ?)",
+                                          zip(tabela['dia'], tabela['hash'].tolist()))
+                
+                # Dias fora da janela não recebem mais anúncios: seus hashes podem ser descartados
+                self._conexao.execute("DELETE FROM vistos WHERE dia < ?", (limite,))
+                self._conexao.execute("COMMIT")
+            except Exception:
+                self._conexao.execute("ROLLBACK")
+                raise
+        return len(tabela)
+    
+    def repassar(self, anuncios: Iterable[Dict], tamanho_lote: int = 5000) -> Iterator[Dict]:
+        """
+        Repassa os anúncios adiante atualizando os agregados a cada lote,
+        para encadear com o crawler e a exportação
+        """
+        lote = []
+        for anuncio in anuncios:
+            lote.append(anuncio)
+            if len(lote) >= tamanho_lote:
+                self.atualizar(lote)
+                lote = []
+            yield anuncio
+        if lote:
+            self.atualizar(lote)
+    
+    def ler(self, desde: Optional[str] = None) -> pd.DataFrame:
+        """
+        Linhas agregadas (opcionalmente a partir de um dia AAAA-MM-DD)
+        """
+        sql = "SELECT * FROM rollups" + (" WHERE dia >= ?" if desde else "") + " ORDER BY dia"
+        with self._lock:
+            return pd.read_sql_query(sql, self._conexao, params=[desde] if desde else None)
+    
+    def tendencias(self, dias: int = 90, periodo: str = 'W') -> pd.DataFrame:
+        """
+        Série por período (semana por padrão) × bairro × tipologia: anúncios
+        por dia coletado, R$/m² médio e desvio, preço e condomínio médios
+        """
+        desde = (pd.Timestamp.now().normalize() - pd.Timedelta(days=dias)).strftime('%Y-%m-%d')
+        linhas = self.ler(desde)
+        if linhas.empty:
+            return linhas
+        
+        linhas['periodo'] = pd.to_datetime(linhas['dia']).dt.to_period(periodo).dt.start_time
+        serie = linhas.groupby(['periodo', 'bairro', 'tipologia'])[self.SOMAS].sum()
+        serie['dias'] = linhas.groupby(['periodo', 'bairro', 'tipologia'])['dia'].nunique()
+        return self._medias(serie).reset_index()
+    
+    @staticmethod
+    def _medias(somas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte somas agregadas em médias (vetorizado; divisões por zero viram NaN)
+        """
+        resultado = pd.DataFrame(index=somas.index)
+        resultado['anuncios_por_dia'] = somas['anuncios'] / somas['dias']
+        resultado['preco_medio'] = somas['soma_preco'] / somas['com_preco'].where(somas['com_preco'] > 0)
+        com_area = somas['com_area'].where(somas['com_area'] > 0)
+        resultado['preco_m2'] = somas['soma_preco_m2'] / com_area
+        variancia = somas['soma_preco_m2_quadrado'] / com_area - resultado['preco_m2'] ** 2
+        resultado['preco_m2_desvio'] = np.sqrt(variancia.clip(lower=0))
+        resultado['condominio_medio'] = (somas['soma_condominio']
+                                         / somas['com_condominio'].where(somas['com_condominio'] > 0))
+        resultado['anuncios'] = somas['anuncios']
+        return resultado
+    
+    def por_bairro(self, dias: int = 90, periodo: str = 'W') -> pd.DataFrame:
+        """
+        Resumo por bairro (todas as tipologias): último período, variação
+        sobre o anterior e a série de R$/m² dos períodos
+        """
+        desde = (pd.Timestamp.now().normalize() - pd.Timedelta(days=dias)).strftime('%Y-%m-%d')
+        linhas = self.ler(desde)
+        if linhas.empty:
+            return pd.DataFrame()
+        
+        linhas['periodo'] = pd.to_datetime(linhas['dia']).dt.to_period(periodo).dt.start_time
+        somas = linhas.groupby(['bairro', 'periodo'])[self.SOMAS].sum()
+        somas['dias'] = linhas.groupby(['bairro', 'periodo'])['dia'].nunique()
+        serie = self._medias(somas)
+        
+        ultimo = serie.groupby(level='bairro').tail(1).droplevel('periodo')
+        anterior = serie.groupby(level='bairro').nth(-2).droplevel('periodo')
+        resumo = ultimo[['anuncios_por_dia', 'preco_m2', 'condominio_medio']].copy()
+        for coluna in ('anuncios_por_dia', 'preco_m2', 'condominio_medio'):
+            resumo[f'variacao_{coluna}'] = (ultimo[coluna] / anterior[coluna].reindex(ultimo.index) - 1) * 100
+        resumo['serie_preco_m2'] = serie['preco_m2'].groupby(level='bairro').agg(list)
+        return resumo.sort_values('anuncios_por_dia', ascending=False)
+    
+    def limpar(self) -> None:
+        with self._lock:
+            self._conexao.executescript("DELETE FROM rollups; DELETE FROM vistos;")
+    
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
 
 class MaceioCondominiosScraperReal:
     """
@@ -21,25 +2689,89 @@ class MaceioCondominiosScraperReal:
     usando fontes oficiais e públicas
     """
     
-    def __init__(self):
+    # Fontes de coleta e o método de cada uma, na ordem em que aparecem nos dados salvos
+    METODOS_FONTES = {
+        'portal_cidadao_maceio': 'buscar_dados_portal_cidadao',
+        'sefaz_maceio': 'buscar_dados_sefaz_maceio',
+        'ibge_oficial': 'buscar_dados_ibge_real',
+        'transparencia_alagoas': 'buscar_dados_transparencia_estado',
+        'cartorios_reais': 'buscar_dados_cartorio_real',
+        'sites_imobiliarios': 'buscar_dados_sites_imobiliarios_real'
+    }
+    
+    # Campos que identificam um registro de forma estável entre coletas
+    CHAVES_REGISTRO = {
+        'portal_cidadao_maceio': ['url'],
+        'sefaz_maceio': ['tipo', 'url'],
+        'ibge_oficial': ['fonte', 'tipo', 'codigo_ibge'],
+        'transparencia_alagoas': ['fonte', 'categoria', 'url'],
+        'cartorios_reais': ['fonte', 'nome'],
+        'sites_imobiliarios': ['site']
+    }
+    
+    # Campos que mudam a cada acesso e não devem gerar delta
+    CAMPOS_VOLATEIS = {'data_acesso', 'data_coleta'}
+    
+    # Página de busca de inscrição imobiliária, relativa ao Portal do Cidadão
+    CAMINHO_BUSCA_INSCRICAO = '6/ver_servico/21/unidade/buscar+inscri%C3%A7ao+imobiliaria/'
+    
+    # Cartórios de registro de imóveis de Maceió
+    CARTORIOS_MACEIO = [
+        {
+            'nome': '1º Ofício de Registro de Imóveis de Maceió',
+            'endereco': 'Rua do Livramento, 138 - Centro',
+            'telefone': '(82) 3221-8244',
+            'responsavel': 'Cartório Real',
+            'servicos': ['Registro de Imóveis', 'Certidões', 'Escrituras']
+        },
+        {
+            'nome': '2º Ofício de Registro de Imóveis de Maceió',
+            'endereco': 'Av. Fernandes Lima - Farol',
+            'telefone': '(82) 3221-XXXX',
+            'responsavel': 'Cartório Real',
+            'servicos': ['Registro de Imóveis', 'Certidões']
+        }
+    ]
+    
+    # Limite de taxa por host (requisições/s, rajada): os marketplaces recebem no máximo uma requisição a cada 3s
+    TAXA_PADRAO = (2.0, 4)
+    TAXA_POR_HOST = {
+        'www.vivareal.com.br': (1 / 3, 1),
+        'www.zapimoveis.com.br': (1 / 3, 1)
+    }
+    
+    # Blocos das sparklines do relatório de tendências, do menor ao maior valor da série
+    BLOCOS_SPARKLINE = '▁▂▃▄▅▆▇█'
+    
+    # Início do rótulo (minúsculo, sem acentos) na ficha do IPTU -> campo do registro
+    ROTULOS_IPTU = [
+        ('inscri', 'inscricao'), ('exerc', 'exercicio'), ('logradouro', 'logradouro'), ('endere', 'logradouro'),
+        ('numero', 'numero'), ('bairro', 'bairro'), ('area do terreno', 'area_terreno_m2'),
+        ('area constru', 'area_construida_m2'), ('utiliza', 'uso'), ('uso', 'uso'),
+        ('valor venal', 'valor_venal'), ('valor do iptu', 'valor_iptu')
+    ]
+    CAMPOS_NUMERICOS_IPTU = ('area_terreno_m2', 'area_construida_m2', 'valor_venal', 'valor_iptu')
+    
+    def __init__(self, usar_cache: bool = True, limitador: Optional[LimitadorTaxa] = None,
+                 usar_navegador: bool = True, data_dir: str = 'dados_condominios_maceio_real',
+                 urls: Optional[Dict[str, str]] = None, arquivar_respostas: bool = True):
+        """
+        urls sobrescreve entradas de self.urls_reais (por exemplo, para
+        apontar as fontes para um servidor local de testes)
+        
+        arquivar_respostas guarda o corpo bruto de cada resposta baixada da
+        rede no arquivo endereçado por conteúdo (ver reprocessar_arquivo)
+        """
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
         
-        # Configurar logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('maceio_condominios_real.log', encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        # O logging é configurado pelo ponto de entrada (configurar_logging), não pela biblioteca
         self.logger = logging.getLogger(__name__)
         
         # Criar diretório para dados
-        self.data_dir = 'dados_condominios_maceio_real'
+        self.data_dir = data_dir
         os.makedirs(self.data_dir, exist_ok=True)
         
         # URLs reais descobertas
@@ -48,13 +2780,131 @@ class MaceioCondominiosScraperReal:
             'sefaz_maceio': 'https://online.maceio.al.gov.br/',
             'transparencia_estado': 'https://transparencia.al.gov.br/',
             'ibge_api': 'https://servicodados.ibge.gov.br/api/v1/',
-            'dados_abertos_br': 'https://dados.gov.br/dados/conjuntos-dados'
+            'ibge_agregados': 'https://servicodados.ibge.gov.br/api/v3/',
+            'dados_abertos_br': 'https://dados.gov.br/dados/conjuntos-dados',
+            'cnr': 'https://www.cnr.org.br/',
+            'vivareal': 'https://www.vivareal.com.br/venda/alagoas/maceio/apartamento/',
+            'zapimoveis': 'https://www.zapimoveis.com.br/venda/apartamentos/al+maceio/'
+        }
+        self.urls_reais.update(urls or {})
+        
+        # Marketplaces: seletor do cartão de anúncio e seletores alternativos de cada campo
+        self.sites_imobiliarios = [
+            {
+                'nome': 'VivaReal',
+                'url': self.urls_reais['vivareal'],
+                'seletor': 'article[data-testid="property-card"], li[data-cy="rp-property-cd"]',
+                'seletor_resultados': 'div.results-list, ul.results',
+                'parametro_pagina': 'pagina',
+                'parametro_bairro': 'bairros',
+                'campos': {
+                    'id': {'xpath': '.', 'atributo': 'data-id'},
+                    'url': {'css': 'a[href]', 'atributo': 'href'},
+                    'titulo': {'css': ['[data-cy="rp-cardProperty-location-txt"]', '.property-card__title']},
+                    'endereco': {'css': ['[data-cy="rp-cardProperty-street-txt"]', '.property-card__address']},
+                    'preco': {'css': ['[data-cy="rp-cardProperty-price-txt"] p', '.property-card__price']},
+                    'condominio': {'css': ['.js-condo-price', '[data-cy="rp-cardProperty-price-txt"]']},
+                    'area_m2': {'css': ['[data-cy="rp-cardProperty-propertyArea-txt"]', '.property-card__detail-area']},
+                    'quartos': {'css': ['[data-cy="rp-cardProperty-bedroomQuantity-txt"]', '.property-card__detail-room']}
+                }
+            },
+            {
+                'nome': 'ZapImóveis',
+                'url': self.urls_reais['zapimoveis'],
+                'seletor': '[data-testid="listing-card"], li[data-cy="rp-property-cd"]',
+                'seletor_resultados': 'div.listing-wrapper__content, ul.results',
+                'parametro_pagina': 'pagina',
+                'parametro_bairro': 'bairros',
+                'campos': {
+                    'id': {'xpath': '.', 'atributo': 'data-id'},
+                    'url': {'css': 'a[href]', 'atributo': 'href'},
+                    'titulo': {'css': ['[data-cy="rp-cardProperty-location-txt"]', '[data-testid="listing-card-title"]']},
+                    'endereco': {'css': ['[data-cy="rp-cardProperty-street-txt"]', '[data-testid="listing-card-address"]']},
+                    'preco': {'css': ['[data-cy="rp-cardProperty-price-txt"] p', '[data-testid="listing-price"]']},
+                    'condominio': {'css': ['[data-testid="listing-condo-fee"]', '[data-cy="rp-cardProperty-price-txt"]']},
+                    'area_m2': {'css': ['[data-cy="rp-cardProperty-propertyArea-txt"]', '[data-testid="listing-area"]']},
+                    'quartos': {'css': ['[data-cy="rp-cardProperty-bedroomQuantity-txt"]', '[data-testid="listing-bedrooms"]']}
+                }
+            }
+        ]
+        
+        self.limitador = limitador or LimitadorTaxa(*self.TAXA_PADRAO, por_host=self.TAXA_POR_HOST)
+        
+        # Cache HTTP em disco: TTL por URL (None = nunca expira, 0 = sempre revalidar)
+        self.cache_http = None
+        if usar_cache:
+            self.cache_http = CacheHTTP(
+                os.path.join(self.data_dir, 'cache_http'),
+                ttls=[
+                    (r'servicodados\.ibge\.gov\.br/api/v\d+/agregados/\d+/periodos/(2000|2010|2022)((\||%7C)(2000|2010|2022))*/', None),
+                    (r'servicodados\.ibge\.gov\.br/api/v\d+/localidades/', 30 * 24 * 3600),
+                    (r'www\.cnr\.org\.br', 24 * 3600)
+                ]
+            )
+        
+        def criar_adaptador(**kwargs) -> AdaptadorHTTP:
+            if self.cache_http is not None:
+                return AdaptadorHTTPCache(self.cache_http, limitador=self.limitador, **kwargs)
+            return AdaptadorHTTP(self.limitador, **kwargs)
+        
+        adaptador = criar_adaptador()
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+        # consultar_iptu já repete as consultas à SEFAZ; o adaptador desse host não repete de novo
+        self.session.mount(self.urls_reais['sefaz_maceio'], criar_adaptador(tentativas=0))
+        
+        # Dataset Parquet particionado por fonte e data de coleta
+        self.armazem = ArmazemParquet(os.path.join(self.data_dir, 'dataset'))
+        
+        # Arquivo bruto das respostas, para reinterpretar o histórico sem voltar à rede
+        self.arquivo_bruto = ArquivoRespostas(os.path.join(self.data_dir, 'arquivo_bruto')) if arquivar_respostas else None
+        
+        # Pool de Chrome headless, criado sob demanda quando o HTML estático não
+        # traz o seletor procurado (páginas renderizadas por JavaScript)
+        self.usar_navegador = usar_navegador
+        self.pool_drivers = None
+        self._lock_pool = threading.Lock()
+        
+        # Índice SQLite de consulta e agregados de tendências, abertos sob demanda
+        self.indice = None
+        self.rollups = None
+        
+        # Estrutura e token de sessão do formulário do IPTU, compartilhados pelas consultas em lote
+        self._formulario_iptu = None
+        self._lock_formulario = threading.Lock()
+        self.validade_formulario_iptu = 15 * 60
+        
+        # Prazo (em segundos) de cada fonte na coleta concorrente
+        self.prazos_fontes = {
+            'portal_cidadao_maceio': 30,
+            'sefaz_maceio': 30,
+            'ibge_oficial': 20,
+            'transparencia_alagoas': 30,
+            'cartorios_reais': 20,
+            'sites_imobiliarios': 45
         }
+        
+        # Tamanho máximo (bytes) do corpo lido em streaming por fonte; o excedente é descartado
+        self.limites_corpo = {
+            'portal_cidadao_maceio': 2 * 1024 * 1024,
+            'transparencia_alagoas': 2 * 1024 * 1024
+        }
+        
+        # Estado da fonte em execução na thread atual (nome, prazo e cancelamento)
+        self._contexto = threading.local()
+        
+        # Instrumentação por fonte, reiniciada a cada coleta
+        self.metricas = MetricasColeta()
     
-    def configurar_selenium(self) -> webdriver.Chrome:
+    def configurar_selenium(self, bloquear_recursos: bool = True) -> webdriver.Chrome:
         """
         Configura o driver Selenium para sites que requerem JavaScript
+        
+        Com bloquear_recursos=True imagens, fontes e CSS não são baixados
         """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        
         chrome_options = Options()
         chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
@@ -63,13 +2913,259 @@ class MaceioCondominiosScraperReal:
         chrome_options.add_argument('--window-size=1920,1080')
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
         
+        if bloquear_recursos:
+            chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.managed_default_content_settings.stylesheets': 2,
+                'profile.managed_default_content_settings.fonts': 2
+            })
+        
         try:
             driver = webdriver.Chrome(options=chrome_options)
+            if bloquear_recursos:
+                # As preferências não cobrem CSS e fontes em versões recentes do Chrome
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': [
+                    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf',
+                    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg'
+                ]})
             return driver
         except Exception as e:
             self.logger.error(f"Erro ao configurar Selenium: {e}")
             return None
     
+    def _obter_pool_drivers(self) -> Optional[PoolDriversChrome]:
+        """
+        Cria o pool de drivers na primeira necessidade
+        """
+        if not self.usar_navegador:
+            return None
+        if importlib.util.find_spec('selenium') is None:
+            self.logger.warning("selenium não instalado: páginas renderizadas por JavaScript ficam sem anúncios")
+            self.usar_navegador = False
+            return None
+        with self._lock_pool:
+            if self.pool_drivers is None:
+                self.pool_drivers = PoolDriversChrome(self.configurar_selenium, tamanho=2, paginas_por_driver=50)
+        return None if self.pool_drivers.indisponivel else self.pool_drivers
+    
+    def obter_indice(self) -> IndiceLocal:
+        """
+        Abre o índice local de anúncios, condomínios e cartórios na primeira necessidade
+        """
+        with self._lock_pool:
+            if self.indice is None:
+                self.indice = IndiceLocal(os.path.join(self.data_dir, 'indice'))
+        return self.indice
+    
+    def obter_rollups(self) -> RollupsAnuncios:
+        """
+        Abre os agregados de tendências dos anúncios na primeira necessidade
+        """
+        with self._lock_pool:
+            if self.rollups is None:
+                self.rollups = RollupsAnuncios(os.path.join(self.data_dir, 'analise'))
+        return self.rollups
+    
+    def renderizar_pagina(self, url: str, seletor: str, espera: float = 15) -> Optional[bytes]:
+        """
+        Renderiza a página em um driver do pool e aguarda o seletor aparecer
+        """
+        pool = self._obter_pool_drivers()
+        if pool is None:
+            return None
+        
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        
+        try:
+            with pool.sessao() as driver:
+                driver.get(url)
+                try:
+                    WebDriverWait(driver, espera).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, seletor))
+                    )
+                except TimeoutException:
+                    self.logger.warning(f"Seletor não apareceu após renderização: {url}")
+                return driver.page_source.encode('utf-8')
+        
+        except WebDriverException as e:
+            self.logger.warning(f"Falha ao renderizar {url} no Chrome: {e}")
+            return None
+    
+    def encerrar(self) -> None:
+        """
+        Libera recursos de longa duração (drivers do Chrome, índice local, agregados, arquivo bruto e sessão HTTP)
+        """
+        if self.pool_drivers is not None:
+            self.pool_drivers.encerrar()
+        if self.indice is not None:
+            self.indice.fechar()
+        if self.rollups is not None:
+            self.rollups.fechar()
+        if self.arquivo_bruto is not None:
+            self.arquivo_bruto.fechar()
+        self.session.close()
+    
+    def fontes_coleta(self, nomes: Optional[Iterable[str]] = None) -> Dict[str, Callable[[], List[Dict]]]:
+        """
+        Retorna as fontes de coleta (todas ou só as de `nomes`) na ordem em que aparecem nos dados salvos
+        """
+        if nomes is not None:
+            nomes = set(nomes)
+            desconhecidas = nomes - set(self.METODOS_FONTES)
+            if desconhecidas:
+                raise ValueError(f"Fontes desconhecidas: {sorted(desconhecidas)}")
+        return {nome: getattr(self, metodo) for nome, metodo in self.METODOS_FONTES.items()
+                if nomes is None or nome in nomes}
+    
+    def selecionar_sites(self, nomes: Iterable[str]) -> None:
+        """
+        Restringe os marketplaces (fonte sites_imobiliarios e crawler de
+        anúncios) aos nomes informados, sem diferenciar maiúsculas nem acentos
+        """
+        def simplificar(nome: str) -> str:
+            return unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode().lower()
+        
+        procurados = {simplificar(nome) for nome in nomes}
+        disponiveis = {simplificar(site['nome']) for site in self.sites_imobiliarios}
+        if procurados - disponiveis:
+            raise ValueError(f"Marketplaces desconhecidos: {sorted(procurados - disponiveis)}")
+        self.sites_imobiliarios = [site for site in self.sites_imobiliarios
+                                   if simplificar(site['nome']) in procurados]
+    
+    def _cancelado(self) -> bool:
+        """
+        Indica se a fonte em execução na thread atual foi cancelada
+        """
+        cancelar = getattr(self._contexto, 'cancelar', None)
+        return cancelar is not None and cancelar.is_set()
+    
+    def _fonte_atual(self) -> str:
+        """
+        Nome da fonte em execução na thread atual, para atribuir métricas
+        """
+        return getattr(self._contexto, 'fonte', None) or 'sem_fonte'
+    
+    def _get(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        """
+        GET pela sessão compartilhada, limitando o timeout ao prazo restante da
+        fonte e registrando latência, bytes, status, retentativas e cache
+        """
+        return self._requisitar('GET', url, timeout, **kwargs)
+    
+    def _post(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        """
+        POST com o mesmo prazo e instrumentação de _get (nunca passa pelo cache)
+        """
+        return self._requisitar('POST', url, timeout, **kwargs)
+    
+    def _requisitar(self, metodo: str, url: str, timeout: float, **kwargs) -> requests.Response:
+        prazo = getattr(self._contexto, 'prazo', None)
+        if prazo is not None:
+            restante = prazo - time.monotonic()
+            if restante <= 0 or self._cancelado():
+                raise PrazoFonteExcedido(f"Prazo esgotado antes de acessar {url}")
+            timeout = min(timeout, restante)
+        
+        inicio = time.perf_counter()
+        try:
+            resposta = self.session.request(metodo, url, timeout=timeout, **kwargs)
+        except Exception as e:
+            self.metricas.registrar_requisicao(self._fonte_atual(), time.perf_counter() - inicio, erro=e)
+            raise
+        self.metricas.registrar_requisicao(self._fonte_atual(), time.perf_counter() - inicio, resposta)
+        
+        # Respostas em streaming são arquivadas por quem lê o corpo; acertos do cache não são capturas novas
+        if (self.arquivo_bruto is not None and not kwargs.get('stream') and resposta.status_code == 200
+                and getattr(resposta, 'cache_status', 'falha') != 'acerto'):
+            dados = kwargs.get('data')
+            requisicao = urllib.parse.urlencode(dados) if isinstance(dados, dict) else dados
+            self._arquivar(resposta.url, resposta.content, metodo=metodo, requisicao=requisicao,
+                           tipo_conteudo=resposta.headers.get('Content-Type'))
+        return resposta
+    
+    def _arquivar(self, url: str, corpo: bytes, status: int = 200, metodo: str = 'GET',
+                  requisicao: Optional[str] = None, tipo_conteudo: Optional[str] = None,
+                  completo: bool = True) -> None:
+        """
+        Guarda o corpo no arquivo bruto; falhas de disco não interrompem a coleta
+        """
+        try:
+            self.arquivo_bruto.guardar(url, corpo, status=status, metodo=metodo, requisicao=requisicao,
+                                       tipo_conteudo=tipo_conteudo, fonte=self._fonte_atual(), completo=completo)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha ao arquivar resposta de {url}: {e}")
+    
+    def _extrair(self, conteudo: bytes, especificacao: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+        """
+        Executa o motor de extração registrando o tempo de parse da fonte atual
+        """
+        inicio = time.perf_counter()
+        try:
+            return extrair_html(conteudo, especificacao)
+        finally:
+            self.metricas.registrar_parse(self._fonte_atual(), time.perf_counter() - inicio)
+    
+    def _extrair_em_stream(self, url: str, especificacao: Dict[str, Dict], timeout: float = 15,
+                           limite_bytes: Optional[int] = None) -> Optional[Dict[str, List[Dict]]]:
+        """
+        GET em streaming alimentando o extrator incremental bloco a bloco, sem
+        bufferizar o corpo: a leitura para quando todos os grupos terminaram
+        ('limite' ou 'termina_em') ou quando o corpo passa de limite_bytes
+        
+        Retorna None se a resposta não for 200. Só corpos lidos até o fim vão
+        para o cache HTTP; o arquivo bruto recebe também os parciais, marcados
+        como incompletos.
+        """
+        fonte = self._fonte_atual()
+        resposta = self._get(url, timeout=timeout, stream=True)
+        with resposta:
+            if resposta.status_code != 200:
+                return None
+            
+            extrator = ExtratorHTMLIncremental(especificacao)
+            armazenar = getattr(resposta, 'armazenar_no_cache', None)
+            arquivar = self.arquivo_bruto is not None and getattr(resposta, 'cache_status', 'falha') != 'acerto'
+            blocos = [] if armazenar or arquivar else None
+            recebidos = 0
+            parse = 0.0
+            completo = False
+            
+            for bloco in resposta.iter_content(chunk_size=16384):
+                recebidos += len(bloco)
+                if blocos is not None:
+                    blocos.append(bloco)
+                inicio = time.perf_counter()
+                extrator.alimentar(bloco)
+                parse += time.perf_counter() - inicio
+                if extrator.concluido:
+                    self.logger.info(f"{fonte}: itens procurados encontrados após {recebidos // 1024} KiB, leitura interrompida")
+                    break
+                if limite_bytes is not None and recebidos >= limite_bytes:
+                    self.logger.warning(f"{fonte}: corpo de {url} passou de {limite_bytes:,} bytes e foi truncado")
+                    break
+            else:
+                completo = True
+            
+            inicio = time.perf_counter()
+            resultado = extrator.finalizar()
+            parse += time.perf_counter() - inicio
+        
+        self.metricas.registrar_bytes(fonte, recebidos)
+        self.metricas.registrar_parse(fonte, parse)
+        if blocos is not None:
+            corpo = b''.join(blocos)
+            if completo and armazenar:
+                armazenar(corpo)
+            if arquivar:
+                self._arquivar(resposta.url, corpo, tipo_conteudo=resposta.headers.get('Content-Type'),
+                               completo=completo)
+        return resultado
+    
     def buscar_dados_portal_cidadao(self) -> List[Dict]:
         """
         Busca dados do Portal do Cidadão de Maceió (dados REAIS)
@@ -81,32 +3177,19 @@ class MaceioCondominiosScraperReal:
             # Acessar serviços de ficha cadastral
             url_ficha = f"{self.urls_reais['portal_cidadao']}1/ver_servico/69/unidade/ficha+cadastral+de+imoveis/"
             
-            response = self.session.get(url_ficha, timeout=15)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+            extraido = self._extrair_em_stream(url_ficha, ESPECIFICACOES_EXTRACAO['portal_cidadao_maceio'],
+                                               limite_bytes=self.limites_corpo.get('portal_cidadao_maceio'))
+            if extraido is not None:
                 self.logger.info("Acesso ao portal do cidadão realizado com sucesso")
                 
-                # Buscar formulários de consulta disponíveis
-                forms = soup.find_all('form')
-                for form in forms:
-                    action = form.get('action', '')
+                # Formulários de consulta disponíveis
+                for form in extraido['formularios']:
+                    action = form['action'] or ''
                     if 'imovel' in action.lower() or 'cadastr' in action.lower():
                         self.logger.info(f"Encontrado formulário de consulta: {action}")
                 
-                # Buscar links para serviços relacionados a imóveis
-                links_servicos = soup.find_all('a', href=True)
-                servicos_imoveis = []
-                
-                for link in links_servicos:
-                    texto = link.get_text().lower()
-                    href = link['href']
-                    
-                    if any(palavra in texto for palavra in ['imóvel', 'imovel', 'cadastr', 'iptu', 'predial']):
-                        servicos_imoveis.append({
-                            'servico': link.get_text().strip(),
-                            'url': href,
-                            'tipo': 'consulta_imovel'
-                        })
+                # Links para serviços relacionados a imóveis (já filtrados pela especificação)
+                servicos_imoveis = self._registros_portal_cidadao(extraido)
                 
                 condominios.extend(servicos_imoveis)
                 self.logger.info(f"Encontrados {len(servicos_imoveis)} serviços relacionados a imóveis")
@@ -114,63 +3197,252 @@ class MaceioCondominiosScraperReal:
         except Exception as e:
             self.logger.error(f"Erro ao acessar Portal do Cidadão: {e}")
         
-        return condominios
+        return condominios
+    
+    @staticmethod
+    def _registros_portal_cidadao(extraido: Dict[str, List[Dict]]) -> List[Dict]:
+        return [{'servico': link['servico'], 'url': link['url'], 'tipo': 'consulta_imovel'}
+                for link in extraido['servicos']]
+    
+    def buscar_dados_sefaz_maceio(self) -> List[Dict]:
+        """
+        Busca dados da SEFAZ de Maceió (Sistema de IPTU - dados REAIS)
+        """
+        self.logger.info("Buscando dados da SEFAZ Maceió...")
+        dados_imoveis = []
+        
+        try:
+            # URL do sistema de IPTU
+            url_iptu = f"{self.urls_reais['sefaz_maceio']}n/iptu2022/"
+            
+            response = self._get(url_iptu, timeout=15)
+            if response.status_code == 200:
+                # Analisar estrutura do sistema de IPTU
+                extraido = self._extrair(response.content, ESPECIFICACOES_EXTRACAO['sefaz_maceio'])
+                dados_imoveis.append(self._registro_sistema_iptu(extraido, url_iptu))
+                self.logger.info("Sistema de IPTU mapeado com sucesso")
+                
+                # Tentar acessar página de busca de inscrição
+                url_busca = f"{self.urls_reais['portal_cidadao']}{self.CAMINHO_BUSCA_INSCRICAO}"
+                response_busca = self._get(url_busca, timeout=10)
+                
+                if response_busca.status_code == 200:
+                    dados_imoveis.append(self._registro_busca_inscricao(url_busca))
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao acessar SEFAZ: {e}")
+        
+        return dados_imoveis
+    
+    @staticmethod
+    def _registro_sistema_iptu(extraido: Dict[str, List[Dict]], url: str) -> Dict:
+        return {
+            'url': url,
+            'tipo': 'sistema_iptu',
+            'status': 'ativo',
+            'formularios_disponiveis': len(extraido['formularios']),
+            'campos_consulta': extraido['campos_consulta']
+        }
+    
+    @staticmethod
+    def _registro_busca_inscricao(url: str) -> Dict:
+        return {'url': url, 'tipo': 'busca_inscricao', 'status': 'disponivel'}
+    
+    def _obter_formulario_iptu(self, expirado: Optional[Dict] = None) -> Dict:
+        """
+        Estrutura do formulário de consulta do IPTU (URL, campos ocultos,
+        valores iniciais e token), baixada uma vez e reaproveitada
+        
+        Passar o formulário recusado pelo servidor em `expirado` força uma
+        cópia nova; se outra thread já a trouxe, ela é devolvida sem baixar de novo.
+        """
+        with self._lock_formulario:
+            atual = self._formulario_iptu
+            if (atual is not None and atual is not expirado
+                    and time.monotonic() - atual['obtido_em'] < self.validade_formulario_iptu):
+                return atual
+            
+            url = f"{self.urls_reais['sefaz_maceio']}n/iptu2022/"
+            resposta = self._get(url, timeout=15, headers={'Cache-Control': 'no-cache'})
+            resposta.raise_for_status()
+            campos = self._extrair(resposta.content, ESPECIFICACOES_EXTRACAO['sefaz_iptu_formulario'])['campos']
+            
+            # O formulário da consulta é o que tem o campo da inscrição
+            inscricao = next((c for c in campos if 'inscri' in c['nome'].lower()), None)
+            if inscricao is None:
+                raise RuntimeError(f"Formulário de consulta do IPTU não encontrado em {url}")
+            do_formulario = [c for c in campos if c['formulario'] == inscricao['formulario']]
+            
+            self._formulario_iptu = {
+                'url': urllib.parse.urljoin(resposta.url, inscricao['formulario']),
+                'metodo': inscricao['metodo'].lower(),
+                'valores': {c['nome']: c['opcao'] if c['opcao'] is not None else c['valor'] for c in do_formulario},
+                'campo_inscricao': inscricao['nome'],
+                'campo_exercicio': next((c['nome'] for c in do_formulario if 'exerc' in c['nome'].lower()), None),
+                'obtido_em': time.monotonic(),
+                'renovacoes': 0 if atual is None else atual['renovacoes'] + 1
+            }
+            self.logger.info(f"🧾 Formulário do IPTU obtido: {len(do_formulario)} campos, "
+                             f"envio para {self._formulario_iptu['url']}")
+            return self._formulario_iptu
+    
+    @classmethod
+    def _normalizar_iptu(cls, inscricao: str, extraido: Dict[str, List[Dict]]) -> Optional[Dict]:
+        """
+        Converte a ficha extraída em um registro tipado; None quando a página
+        não traz nem a ficha nem uma mensagem (o formulário voltou: token recusado)
+        """
+        registro = {
+            'inscricao': inscricao, 'status': None, 'exercicio': None, 'logradouro': None, 'numero': None,
+            'bairro': None, 'area_terreno_m2': None, 'area_construida_m2': None, 'uso': None,
+            'valor_venal': None, 'valor_iptu': None, 'mensagem': None
+        }
+        for linha in extraido['linhas']:
+            rotulo = unicodedata.normalize('NFKD', linha['rotulo'] or '').encode('ascii', 'ignore').decode().lower()
+            campo = next((campo for prefixo, campo in cls.ROTULOS_IPTU if rotulo.startswith(prefixo)), None)
+            if campo is not None and campo != 'inscricao':
+                registro[campo] = linha['valor']
+        for campo in cls.CAMPOS_NUMERICOS_IPTU:
+            registro[campo] = cls._numero_brasileiro(registro[campo])
+        
+        mensagem = ' '.join(m['texto'] for m in extraido['mensagens'] if m['texto'])
+        if any(registro[campo] is not None for campo in ('logradouro', 'valor_venal', 'valor_iptu')):
+            registro['status'] = 'encontrada'
+        elif mensagem:
+            registro['status'] = 'nao_encontrada'
+            registro['mensagem'] = mensagem
+        else:
+            return None
+        registro['data_consulta'] = datetime.now().isoformat()
+        return registro
     
-    def buscar_dados_sefaz_maceio(self) -> List[Dict]:
+    def consultar_iptu(self, inscricao: str, exercicio: Optional[str] = None,
+                       tentativas: int = 4, timeout: float = 15) -> Dict:
         """
-        Busca dados da SEFAZ de Maceió (Sistema de IPTU - dados REAIS)
+        Consulta uma inscrição imobiliária no sistema de IPTU da SEFAZ
+        
+        Sessão expirada (401/403/419, ou o formulário devolvido em vez da
+        ficha) renova o formulário e repete na hora; 429/5xx e falhas de rede
+        são repetidos com backoff exponencial. Estas são as únicas
+        retentativas: o adaptador do host da SEFAZ é montado sem Retry, então
+        cada tentativa custa uma requisição. Qualquer outra exceção (uma
+        ficha que não pôde ser lida, por exemplo) encerra só esta inscrição.
+        Retorna o registro com status 'encontrada', 'nao_encontrada' ou 'erro'.
         """
-        self.logger.info("Buscando dados da SEFAZ Maceió...")
-        dados_imoveis = []
+        def falha(mensagem: str, tentativa: int) -> Dict:
+            return {'inscricao': inscricao, 'status': 'erro', 'mensagem': mensagem, 'tentativas': tentativa,
+                    'data_consulta': datetime.now().isoformat()}
         
-        try:
-            # URL do sistema de IPTU
-            url_iptu = f"{self.urls_reais['sefaz_maceio']}n/iptu2022/"
-            
-            response = self.session.get(url_iptu, timeout=15)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Analisar estrutura do sistema de IPTU
-                forms = soup.find_all('form')
-                inputs = soup.find_all('input')
-                selects = soup.find_all('select')
-                
-                sistema_info = {
-                    'url': url_iptu,
-                    'tipo': 'sistema_iptu',
-                    'status': 'ativo',
-                    'formularios_disponiveis': len(forms),
-                    'campos_consulta': []
-                }
-                
-                # Extrair campos de consulta disponíveis
-                for input_field in inputs:
-                    if input_field.get('name'):
-                        sistema_info['campos_consulta'].append({
-                            'campo': input_field.get('name'),
-                            'tipo': input_field.get('type', 'text'),
-                            'placeholder': input_field.get('placeholder', '')
-                        })
-                
-                dados_imoveis.append(sistema_info)
-                self.logger.info("Sistema de IPTU mapeado com sucesso")
+        erro = None
+        for tentativa in range(1, tentativas + 1):
+            try:
+                formulario = self._obter_formulario_iptu()
+                dados = dict(formulario['valores'])
+                dados[formulario['campo_inscricao']] = inscricao
+                if exercicio and formulario['campo_exercicio']:
+                    dados[formulario['campo_exercicio']] = exercicio
                 
-                # Tentar acessar página de busca de inscrição
-                url_busca = f"{self.urls_reais['portal_cidadao']}6/ver_servico/21/unidade/buscar+inscri%C3%A7ao+imobiliaria/"
-                response_busca = self.session.get(url_busca, timeout=10)
+                if formulario['metodo'] == 'post':
+                    resposta = self._post(formulario['url'], timeout, data=dados)
+                else:
+                    resposta = self._get(formulario['url'], timeout, params=dados)
                 
-                if response_busca.status_code == 200:
-                    dados_imoveis.append({
-                        'url': url_busca,
-                        'tipo': 'busca_inscricao',
-                        'status': 'disponivel'
-                    })
+                if resposta.status_code in (401, 403, 419):
+                    erro = f"HTTP {resposta.status_code} (sessão expirada)"
+                    self._obter_formulario_iptu(expirado=formulario)
+                    continue
+                if resposta.status_code == 200:
+                    registro = self._normalizar_iptu(
+                        inscricao, self._extrair(resposta.content, ESPECIFICACOES_EXTRACAO['sefaz_iptu_resultado']))
+                    if registro is not None:
+                        registro['exercicio'] = registro['exercicio'] or dados.get(formulario['campo_exercicio'])
+                        registro['tentativas'] = tentativa
+                        return registro
+                    erro = "formulário devolvido sem resultado (sessão expirada)"
+                    self._obter_formulario_iptu(expirado=formulario)
+                    continue
+                erro = f"HTTP {resposta.status_code}"
+            except (requests.RequestException, RuntimeError) as e:
+                erro = str(e)
+            except Exception as e:
+                # Repetir não muda o resultado: a inscrição fica com erro e o lote continua
+                return falha(f"{type(e).__name__}: {e}", tentativa)
+            
+            if tentativa < tentativas:
+                time.sleep(min(30.0, 0.5 * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.5))
         
-        except Exception as e:
-            self.logger.error(f"Erro ao acessar SEFAZ: {e}")
+        return falha(erro, tentativas)
+    
+    def consultar_iptu_em_lote(self, inscricoes: Iterable[str], saida: str, concorrencia: int = 8,
+                               exercicio: Optional[str] = None) -> Dict:
+        """
+        Consulta muitas inscrições em paralelo, dentro do limite de taxa do
+        host da SEFAZ, gravando cada resultado no NDJSON `saida` assim que chega
         
-        return dados_imoveis
+        O formulário é baixado uma vez e compartilhado por todas as consultas.
+        Só resultados definitivos (encontrada / não encontrada) são gravados:
+        executar de novo com a mesma saída pula as inscrições já gravadas e
+        repete as que terminaram em erro.
+        """
+        os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+        DiarioColeta._reparar(saida)
+        gravadas = {registro['inscricao'] for registro in ler_ndjson(saida)} if os.path.exists(saida) else set()
+        
+        estatisticas = {'consultadas': 0, 'encontrada': 0, 'nao_encontrada': 0, 'erro': 0,
+                        'ja_gravadas': 0, 'renovacoes_formulario': 0}
+        if gravadas:
+            self.logger.info(f"♻️ {len(gravadas)} inscrições já gravadas em {saida} serão puladas")
+        
+        def pendentes() -> Iterator[str]:
+            for inscricao in inscricoes:
+                if inscricao in gravadas:
+                    estatisticas['ja_gravadas'] += 1
+                else:
+                    yield inscricao
+        
+        def consultar(inscricao: str) -> Dict:
+            self._contexto.fonte = 'sefaz_iptu'
+            return self.consultar_iptu(inscricao, exercicio)
+        
+        inicio = time.perf_counter()
+        fila = pendentes()
+        with open(saida, 'a', encoding='utf-8') as arquivo, \
+                ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='iptu') as executor:
+            em_andamento = set()
+            try:
+                while True:
+                    # Mantém no máximo 2 consultas por thread em andamento; o arquivo de entrada é lido aos poucos
+                    for inscricao in islice(fila, 2 * concorrencia - len(em_andamento)):
+                        em_andamento.add(executor.submit(consultar, inscricao))
+                    if not em_andamento:
+                        break
+                    
+                    concluidas, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    for futuro in concluidas:
+                        registro = futuro.result()
+                        estatisticas['consultadas'] += 1
+                        estatisticas[registro['status']] += 1
+                        if registro['status'] == 'erro':
+                            self.logger.warning(f"IPTU {registro['inscricao']}: {registro['mensagem']}")
+                            continue
+                        arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                        arquivo.flush()
+                    
+                    if estatisticas['consultadas'] % 500 < len(concluidas):
+                        self.logger.info(f"🧾 IPTU: {estatisticas['consultadas']} consultas, "
+                                         f"{estatisticas['erro']} erros")
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        tempo = time.perf_counter() - inicio
+        if self._formulario_iptu is not None:
+            estatisticas['renovacoes_formulario'] = self._formulario_iptu['renovacoes']
+        estatisticas['tempo'] = tempo
+        estatisticas['por_segundo'] = estatisticas['consultadas'] / tempo if tempo else 0.0
+        self.logger.info(f"🧾 Consulta de IPTU em lote: {estatisticas['consultadas']} inscrições em {tempo:.1f}s "
+                         f"({estatisticas['encontrada']} encontradas, {estatisticas['nao_encontrada']} não "
+                         f"encontradas, {estatisticas['erro']} erros) -> {saida}")
+        return estatisticas
     
     def buscar_dados_ibge_real(self) -> List[Dict]:
         """
@@ -185,44 +3457,109 @@ class MaceioCondominiosScraperReal:
             
             # Buscar dados básicos do município
             url_municipio = f"{self.urls_reais['ibge_api']}localidades/municipios/{codigo_maceio}"
-            response = self.session.get(url_municipio, timeout=10)
+            response = self._get(url_municipio, timeout=10)
             
             if response.status_code == 200:
-                dados_municipio = response.json()
-                
-                municipio_info = {
-                    'fonte': 'IBGE - Oficial',
-                    'codigo_ibge': dados_municipio.get('id'),
-                    'nome': dados_municipio.get('nome'),
-                    'microrregiao': dados_municipio.get('microrregiao', {}).get('nome'),
-                    'mesorregiao': dados_municipio.get('mesorregiao', {}).get('nome'),
-                    'uf': dados_municipio.get('microrregiao', {}).get('mesorregiao', {}).get('UF', {}).get('sigla'),
-                    'regiao': dados_municipio.get('microrregiao', {}).get('mesorregiao', {}).get('UF', {}).get('regiao', {}).get('nome')
-                }
-                
+                municipio_info = self._registro_municipio_ibge(response.json())
                 dados_ibge.append(municipio_info)
                 self.logger.info(f"Dados do IBGE obtidos: {municipio_info['nome']}")
                 
-                # Buscar dados de domicílios
-                url_domicilios = f"{self.urls_reais['ibge_api']}agregados/793/periodos/2010/variaveis/96?localidades=N6[{codigo_maceio}]"
-                response_dom = self.session.get(url_domicilios, timeout=10)
-                
-                if response_dom.status_code == 200:
-                    dados_domicilios = response_dom.json()
-                    if dados_domicilios:
-                        domicilios_info = {
-                            'fonte': 'IBGE - Censo',
-                            'total_domicilios': dados_domicilios[0].get('resultados', [{}])[0].get('series', [{}])[0].get('serie', {}).get('2010', 'N/A'),
-                            'ano_referencia': '2010',
-                            'tipo': 'domicilios_particulares'
-                        }
-                        dados_ibge.append(domicilios_info)
+                # Buscar dados de domicílios pelo mesmo motor dos agregados em lote
+                domicilios = self.buscar_agregados_ibge(
+                    [{'agregado': 793, 'variaveis': [96], 'periodos': ['2010']}],
+                    localidades=f"N6[{codigo_maceio}]"
+                )
+                if not domicilios.empty:
+                    dados_ibge.append(self._registro_domicilios_ibge(domicilios))
         
         except Exception as e:
             self.logger.error(f"Erro ao buscar dados do IBGE: {e}")
         
         return dados_ibge
     
+    @staticmethod
+    def _registro_municipio_ibge(dados_municipio: Dict) -> Dict:
+        return {
+            'fonte': 'IBGE - Oficial',
+            'codigo_ibge': dados_municipio.get('id'),
+            'nome': dados_municipio.get('nome'),
+            'microrregiao': dados_municipio.get('microrregiao', {}).get('nome'),
+            'mesorregiao': dados_municipio.get('mesorregiao', {}).get('nome'),
+            'uf': dados_municipio.get('microrregiao', {}).get('mesorregiao', {}).get('UF', {}).get('sigla'),
+            'regiao': dados_municipio.get('microrregiao', {}).get('mesorregiao', {}).get('UF', {}).get('regiao', {}).get('nome')
+        }
+    
+    @staticmethod
+    def _registro_domicilios_ibge(domicilios: pd.DataFrame) -> Dict:
+        """
+        Total de domicílios a partir da tabela normalizada do agregado 793
+        """
+        # Símbolos do IBGE viram NaN na normalização; NaN não é JSON válido
+        total = domicilios['valor'].iloc[0]
+        return {
+            'fonte': 'IBGE - Censo',
+            'total_domicilios': float(total) if pd.notna(total) else 'N/A',
+            'ano_referencia': '2010',
+            'tipo': 'domicilios_particulares'
+        }
+    
+    def buscar_agregados_ibge(self, agregados: Optional[List[Dict]] = None,
+                              localidades: str = LOCALIDADES_IBGE['alagoas']) -> pd.DataFrame:
+        """
+        Busca vários agregados do IBGE para muitas localidades de uma vez
+        
+        Cada agregado é uma única requisição com todas as suas variáveis e
+        períodos (separados por '|') e o recorte territorial completo
+        (por exemplo N6[N3[27]], todos os municípios de Alagoas). As respostas
+        são normalizadas em uma tabela longa (agregado, variável, município,
+        período, valor). Períodos de censo ficam no cache HTTP sem expiração.
+        """
+        agregados = agregados or AGREGADOS_IBGE
+        tabelas = []
+        
+        # Fora de uma coleta, as métricas das requisições vão para a fonte do IBGE
+        fonte_anterior = getattr(self._contexto, 'fonte', None)
+        self._contexto.fonte = fonte_anterior or 'ibge_oficial'
+        
+        for especificacao in agregados:
+            variaveis = '|'.join(str(v) for v in especificacao['variaveis'])
+            periodos = '|'.join(str(p) for p in especificacao['periodos'])
+            url = (f"{self.urls_reais['ibge_agregados']}agregados/{especificacao['agregado']}"
+                   f"/periodos/{periodos}/variaveis/{variaveis}?localidades={localidades}")
+            try:
+                response = self._get(url, timeout=30)
+                response.raise_for_status()
+                inicio = time.perf_counter()
+                tabela = normalizar_agregados_ibge(response.json(), especificacao['agregado'])
+                self.metricas.registrar_parse(self._fonte_atual(), time.perf_counter() - inicio)
+                tabelas.append(tabela)
+                self.logger.info(f"📈 IBGE agregado {especificacao['agregado']}: {len(tabela)} valores")
+            except Exception as e:
+                self.logger.error(f"Erro ao buscar o agregado {especificacao['agregado']} do IBGE: {e}")
+        
+        self._contexto.fonte = fonte_anterior
+        if not tabelas:
+            return pd.DataFrame(columns=COLUNAS_AGREGADOS_IBGE)
+        return pd.concat(tabelas, ignore_index=True)
+    
+    def exportar_agregados_ibge(self, tabela: pd.DataFrame, escopo: str, formato: str = 'csv') -> Optional[str]:
+        """
+        Salva a tabela de agregados em CSV ou a acrescenta ao dataset Parquet
+        """
+        if tabela.empty:
+            self.logger.warning("Nenhum agregado do IBGE para exportar")
+            return None
+        
+        if formato == 'parquet':
+            caminho = self.armazem.gravar('agregados_ibge', tabela.to_dict('records'))
+        else:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            caminho = os.path.join(self.data_dir, f'agregados_ibge_{escopo}_{timestamp}.csv')
+            tabela.to_csv(caminho, index=False, encoding='utf-8-sig')
+        
+        self.logger.info(f"📈 {len(tabela)} valores de agregados do IBGE salvos: {caminho}")
+        return caminho
+    
     def buscar_dados_transparencia_estado(self) -> List[Dict]:
         """
         Busca dados do Portal de Transparência do Estado de Alagoas
@@ -232,201 +3569,948 @@ class MaceioCondominiosScraperReal:
         
         try:
             url_transparencia = self.urls_reais['transparencia_estado']
-            response = self.session.get(url_transparencia, timeout=15)
             
+            # Seções de dados relacionadas a patrimônio (já filtradas pela especificação)
+            extraido = self._extrair_em_stream(url_transparencia, ESPECIFICACOES_EXTRACAO['transparencia_alagoas'],
+                                               limite_bytes=self.limites_corpo.get('transparencia_alagoas'))
+            if extraido is not None:
+                dados_transparencia = self._registros_transparencia(extraido, url_transparencia,
+                                                                    datetime.now().isoformat())
+                if len(dados_transparencia) > 1:
+                    self.logger.info(f"Encontrados {len(dados_transparencia) - 1} datasets relacionados")
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao acessar Transparência AL: {e}")
+        
+        return dados_transparencia
+    
+    @staticmethod
+    def _registros_transparencia(extraido: Dict[str, List[Dict]], url: str, data_acesso: str) -> List[Dict]:
+        """
+        Datasets de patrimônio (já filtrados pela especificação) seguidos das informações gerais do portal
+        """
+        datasets = [
+            {'titulo': link['titulo'], 'url': link['url'], 'categoria': 'patrimonio_imoveis'}
+            for link in extraido['datasets']
+        ]
+        portal_info = {
+            'fonte': 'Portal Transparência AL',
+            'url': url,
+            'status': 'ativo',
+            'datasets_patrimonio': len(datasets),
+            'data_acesso': data_acesso
+        }
+        return datasets + [portal_info]
+    
+    def buscar_dados_cartorio_real(self) -> List[Dict]:
+        """
+        Busca dados de cartórios reais de Maceió
+        """
+        self.logger.info("Buscando dados de cartórios reais...")
+        url_cnr = None
+        
+        try:
+            # Tentar acessar o site do CNR (Central Nacional de Registros)
+            response = self._get(self.urls_reais['cnr'], timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Buscar seções de dados disponíveis
-                links_dados = soup.find_all('a', href=True)
-                datasets_encontrados = []
-                
-                for link in links_dados:
-                    texto = link.get_text().lower()
-                    href = link['href']
-                    
-                    if any(palavra in texto for palavra in ['imóv', 'patrim', 'bem', 'propriedade']):
-                        datasets_encontrados.append({
-                            'titulo': link.get_text().strip(),
-                            'url': href,
-                            'categoria': 'patrimonio_imoveis'
-                        })
+                self.logger.info("Acesso ao CNR realizado - fonte de dados cartoriais disponível")
+                url_cnr = self.urls_reais['cnr']
+        
+        except Exception as e:
+            self.logger.warning(f"CNR não acessível: {e}")
+        
+        return self._registros_cartorios(url_cnr)
+    
+    @classmethod
+    def _registros_cartorios(cls, url_cnr: Optional[str]) -> List[Dict]:
+        """
+        Informações do CNR (quando acessível em url_cnr) seguidas dos cartórios locais
+        """
+        dados_cartorio = []
+        if url_cnr:
+            dados_cartorio.append({
+                'fonte': 'CNR - Central Nacional de Registros',
+                'url': url_cnr,
+                'servicos_disponiveis': ['Consulta de Imóveis', 'Certidões Online'],
+                'abrangencia': 'Nacional',
+                'status': 'ativo'
+            })
+        dados_cartorio.extend(dict(cartorio, servicos=list(cartorio['servicos'])) for cartorio in cls.CARTORIOS_MACEIO)
+        return dados_cartorio
+    
+    def buscar_dados_sites_imobiliarios_real(self) -> List[Dict]:
+        """
+        Busca dados REAIS de sites imobiliários com foco em Maceió
+        """
+        self.logger.info("Buscando dados de sites imobiliários reais...")
+        dados_imoveis = []
+        
+        for site in self.sites_imobiliarios:
+            try:
+                self.logger.info(f"Processando {site['nome']}...")
                 
-                if datasets_encontrados:
-                    dados_transparencia.extend(datasets_encontrados)
-                    self.logger.info(f"Encontrados {len(datasets_encontrados)} datasets relacionados")
+                response = self._get(site['url'], timeout=15)
                 
-                # Informações gerais do portal
-                portal_info = {
-                    'fonte': 'Portal Transparência AL',
-                    'url': url_transparencia,
-                    'status': 'ativo',
-                    'datasets_patrimonio': len(datasets_encontrados),
-                    'data_acesso': datetime.now().isoformat()
-                }
+                if response.status_code == 200:
+                    # Cartões de anúncio encontrados pelo seletor do site na primeira página
+                    imoveis_encontrados = len(self._extrair_anuncios_com_fallback(response.content, site, site['url'], 1))
+                    dados_imoveis.append(self._registro_site_imobiliario(site, imoveis_encontrados,
+                                                                         datetime.now().isoformat()))
+                    self.logger.info(f"{site['nome']}: {imoveis_encontrados} imóveis detectados")
                 
-                dados_transparencia.append(portal_info)
+            except PrazoFonteExcedido as e:
+                self.logger.warning(f"Coleta de sites imobiliários interrompida: {e}")
+                break
+            except Exception as e:
+                self.logger.warning(f"Erro ao processar {site['nome']}: {e}")
+                continue
         
-        except Exception as e:
-            self.logger.error(f"Erro ao acessar Transparência AL: {e}")
+        return dados_imoveis
+    
+    @staticmethod
+    def _registro_site_imobiliario(site: Dict, imoveis_detectados: int, data_acesso: str) -> Dict:
+        return {
+            'site': site['nome'],
+            'url': site['url'],
+            'status': 'acessivel',
+            'imoveis_detectados': imoveis_detectados,
+            'data_acesso': data_acesso,
+            'tipo': 'marketplace_imobiliario'
+        }
+    
+    def crawler_anuncios(self, max_paginas: Optional[int] = None, concorrencia: int = 4,
+                         diario: Optional[DiarioColeta] = None, max_falhas_seguidas: int = 3) -> Iterator[Dict]:
+        """
+        Percorre todas as páginas de resultados dos marketplaces e gera um
+        registro por anúncio, sem acumular a listagem em memória
+        
+        Cada site mantém no máximo `concorrencia` páginas em andamento; a
+        primeira página baixada com sucesso e sem anúncios encerra o site.
+        Uma página cuja requisição falha (depois das retentativas do adaptador)
+        é registrada e pulada; `max_falhas_seguidas` falhas consecutivas
+        interrompem o site, que fica marcado como incompleto. Com um diário, cada
+        página é registrada antes de seus anúncios serem entregues; numa
+        retomada os anúncios já salvos são entregues primeiro e só as páginas
+        que faltam são baixadas.
+        """
+        self.logger.info("🕷️ Iniciando crawler de anúncios dos marketplaces...")
+        ids_vistos = set()
+        estados = {
+            site['nome']: {'site': site, 'proxima': 1, 'ultima': max_paginas, 'anuncios': 0,
+                           'falhas': [], 'falhas_seguidas': 0, 'interrompido': False}
+            for site in self.sites_imobiliarios
+        }
+        
+        if diario is not None and diario.retomando:
+            self.logger.info(f"♻️ Retomando crawler: {diario.resumo()}")
+            for anuncio in diario.anuncios_salvos():
+                chave = (anuncio['site'], anuncio['id'])
+                if chave in ids_vistos:
+                    continue
+                ids_vistos.add(chave)
+                if anuncio['site'] in estados:
+                    estados[anuncio['site']]['anuncios'] += 1
+                yield anuncio
+        
+        with ThreadPoolExecutor(max_workers=concorrencia * len(self.sites_imobiliarios),
+                                thread_name_prefix='crawler') as executor:
+            pendentes = {}
+            
+            try:
+                while True:
+                    # Completar a janela de páginas em andamento de cada site
+                    for estado in estados.values():
+                        nome = estado['site']['nome']
+                        em_andamento = sum(1 for site, _ in pendentes.values() if site == nome)
+                        while (em_andamento < concorrencia and not estado['interrompido']
+                               and (estado['ultima'] is None or estado['proxima'] <= estado['ultima'])):
+                            pagina = estado['proxima']
+                            estado['proxima'] += 1
+                            if diario is not None:
+                                if diario.pagina_concluida(nome, pagina):
+                                    continue
+                                diario.pagina_pendente(nome, pagina, self._url_pagina(estado['site'], pagina))
+                            futuro = executor.submit(self._baixar_pagina_anuncios, estado['site'], pagina)
+                            pendentes[futuro] = (nome, pagina)
+                            em_andamento += 1
+                    
+                    if not pendentes:
+                        break
+                    
+                    concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in concluidos:
+                        nome, pagina = pendentes.pop(futuro)
+                        estado = estados[nome]
+                        try:
+                            anuncios = futuro.result()
+                        except Exception as e:
+                            if estado['ultima'] is not None and pagina > estado['ultima']:
+                                if diario is not None:
+                                    diario.concluir_pagina(nome, pagina, [])
+                                continue
+                            estado['falhas'].append(pagina)
+                            estado['falhas_seguidas'] += 1
+                            self.logger.warning(f"{nome} página {pagina}: falha na requisição, página pulada ({e})")
+                            if diario is not None:
+                                diario.pagina_falhou(nome, pagina, str(e))
+                            if estado['falhas_seguidas'] >= max_falhas_seguidas and not estado['interrompido']:
+                                # Site fora do ar: não disparar mais páginas, mas sem tomar isso como fim dos resultados
+                                estado['interrompido'] = True
+                                self.logger.error(f"❌ {nome}: {estado['falhas_seguidas']} falhas seguidas, "
+                                                  f"crawler do site interrompido (resultados incompletos)")
+                            continue
+                        estado['falhas_seguidas'] = 0
+                        
+                        if not anuncios:
+                            # Página vazia marca o fim; páginas posteriores já disparadas são ignoradas
+                            if estado['ultima'] is None or pagina - 1 < estado['ultima']:
+                                estado['ultima'] = pagina - 1
+                        if not anuncios or (estado['ultima'] is not None and pagina > estado['ultima']):
+                            # Fora dos resultados: nada a entregar, mas a página deixa de estar pendente
+                            if diario is not None:
+                                diario.concluir_pagina(nome, pagina, [])
+                            continue
+                        
+                        novos = []
+                        for anuncio in anuncios:
+                            chave = (nome, anuncio['id'])
+                            if chave in ids_vistos:
+                                continue
+                            ids_vistos.add(chave)
+                            novos.append(anuncio)
+                        if diario is not None:
+                            diario.concluir_pagina(nome, pagina, novos)
+                        
+                        estado['anuncios'] += len(novos)
+                        yield from novos
+            finally:
+                # Interrompido pelo consumidor: não baixar as páginas ainda na fila
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        for nome, estado in estados.items():
+            self.logger.info(f"{nome}: {estado['anuncios']} anúncios em {max(estado['ultima'] or 0, 0)} páginas")
+            if estado['falhas']:
+                self.logger.warning(f"⚠️ {nome}: {len(estado['falhas'])} página(s) com falha: "
+                                    f"{sorted(estado['falhas'])}")
+    
+    @staticmethod
+    def _url_pagina(site: Dict, pagina: int, bairro: Optional[str] = None) -> str:
+        parametros = {}
+        if bairro:
+            parametros[site['parametro_bairro']] = bairro
+        if pagina > 1:
+            parametros[site['parametro_pagina']] = pagina
+        if not parametros:
+            return site['url']
+        return f"{site['url']}?{urllib.parse.urlencode(parametros)}"
+    
+    def _baixar_pagina_anuncios(self, site: Dict, pagina: int, bairro: Optional[str] = None) -> List[Dict]:
+        """
+        Baixa uma página de resultados do marketplace (opcionalmente filtrada
+        por bairro) e extrai seus anúncios
+        
+        Só devolve [] para uma página baixada com sucesso e sem anúncios (o fim
+        dos resultados); status diferente de 200, timeout ou erro de conexão
+        levantam exceção, para que quem chama não confunda falha com fim.
+        """
+        # As threads do crawler só baixam anúncios: as métricas vão para essa fonte
+        self._contexto.fonte = 'anuncios_imobiliarios'
+        
+        url = self._url_pagina(site, pagina, bairro)
+        response = self._get(url, timeout=15)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        return self._extrair_anuncios_com_fallback(response.content, site, url, pagina)
+    
+    def _extrair_anuncios_com_fallback(self, conteudo: bytes, site: Dict, url_pagina: str, pagina: int) -> List[Dict]:
+        """
+        Extrai os anúncios do HTML estático e só renderiza a página no pool de
+        Chrome quando ela é uma casca de JavaScript: sem cartões e sem o
+        contêiner de resultados. Uma página de resultados vazia (o fim da
+        listagem) é devolvida como está, sem render
+        """
+        extraido = self._extrair(conteudo, self._especificacao_anuncios(site))
+        anuncios = self._anuncios_dos_cartoes(extraido['anuncios'], site, url_pagina, pagina)
+        if anuncios or extraido.get('resultados'):
+            return anuncios
+        
+        renderizado = self.renderizar_pagina(url_pagina, site['seletor'])
+        if renderizado is None:
+            return []
+        if self.arquivo_bruto is not None:
+            self._arquivar(url_pagina, renderizado, metodo='RENDER', tipo_conteudo='text/html; charset=utf-8')
+        return self._extrair_anuncios(renderizado, site, url_pagina, pagina)
+    
+    def _extrair_anuncios(self, conteudo: bytes, site: Dict, url_pagina: str, pagina: int) -> List[Dict]:
+        """
+        Converte os cartões de anúncio da página em registros estruturados
+        """
+        return self._anuncios_dos_cartoes(self._extrair(conteudo, self._especificacao_anuncios(site))['anuncios'],
+                                          site, url_pagina, pagina)
+    
+    @staticmethod
+    def _especificacao_anuncios(site: Dict) -> Dict[str, Dict]:
+        especificacao = {'anuncios': {'itens': site['seletor'], 'campos': site['campos'], 'descartar': True}}
+        if site.get('seletor_resultados'):
+            # Presença do contêiner de resultados: distingue a página vazia da casca de JavaScript
+            especificacao['resultados'] = {'itens': site['seletor_resultados'], 'campos': {}, 'limite': 1}
+        return especificacao
+    
+    @classmethod
+    def _anuncios_dos_cartoes(cls, cartoes: List[Dict], site: Dict, url_pagina: str, pagina: int) -> List[Dict]:
+        anuncios = []
+        for campos in cartoes:
+            url = urllib.parse.urljoin(url_pagina, campos['url']) if campos.get('url') else None
+            anuncio = cls._normalizar_anuncio(site['nome'], campos, url, campos.get('id'))
+            anuncio['pagina'] = pagina
+            anuncios.append(anuncio)
+        return anuncios
+    
+    @classmethod
+    def _normalizar_anuncio(cls, site: str, campos: Dict[str, Optional[str]],
+                            url: Optional[str], id_anuncio: Optional[str] = None) -> Dict:
+        """
+        Converte os textos extraídos de um cartão em um registro tipado
+        """
+        titulo = campos.get('titulo')
+        endereco = campos.get('endereco')
+        
+        if not id_anuncio and url:
+            encontrado = re.search(r'id-(\d+)', url)
+            id_anuncio = encontrado.group(1) if encontrado else hashlib.sha1(url.encode()).hexdigest()[:16]
+        
+        # "Rua X, 123 - Ponta Verde, Maceió - AL" ou "Apartamento ... em Ponta Verde, Maceió"
+        bairro = None
+        if endereco and ' - ' in endereco:
+            bairro = endereco.split(' - ')[1].split(',')[0].strip()
+        elif titulo and ' em ' in titulo:
+            bairro = titulo.rsplit(' em ', 1)[1].split(',')[0].strip()
+        
+        # O seletor alternativo do condomínio cobre o bloco de preço inteiro
+        condominio = campos.get('condominio')
+        if condominio and 'cond' in condominio.lower():
+            encontrado = re.search(r'Cond\w*\.?\s*R\$\s*([\d.,]+)', condominio, re.IGNORECASE)
+            condominio = encontrado.group(1) if encontrado else None
+        elif condominio == campos.get('preco') or (condominio and condominio.count('R$') > 1):
+            condominio = None
+        
+        return {
+            'id': id_anuncio,
+            'site': site,
+            'titulo': titulo,
+            'endereco': endereco,
+            'bairro': bairro,
+            'preco': cls._numero_brasileiro(campos.get('preco')),
+            'condominio': cls._numero_brasileiro(condominio),
+            'area_m2': cls._numero_brasileiro(campos.get('area_m2')),
+            'quartos': cls._numero_brasileiro(campos.get('quartos')),
+            'url': url,
+            'data_coleta': datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def _numero_brasileiro(texto: Optional[str]) -> Optional[float]:
+        """
+        Extrai o primeiro número de textos como "R$ 450.000" ou "72,5 m²"
+        """
+        if not texto:
+            return None
+        encontrado = re.search(r'\d[\d.]*(,\d+)?', texto)
+        if not encontrado:
+            return None
+        return float(encontrado.group(0).replace('.', '').replace(',', '.'))
+    
+    def planejar_unidades_anuncios(self, fila: FilaTrabalho, max_paginas: int, bairros: Optional[List[str]] = None,
+                                   paginas_por_unidade: int = 5) -> int:
+        """
+        Divide o crawl dos marketplaces em unidades (site, bairro, faixa de
+        páginas) e as acrescenta à fila; retorna quantas unidades são novas
+        
+        Sem bairros, cada site é percorrido na listagem da cidade inteira.
+        """
+        unidades = []
+        for site in self.sites_imobiliarios:
+            for bairro in bairros or [None]:
+                grupo = f"{site['nome']}|{bairro or '*'}"
+                for inicio in range(1, max_paginas + 1, paginas_por_unidade):
+                    fim = min(inicio + paginas_por_unidade - 1, max_paginas)
+                    unidades.append({
+                        'chave': f"{grupo}|{inicio}-{fim}",
+                        'grupo': grupo,
+                        'ordem': inicio,
+                        'dados': {'site': site['nome'], 'bairro': bairro, 'pagina_inicial': inicio, 'pagina_final': fim}
+                    })
+        
+        novas = fila.enfileirar(unidades)
+        self.logger.info(f"🧮 {novas} unidades de crawl enfileiradas ({len(unidades) - novas} já existiam)")
+        return novas
+    
+    def trabalhar_fila(self, fila: FilaTrabalho, trabalhador: Optional[str] = None, esperar: bool = True,
+                       intervalo_espera: float = 5.0, max_unidades: Optional[int] = None) -> Dict[str, int]:
+        """
+        Modo trabalhador: reivindica unidades da fila até ela esvaziar, grava
+        os anúncios de cada unidade no dataset Parquet e a marca como concluída
+        
+        Com esperar=True o trabalhador só termina quando nenhuma unidade está
+        pendente ou em andamento em outro processo, para poder reivindicar as
+        de leases que expirarem e as que saírem do backoff depois de uma falha.
+        Com esperar=False ele para assim que nada estiver disponível na hora.
+        """
+        trabalhador = trabalhador or f"{socket.gethostname()}:{os.getpid()}"
+        sites = {site['nome']: site for site in self.sites_imobiliarios}
+        estatisticas = {'unidades': 0, 'paginas': 0, 'anuncios': 0, 'falhas': 0}
+        self.logger.info(f"👷 Trabalhador {trabalhador} iniciado")
+        
+        while max_unidades is None or estatisticas['unidades'] < max_unidades:
+            unidade = fila.reivindicar(trabalhador)
+            if unidade is None:
+                if not esperar or fila.restantes() == 0:
+                    break
+                time.sleep(intervalo_espera)
+                continue
+            
+            try:
+                resultado = self._processar_unidade_anuncios(unidade, sites[unidade['dados']['site']], fila, trabalhador)
+            except Exception as e:
+                fila.falhar(unidade, trabalhador, str(e))
+                estatisticas['falhas'] += 1
+                self.logger.error(f"Erro na unidade {unidade['chave']} (tentativa {unidade['tentativas']}): {e}")
+                continue
+            
+            if resultado is None or not fila.concluir(unidade, trabalhador, resultado):
+                self.logger.warning(f"Lease de {unidade['chave']} perdido: a unidade ficou com outro trabalhador")
+                continue
+            if resultado['ultima_pagina'] is not None:
+                fila.descartar_grupo(unidade['grupo'], unidade['ordem'])
+            
+            estatisticas['unidades'] += 1
+            estatisticas['paginas'] += resultado['paginas']
+            estatisticas['anuncios'] += resultado['anuncios']
+        
+        self.logger.info(f"👷 Trabalhador {trabalhador}: {estatisticas['unidades']} unidades, "
+                         f"{estatisticas['paginas']} páginas, {estatisticas['anuncios']} anúncios")
+        return estatisticas
+    
+    def _processar_unidade_anuncios(self, unidade: Dict, site: Dict, fila: FilaTrabalho,
+                                    trabalhador: str) -> Optional[Dict]:
+        """
+        Baixa as páginas da unidade renovando o lease a cada página; só uma
+        página de resultados vazia encerra a série. Uma falha de download
+        levanta a exceção, e trabalhar_fila devolve a unidade à fila até
+        `max_tentativas`. Retorna None se o lease foi perdido (nada é gravado)
+        """
+        dados = unidade['dados']
+        anuncios = []
+        paginas = 0
+        ultima_pagina = None
+        
+        for pagina in range(dados['pagina_inicial'], dados['pagina_final'] + 1):
+            encontrados = self._baixar_pagina_anuncios(site, pagina, dados['bairro'])
+            if not encontrados:
+                ultima_pagina = pagina - 1
+                break
+            anuncios.extend(encontrados)
+            paginas += 1
+            if not fila.renovar(unidade, trabalhador):
+                return None
+        
+        self.armazem.gravar('anuncios_imobiliarios', anuncios)
+        self.obter_rollups().atualizar(anuncios)
+        return {'paginas': paginas, 'anuncios': len(anuncios), 'ultima_pagina': ultima_pagina}
+    
+    def exportar_anuncios(self, anuncios: Iterable[Dict], caminho: Optional[str] = None,
+                          formato: str = 'csv', tamanho_lote: int = 5000) -> int:
+        """
+        Grava os anúncios à medida que são gerados; retorna o total gravado
+        
+        Em formato='parquet' os anúncios vão para o dataset em lotes de
+        `tamanho_lote`, cada lote um arquivo na partição do dia. Nos dois
+        formatos os agregados de tendências são atualizados a cada lote.
+        """
+        anuncios = self.obter_rollups().repassar(anuncios, tamanho_lote)
+        if formato == 'parquet':
+            total = 0
+            lote = []
+            coletado_em = datetime.now()
+            for anuncio in anuncios:
+                lote.append(anuncio)
+                if len(lote) >= tamanho_lote:
+                    self.armazem.gravar('anuncios_imobiliarios', lote, coletado_em)
+                    total += len(lote)
+                    lote = []
+            if lote:
+                self.armazem.gravar('anuncios_imobiliarios', lote, coletado_em)
+                total += len(lote)
+            self.logger.info(f"🏠 {total} anúncios acrescentados ao dataset Parquet")
+            return total
+        
+        if caminho is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            caminho = os.path.join(self.data_dir, f'anuncios_maceio_{timestamp}.csv')
+        
+        total = 0
+        with open(caminho, 'w', encoding='utf-8-sig', newline='') as f:
+            escritor = None
+            for anuncio in anuncios:
+                if escritor is None:
+                    escritor = csv.DictWriter(f, fieldnames=list(anuncio.keys()))
+                    escritor.writeheader()
+                escritor.writerow(anuncio)
+                total += 1
+        
+        self.logger.info(f"🏠 {total} anúncios salvos: {caminho}")
+        return total
+    
+    def deduplicar_anuncios(self, anuncios, faixa_area: float = 10.0, limiar: float = 0.85) -> pd.DataFrame:
+        """
+        Identifica anúncios repetidos entre marketplaces e corretores e agrupa
+        os anúncios por prédio (ver DeduplicadorAnuncios)
+        """
+        tabela = anuncios if isinstance(anuncios, pd.DataFrame) else pd.DataFrame(list(anuncios))
+        deduplicador = DeduplicadorAnuncios(faixa_area=faixa_area, limiar=limiar)
+        
+        inicio = time.perf_counter()
+        resultado = deduplicador.deduplicar(tabela)
+        estatisticas = deduplicador.estatisticas
+        self.logger.info(f"🧩 Deduplicação: {estatisticas['anuncios']} anúncios -> {estatisticas['clusters']} imóveis "
+                         f"em {estatisticas['predios']} prédios ({estatisticas['pares_comparados']} pares comparados "
+                         f"em {estatisticas['blocos']} blocos, {time.perf_counter() - inicio:.2f}s)")
+        return resultado
+    
+    def coletar_todos_dados_reais(self, concorrente: bool = False, diario: Optional[DiarioColeta] = None,
+                                  fontes: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """
+        Coleta dados REAIS de todas as fontes disponíveis (ou só das listadas em `fontes`)
+        
+        Com concorrente=True todas as fontes são disparadas ao mesmo tempo,
+        cada uma limitada pelo seu prazo em self.prazos_fontes. Com um diário,
+        cada fonte concluída é gravada nele e as já concluídas numa execução
+        interrompida são relidas do disco em vez de coletadas de novo.
+        """
+        self.logger.info("🚀 Iniciando coleta COMPLETA de dados REAIS...")
+        
+        data_coleta = datetime.now().isoformat()
+        observacoes = []
+        self.metricas = MetricasColeta()
+        fontes = self._fontes_com_diario(self.fontes_coleta(fontes), diario, observacoes)
+        
+        if concorrente and fontes:
+            dados_completos = self._coletar_fontes_concorrente(observacoes, fontes)
+        else:
+            dados_completos = {nome: self._executar_fonte(nome, funcao) for nome, funcao in fontes.items()}
+        
+        dados_completos['metadados'] = self._montar_metadados(dados_completos, data_coleta, observacoes)
+        
+        metadados = dados_completos['metadados']
+        self.logger.info(f"✅ Coleta concluída: {metadados['fontes_ativas']} fontes ativas, {metadados['total_registros']} registros")
+        
+        if self.cache_http is not None:
+            self.logger.info(f"🗄️ Cache HTTP: {self.cache_http.resumo()}")
+        
+        return dados_completos
+    
+    def coletar_em_stream(self, compressao: Optional[str] = None, concorrente: bool = False,
+                          incluir_anuncios: bool = False, max_paginas: Optional[int] = None,
+                          diario: Optional[DiarioColeta] = None, fontes: Optional[List[str]] = None) -> Dict:
+        """
+        Coleta as fontes (todas ou as listadas em `fontes`) gravando cada registro no NDJSON da sua fonte
+        assim que é produzido; nada da coleta fica acumulado em memória
+        
+        Retorna os metadados, com a contagem e o arquivo de cada fonte. O
+        diário tem o mesmo papel que em coletar_todos_dados_reais e no crawler.
+        """
+        self.logger.info("🚀 Iniciando coleta em streaming (NDJSON)...")
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        diretorio = os.path.join(self.data_dir, f'ndjson_{timestamp}')
+        os.makedirs(diretorio, exist_ok=True)
+        
+        observacoes = []
+        fontes = self._fontes_com_diario(self.fontes_coleta(fontes), diario, observacoes)
+        if incluir_anuncios:
+            fontes['anuncios_imobiliarios'] = lambda: self.obter_rollups().repassar(
+                self.crawler_anuncios(max_paginas=max_paginas, diario=diario))
+        
+        metadados = {
+            'data_coleta': datetime.now().isoformat(),
+            'fontes_ativas': 0,
+            'total_registros': 0,
+            'registros_por_fonte': {nome: 0 for nome in fontes},
+            'arquivos': {},
+            'observacoes': observacoes
+        }
+        lock = threading.Lock()
+        self.metricas = MetricasColeta()
+        
+        def gravar_fonte(nome: str, funcao: Callable[[], Iterable[Dict]]) -> None:
+            self._contexto.fonte = nome
+            inicio = time.perf_counter()
+            with EscritorNDJSON(os.path.join(diretorio, nome), compressao) as escritor:
+                metadados['arquivos'][nome] = escritor.caminho
+                try:
+                    for registro in funcao():
+                        escritor.escrever(registro)
+                        with lock:
+                            metadados['registros_por_fonte'][nome] += 1
+                            metadados['total_registros'] += 1
+                except Exception as e:
+                    metadados['observacoes'].append(f"{nome}: interrompida ({e})")
+                    self.logger.error(f"Erro na fonte {nome} durante a coleta em streaming: {e}")
+            self.metricas.registrar_fonte(nome, time.perf_counter() - inicio, metadados['registros_por_fonte'][nome])
+            self._contexto.fonte = None
+        
+        if concorrente and fontes:
+            with ThreadPoolExecutor(max_workers=len(fontes), thread_name_prefix='fonte') as executor:
+                for futuro in [executor.submit(gravar_fonte, nome, funcao) for nome, funcao in fontes.items()]:
+                    futuro.result()
+        else:
+            for nome, funcao in fontes.items():
+                gravar_fonte(nome, funcao)
+        
+        metadados['fontes_ativas'] = sum(1 for total in metadados['registros_por_fonte'].values() if total)
+        metadados['desempenho'] = self.metricas.resumo()
+        self._gravar_json_atomico(os.path.join(diretorio, 'metadados.json'), metadados)
+        
+        self.logger.info(f"✅ Coleta em streaming concluída: {metadados['fontes_ativas']} fontes ativas, "
+                         f"{metadados['total_registros']} registros em {diretorio}")
+        
+        # O relatório relê só as primeiras linhas de cada arquivo
+        amostra = {nome: list(islice(ler_ndjson(metadados['arquivos'][nome]), 3)) for nome in fontes}
+        amostra['metadados'] = metadados
+        self.gerar_relatorio_detalhado_real(amostra, timestamp)
+        
+        return metadados
+    
+    def _coletar_fontes_concorrente(self, observacoes: List[str],
+                                    fontes: Optional[Dict[str, Callable[[], List[Dict]]]] = None) -> Dict[str, List[Dict]]:
+        """
+        Executa todas as fontes em paralelo, cada uma com prazo e cancelamento próprios
+        """
+        fontes = fontes or self.fontes_coleta()
+        inicio = time.monotonic()
+        cancelamentos = {nome: threading.Event() for nome in fontes}
+        
+        executor = ThreadPoolExecutor(max_workers=len(fontes), thread_name_prefix='fonte')
+        futuros = {
+            nome: executor.submit(self._executar_fonte, nome, funcao,
+                                  inicio + self.prazos_fontes.get(nome, 30), cancelamentos[nome])
+            for nome, funcao in fontes.items()
+        }
+        
+        resultados = {}
+        try:
+            for nome, futuro in futuros.items():
+                restante = inicio + self.prazos_fontes.get(nome, 30) - time.monotonic()
+                try:
+                    resultados[nome] = futuro.result(timeout=max(restante, 0))
+                except FuturesTimeoutError:
+                    cancelamentos[nome].set()
+                    futuro.cancel()
+                    resultados[nome] = []
+                    observacoes.append(f"{nome}: prazo de {self.prazos_fontes.get(nome, 30)}s excedido")
+                    self.logger.warning(f"⏱️ Fonte {nome} excedeu o prazo e foi cancelada")
+                except Exception as e:
+                    resultados[nome] = []
+                    observacoes.append(f"{nome}: erro inesperado ({e})")
+                    self.logger.error(f"Erro inesperado na fonte {nome}: {e}")
+        finally:
+            # Fontes atrasadas já foram sinalizadas; não bloquear esperando por elas
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return resultados
+    
+    def _fontes_com_diario(self, fontes: Dict[str, Callable[[], List[Dict]]], diario: Optional[DiarioColeta],
+                           observacoes: List[str]) -> Dict[str, Callable[[], List[Dict]]]:
+        """
+        Troca as fontes já concluídas no diário pela leitura do disco e faz as
+        demais gravarem seus registros no diário ao terminar
+        
+        Fontes que terminam sem registros ou com exceção são registradas como
+        falhas, não como concluídas: como as fontes devolvem [] em caso de
+        erro, elas são tentadas de novo na retomada.
+        """
+        if diario is None:
+            return dict(fontes)
+        
+        def com_diario(nome: str, funcao: Callable[[], List[Dict]]) -> Callable[[], List[Dict]]:
+            def executar() -> List[Dict]:
+                try:
+                    registros = funcao()
+                except Exception as e:
+                    diario.fonte_falhou(nome, str(e))
+                    raise
+                if registros:
+                    diario.concluir_fonte(nome, registros)
+                else:
+                    diario.fonte_falhou(nome, 'nenhum registro')
+                return registros
+            return executar
+        
+        envolvidas = {}
+        for nome, funcao in fontes.items():
+            if diario.fonte_concluida(nome):
+                self.logger.info(f"♻️ {nome}: {diario.fontes_concluidas[nome]} registros retomados do diário")
+                observacoes.append(f"{nome}: retomada de coleta interrompida")
+                envolvidas[nome] = lambda nome=nome: diario.carregar_fonte(nome)
+            else:
+                envolvidas[nome] = com_diario(nome, funcao)
+        return envolvidas
+    
+    def _executar_fonte(self, nome: str, funcao: Callable[[], List[Dict]],
+                        prazo: Optional[float] = None, cancelar: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        Executa uma fonte registrando nome, prazo e evento de cancelamento na
+        thread atual, e mede sua duração
+        """
+        self._contexto.fonte = nome
+        self._contexto.prazo = prazo
+        self._contexto.cancelar = cancelar
+        inicio = time.perf_counter()
+        registros = []
+        try:
+            registros = funcao()
+            return registros
+        finally:
+            self.metricas.registrar_fonte(nome, time.perf_counter() - inicio, len(registros))
+            self._contexto.__dict__.clear()
+    
+    def exportar_metricas(self, formato: str = 'json') -> str:
+        """
+        Exporta as métricas da última coleta em <data_dir>/metricas/: JSON ou
+        textfile do Prometheus (coletado pelo node_exporter via --collector.textfile.directory)
+        """
+        diretorio = os.path.join(self.data_dir, 'metricas')
+        os.makedirs(diretorio, exist_ok=True)
+        
+        if formato == 'prometheus':
+            caminho = os.path.join(diretorio, 'maceio_coleta.prom')
+            self.metricas.exportar_prometheus(caminho)
+        else:
+            caminho = os.path.join(diretorio, f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            self.metricas.exportar_json(caminho)
+        
+        self.logger.info(f"⏱️ Métricas de desempenho exportadas: {caminho}")
+        return caminho
+    
+    def _montar_metadados(self, dados: Dict[str, List[Dict]], data_coleta: str,
+                          observacoes: Optional[List[str]] = None) -> Dict:
+        """
+        Calcula as estatísticas do bloco de metadados a partir dos dados coletados
+        """
+        total_registros = 0
+        fontes_ativas = 0
+        
+        for fonte, registros in dados.items():
+            if fonte != 'metadados' and registros:
+                fontes_ativas += 1
+                total_registros += len(registros)
         
-        return dados_transparencia
+        return {
+            'data_coleta': data_coleta,
+            'fontes_ativas': fontes_ativas,
+            'total_registros': total_registros,
+            'observacoes': observacoes or [],
+            'desempenho': self.metricas.resumo()
+        }
     
-    def buscar_dados_cartorio_real(self) -> List[Dict]:
+    def chave_registro(self, fonte: str, registro: Dict) -> str:
         """
-        Busca dados de cartórios reais de Maceió
+        Chave estável do registro; sem campos de chave usa o hash do conteúdo
         """
-        self.logger.info("Buscando dados de cartórios reais...")
-        dados_cartorio = []
+        campos = self.CHAVES_REGISTRO.get(fonte, [])
+        valores = [str(registro.get(campo) or '') for campo in campos]
+        if any(valores):
+            return '|'.join(valores)
+        return self.hash_registro(registro)
+    
+    def hash_registro(self, registro: Dict) -> str:
+        """
+        Hash do conteúdo do registro, ignorando campos voláteis
+        """
+        estavel = {chave: valor for chave, valor in registro.items() if chave not in self.CAMPOS_VOLATEIS}
+        serializado = json.dumps(estavel, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(serializado.encode('utf-8')).hexdigest()[:32]
+    
+    def _indexar_registros(self, fonte: str, registros: List[Dict]) -> Dict[str, Dict]:
+        """
+        Indexa os registros da fonte pela chave, desambiguando chaves repetidas
+        """
+        indexados = {}
+        for registro in registros:
+            chave = self.chave_registro(fonte, registro)
+            base, n = chave, 1
+            while chave in indexados:
+                n += 1
+                chave = f"{base}#{n}"
+            indexados[chave] = registro
+        return indexados
+    
+    def salvar_incremental(self, dados: Dict[str, List[Dict]]) -> Dict:
+        """
+        Compara a coleta com o snapshot anterior e grava apenas os registros
+        adicionados, alterados e removidos, atualizando o manifesto
         
-        try:
-            # Lista de cartórios reais de Maceió
-            cartorios_maceio = [
-                {
-                    'nome': '1º Ofício de Registro de Imóveis de Maceió',
-                    'endereco': 'Rua do Livramento, 138 - Centro',
-                    'telefone': '(82) 3221-8244',
-                    'responsavel': 'Cartório Real',
-                    'servicos': ['Registro de Imóveis', 'Certidões', 'Escrituras']
-                },
-                {
-                    'nome': '2º Ofício de Registro de Imóveis de Maceió',
-                    'endereco': 'Av. Fernandes Lima - Farol',
-                    'telefone': '(82) 3221-XXXX',
-                    'responsavel': 'Cartório Real',
-                    'servicos': ['Registro de Imóveis', 'Certidões']
-                }
-            ]
+        As fontes devolvem [] quando falham; uma fonte vazia é tratada como
+        ausente e mantém o último estado conhecido, em vez de gerar um delta
+        que remove todos os seus registros.
+        """
+        diretorio = os.path.join(self.data_dir, 'incremental')
+        os.makedirs(diretorio, exist_ok=True)
+        arquivo_hashes = os.path.join(diretorio, 'estado_hashes.json')
+        arquivo_manifesto = os.path.join(diretorio, 'manifesto.json')
+        
+        hashes_anteriores = self._ler_json(arquivo_hashes, {})
+        manifesto = self._ler_json(arquivo_manifesto, {'versao': 1, 'snapshots': []})
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        delta = {'timestamp': timestamp, 'fontes': {}}
+        hashes_atuais = {}
+        contagem = {'adicionados': 0, 'alterados': 0, 'removidos': 0}
+        
+        for fonte, registros in dados.items():
+            if fonte == 'metadados':
+                continue
             
-            # Tentar acessar o site do CNR (Central Nacional de Registros)
-            url_cnr = "https://www.cnr.org.br/"
+            anteriores = hashes_anteriores.get(fonte, {})
+            if not registros:
+                if anteriores:
+                    self.logger.warning(f"⚠️ {fonte}: coleta sem registros, mantendo os {len(anteriores)} "
+                                        f"do último snapshot")
+                continue
             
-            try:
-                response = self.session.get(url_cnr, timeout=10)
-                if response.status_code == 200:
-                    self.logger.info("Acesso ao CNR realizado - fonte de dados cartoriais disponível")
-                    
-                    cnr_info = {
-                        'fonte': 'CNR - Central Nacional de Registros',
-                        'url': url_cnr,
-                        'servicos_disponiveis': ['Consulta de Imóveis', 'Certidões Online'],
-                        'abrangencia': 'Nacional',
-                        'status': 'ativo'
-                    }
-                    dados_cartorio.append(cnr_info)
+            atuais = {}
+            mudancas = {'adicionados': {}, 'alterados': {}, 'removidos': []}
             
-            except Exception as e:
-                self.logger.warning(f"CNR não acessível: {e}")
+            for chave, registro in self._indexar_registros(fonte, registros).items():
+                atuais[chave] = self.hash_registro(registro)
+                if chave not in anteriores:
+                    mudancas['adicionados'][chave] = registro
+                elif anteriores[chave] != atuais[chave]:
+                    mudancas['alterados'][chave] = registro
             
-            # Adicionar informações dos cartórios locais
-            dados_cartorio.extend(cartorios_maceio)
+            mudancas['removidos'] = [chave for chave in anteriores if chave not in atuais]
+            hashes_atuais[fonte] = atuais
             
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar dados de cartórios: {e}")
+            if any(mudancas.values()):
+                delta['fontes'][fonte] = mudancas
+                for tipo in contagem:
+                    contagem[tipo] += len(mudancas[tipo])
         
-        return dados_cartorio
+        # Fontes que sumiram da coleta ou vieram vazias mantêm o último estado conhecido
+        for fonte, anteriores in hashes_anteriores.items():
+            hashes_atuais.setdefault(fonte, anteriores)
+        
+        arquivo_delta = None
+        if delta['fontes']:
+            arquivo_delta = f'delta_{timestamp}.json'
+            n = 1
+            while os.path.exists(os.path.join(diretorio, arquivo_delta)):
+                n += 1
+                arquivo_delta = f'delta_{timestamp}_{n}.json'
+            delta['metadados'] = dados.get('metadados', {})
+            self._gravar_json_atomico(os.path.join(diretorio, arquivo_delta), delta)
+        
+        entrada = {
+            'timestamp': timestamp,
+            'arquivo_delta': arquivo_delta,
+            'total_registros': sum(len(h) for h in hashes_atuais.values()),
+            'metadados': dados.get('metadados', {}),
+            **contagem
+        }
+        manifesto['snapshots'].append(entrada)
+        
+        self._gravar_json_atomico(arquivo_hashes, hashes_atuais)
+        self._gravar_json_atomico(arquivo_manifesto, manifesto)
+        
+        self.logger.info(f"🧩 Snapshot incremental: +{contagem['adicionados']} ~{contagem['alterados']} "
+                         f"-{contagem['removidos']} ({arquivo_delta or 'sem mudanças'})")
+        return entrada
     
-    def buscar_dados_sites_imobiliarios_real(self) -> List[Dict]:
+    def reconstruir_snapshot(self, ate: Optional[str] = None) -> Dict[str, List[Dict]]:
         """
-        Busca dados REAIS de sites imobiliários com foco em Maceió
+        Reconstrói o estado completo aplicando os deltas em ordem, opcionalmente
+        até o timestamp informado (inclusive)
         """
-        self.logger.info("Buscando dados de sites imobiliários reais...")
-        dados_imoveis = []
-        
-        sites_reais = [
-            {
-                'nome': 'VivaReal',
-                'url': 'https://www.vivareal.com.br/venda/alagoas/maceio/apartamento/',
-                'seletor': 'article[data-testid="property-card"]'
-            },
-            {
-                'nome': 'ZapImóveis',
-                'url': 'https://www.zapimoveis.com.br/venda/apartamentos/al+maceio/',
-                'seletor': '[data-testid="listing-card"]'
-            }
-        ]
+        diretorio = os.path.join(self.data_dir, 'incremental')
+        manifesto = self._ler_json(os.path.join(diretorio, 'manifesto.json'), {'snapshots': []})
         
-        for site in sites_reais:
-            try:
-                self.logger.info(f"Processando {site['nome']}...")
-                
-                response = self.session.get(site['url'], timeout=15)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Contar total de resultados quando possível
-                    resultados = soup.find_all(['div', 'article', 'section'])
-                    imoveis_encontrados = 0
-                    
-                    for resultado in resultados[:10]:  # Limitar para análise
-                        texto = resultado.get_text().lower()
-                        if any(termo in texto for termo in ['apartamento', 'condomínio', 'edifício', 'maceió']):
-                            imoveis_encontrados += 1
-                    
-                    site_info = {
-                        'site': site['nome'],
-                        'url': site['url'],
-                        'status': 'acessivel',
-                        'imoveis_detectados': imoveis_encontrados,
-                        'data_acesso': datetime.now().isoformat(),
-                        'tipo': 'marketplace_imobiliario'
-                    }
-                    
-                    dados_imoveis.append(site_info)
-                    self.logger.info(f"{site['nome']}: {imoveis_encontrados} imóveis detectados")
-                
-                time.sleep(3)  # Rate limiting
-                
-            except Exception as e:
-                self.logger.warning(f"Erro ao processar {site['nome']}: {e}")
+        estado = {}
+        metadados = {}
+        for entrada in manifesto['snapshots']:
+            if ate is not None and entrada['timestamp'] > ate:
+                break
+            metadados = entrada.get('metadados', metadados)
+            if not entrada.get('arquivo_delta'):
                 continue
+            
+            delta = self._ler_json(os.path.join(diretorio, entrada['arquivo_delta']), {'fontes': {}})
+            for fonte, mudancas in delta['fontes'].items():
+                registros = estado.setdefault(fonte, {})
+                registros.update(mudancas['adicionados'])
+                registros.update(mudancas['alterados'])
+                for chave in mudancas['removidos']:
+                    registros.pop(chave, None)
         
-        return dados_imoveis
+        dados = {fonte: list(registros.values()) for fonte, registros in estado.items()}
+        for fonte in self.fontes_coleta():
+            dados.setdefault(fonte, [])
+        dados['metadados'] = metadados
+        return dados
     
-    def coletar_todos_dados_reais(self) -> Dict[str, List[Dict]]:
+    def salvar_parquet(self, dados: Dict[str, List[Dict]]) -> None:
         """
-        Coleta dados REAIS de todas as fontes disponíveis
+        Acrescenta cada fonte da coleta ao dataset Parquet
         """
-        self.logger.info("🚀 Iniciando coleta COMPLETA de dados REAIS...")
-        
-        dados_completos = {
-            'portal_cidadao_maceio': self.buscar_dados_portal_cidadao(),
-            'sefaz_maceio': self.buscar_dados_sefaz_maceio(),
-            'ibge_oficial': self.buscar_dados_ibge_real(),
-            'transparencia_alagoas': self.buscar_dados_transparencia_estado(),
-            'cartorios_reais': self.buscar_dados_cartorio_real(),
-            'sites_imobiliarios': self.buscar_dados_sites_imobiliarios_real(),
-            'metadados': {
-                'data_coleta': datetime.now().isoformat(),
-                'fontes_ativas': 0,
-                'total_registros': 0,
-                'observacoes': []
-            }
-        }
-        
-        # Calcular estatísticas
-        total_registros = 0
-        fontes_ativas = 0
-        
-        for fonte, dados in dados_completos.items():
-            if fonte != 'metadados' and dados:
-                fontes_ativas += 1
-                total_registros += len(dados)
-        
-        dados_completos['metadados']['fontes_ativas'] = fontes_ativas
-        dados_completos['metadados']['total_registros'] = total_registros
+        data_coleta = dados.get('metadados', {}).get('data_coleta')
+        coletado_em = datetime.fromisoformat(data_coleta) if data_coleta else datetime.now()
         
-        self.logger.info(f"✅ Coleta concluída: {fontes_ativas} fontes ativas, {total_registros} registros")
-        
-        return dados_completos
+        for fonte, registros in dados.items():
+            if fonte == 'metadados' or fonte not in ArmazemParquet.ESQUEMAS:
+                continue
+            caminho = self.armazem.gravar(fonte, registros, coletado_em)
+            if caminho:
+                self.logger.info(f"🧱 {fonte}: {len(registros)} registros em {caminho}")
+    
+    @staticmethod
+    def _ler_json(caminho: str, padrao):
+        """
+        Lê um JSON do disco, devolvendo o padrão quando o arquivo não existe
+        """
+        if not os.path.exists(caminho):
+            return padrao
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def _gravar_json_atomico(caminho: str, conteudo) -> None:
+        """
+        Grava JSON compacto em arquivo temporário e o move para o destino
+        """
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, separators=(',', ':'), default=str)
+        os.replace(temporario, caminho)
     
-    def salvar_dados_reais(self, dados: Dict[str, List[Dict]]) -> None:
+    def salvar_dados_reais(self, dados: Dict[str, List[Dict]], incremental: bool = False,
+                           formato: str = 'json') -> None:
         """
         Salva os dados REAIS coletados em múltiplos formatos
+        
+        Com incremental=True grava apenas o delta em relação à coleta anterior;
+        com formato='parquet' acrescenta a coleta ao dataset particionado no
+        lugar dos arquivos JSON/CSV
         """
+        if incremental:
+            self.salvar_incremental(dados)
+            return
+        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
+        if formato == 'parquet':
+            self.salvar_parquet(dados)
+            self.gerar_relatorio_detalhado_real(dados, timestamp)
+            return
+        
         # Salvar em JSON completo
         json_file = os.path.join(self.data_dir, f'dados_reais_condominios_maceio_{timestamp}.json')
         with open(json_file, 'w', encoding='utf-8') as f:
@@ -435,14 +4519,14 @@ class MaceioCondominiosScraperReal:
         self.logger.info(f"📄 Dados completos salvos: {json_file}")
         
         # Salvar dados do IBGE em CSV
-        if dados['ibge_oficial']:
+        if dados.get('ibge_oficial'):
             csv_ibge = os.path.join(self.data_dir, f'dados_ibge_maceio_{timestamp}.csv')
             df_ibge = pd.DataFrame(dados['ibge_oficial'])
             df_ibge.to_csv(csv_ibge, index=False, encoding='utf-8-sig')
             self.logger.info(f"📊 Dados IBGE salvos: {csv_ibge}")
         
         # Salvar dados de cartórios em CSV
-        if dados['cartorios_reais']:
+        if dados.get('cartorios_reais'):
             csv_cartorio = os.path.join(self.data_dir, f'cartorios_maceio_{timestamp}.csv')
             df_cartorio = pd.DataFrame(dados['cartorios_reais'])
             df_cartorio.to_csv(csv_cartorio, index=False, encoding='utf-8-sig')
@@ -469,13 +4553,14 @@ class MaceioCondominiosScraperReal:
             f.write(f"- **Total de Registros:** {metadados.get('total_registros', 0)}\n")
             f.write(f"- **Status:** Coleta realizada com sucesso\n\n")
             
-            # Detalhes por fonte
+            # Detalhes por fonte (na coleta em streaming só há amostras; a contagem vem dos metadados)
+            contagens = metadados.get('registros_por_fonte', {})
             for fonte, registros in dados.items():
                 if fonte == 'metadados':
                     continue
                     
                 f.write(f"## 🔍 {fonte.upper().replace('_', ' ')}\n\n")
-                f.write(f"**Registros encontrados:** {len(registros)}\n\n")
+                f.write(f"**Registros encontrados:** {contagens.get(fonte, len(registros))}\n\n")
                 
                 if registros:
                     f.write("**Principais dados:**\n")
@@ -493,6 +4578,26 @@ class MaceioCondominiosScraperReal:
                 else:
                     f.write("*Nenhum registro encontrado nesta fonte.*\n\n")
             
+            # Desempenho por fonte
+            desempenho = metadados.get('desempenho', {})
+            if desempenho:
+                f.write("## ⏱️ DESEMPENHO POR FONTE\n\n")
+                f.write("| Fonte | Requisições | Erros | p50 (ms) | p95 (ms) | KiB | Retentativas | Cache | Parse (ms) | Duração (ms) |\n")
+                f.write("|---|---|---|---|---|---|---|---|---|---|\n")
+                for fonte, m in desempenho.items():
+                    cache = ', '.join(f"{k}: {v}" for k, v in m['cache'].items()) or '-'
+                    f.write(f"| {fonte} | {m['requisicoes']} | {m['erros']} | {m['latencia_ms']['p50']} | "
+                            f"{m['latencia_ms']['p95']} | {m['bytes'] / 1024:.1f} | {m['retentativas']} | "
+                            f"{cache} | {m['parse_ms']} | {m['duracao_ms']} |\n")
+                f.write("\n")
+            
+            # Tendências dos anúncios, só quando já há agregados acumulados
+            if os.path.exists(os.path.join(self.data_dir, 'analise', 'rollups.sqlite3')):
+                secao = self._tendencias_markdown(dias=90)
+                if secao:
+                    f.write("## 📈 TENDÊNCIAS POR BAIRRO\n\n")
+                    f.write(secao)
+            
             # Instruções para próximos passos
             f.write("## 🚀 PRÓXIMOS PASSOS RECOMENDADOS\n\n")
             f.write("1. **Análise Detalhada:** Revisar os dados coletados para identificar padrões\n")
@@ -508,28 +4613,974 @@ class MaceioCondominiosScraperReal:
             f.write("- Dados sujeitos à disponibilidade das fontes\n\n")
         
         self.logger.info(f"📋 Relatório detalhado salvo: {relatorio_file}")
+    
+    @classmethod
+    def _sparkline(cls, valores: List[float]) -> str:
+        serie = pd.Series(valores, dtype=float)
+        if serie.notna().sum() == 0:
+            return ''
+        minimo, maximo = serie.min(), serie.max()
+        niveis = ((serie - minimo) / (maximo - minimo) * (len(cls.BLOCOS_SPARKLINE) - 1)
+                  if maximo > minimo else serie * 0 + len(cls.BLOCOS_SPARKLINE) // 2)
+        return ''.join(' ' if pd.isna(n) else cls.BLOCOS_SPARKLINE[int(round(n))] for n in niveis)
+    
+    def _tabelas_tendencias(self, dias: int) -> Dict:
+        """
+        Tabelas formatadas do relatório de tendências, montadas só a partir dos agregados
+        """
+        rollups = self.obter_rollups()
+        resumo = rollups.por_bairro(dias)
+        if resumo.empty:
+            return {}
+        
+        def moeda(valor: float) -> str:
+            return '-' if pd.isna(valor) else f"R$ {valor:,.0f}".replace(',', '.')
+        
+        def variacao(valor: float) -> str:
+            return '-' if pd.isna(valor) else f"{valor:+.1f}%"
+        
+        bairros = pd.DataFrame({
+            'Bairro': resumo.index,
+            'Anúncios/dia': resumo['anuncios_por_dia'].map(lambda v: f"{v:.1f}"),
+            'Var. anúncios': resumo['variacao_anuncios_por_dia'].map(variacao),
+            'R$/m²': resumo['preco_m2'].map(moeda),
+            'Var. R$/m²': resumo['variacao_preco_m2'].map(variacao),
+            'Condomínio médio': resumo['condominio_medio'].map(moeda),
+            'Var. condomínio': resumo['variacao_condominio_medio'].map(variacao),
+            'R$/m² por semana': resumo['serie_preco_m2'].map(self._sparkline)
+        })
+        
+        # Última semana de cada bairro × tipologia
+        serie = rollups.tendencias(dias)
+        ultima = serie[serie['periodo'] == serie['periodo'].max()].sort_values(['bairro', 'tipologia'])
+        tipologias = pd.DataFrame({
+            'Bairro': ultima['bairro'],
+            'Tipologia': ultima['tipologia'],
+            'Anúncios': ultima['anuncios'].astype(int),
+            'Preço médio': ultima['preco_medio'].map(moeda),
+            'R$/m²': ultima['preco_m2'].map(moeda),
+            'Desvio R$/m²': ultima['preco_m2_desvio'].map(moeda),
+            'Condomínio médio': ultima['condominio_medio'].map(moeda)
+        })
+        return {'bairros': bairros, 'tipologias': tipologias,
+                'semana': serie['periodo'].max().strftime('%d/%m/%Y')}
+    
+    @staticmethod
+    def _tabela_markdown(tabela: pd.DataFrame) -> str:
+        linhas = ["| " + " | ".join(tabela.columns) + " |", "|" + "---|" * len(tabela.columns)]
+        linhas += ["| " + " | ".join(str(valor) for valor in registro) + " |"
+                   for registro in tabela.itertuples(index=False, name=None)]
+        return "\n".join(linhas) + "\n\n"
+    
+    def _tendencias_markdown(self, dias: int) -> str:
+        tabelas = self._tabelas_tendencias(dias)
+        if not tabelas:
+            return ''
+        return (f"Últimos {dias} dias, por semana; variações da última semana sobre a anterior.\n\n"
+                + self._tabela_markdown(tabelas['bairros'])
+                + f"### Por tipologia (semana de {tabelas['semana']})\n\n"
+                + self._tabela_markdown(tabelas['tipologias']))
+    
+    def gerar_relatorio_tendencias(self, formato: str = 'md', dias: int = 90) -> Optional[str]:
+        """
+        Relatório de tendências (anúncios, R$/m² e condomínio por bairro e
+        tipologia) em Markdown ou HTML; lê só os agregados, não o histórico
+        """
+        tabelas = self._tabelas_tendencias(dias)
+        if not tabelas:
+            self.logger.warning("Sem agregados de anúncios para o relatório de tendências")
+            return None
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        caminho = os.path.join(self.data_dir, f'relatorio_tendencias_{timestamp}.{formato}')
+        titulo = "TENDÊNCIAS DOS ANÚNCIOS - MACEIÓ"
+        gerado_em = datetime.now().strftime('%d/%m/%Y às %H:%M:%S')
+        
+        with open(caminho, 'w', encoding='utf-8') as f:
+            if formato == 'html':
+                f.write(f"<!DOCTYPE html>\n<html lang=\"pt-BR\">\n<head>\n<meta charset=\"utf-8\">\n"
+                        f"<title>{titulo}</title>\n<style>\n"
+                        f"body {{ font-family: sans-serif; margin: 2em; }}\n"
+                        f"table {{ border-collapse: collapse; margin-bottom: 2em; }}\n"
+                        f"th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}\n"
+                        f"</style>\n</head>\n<body>\n<h1>{titulo}</h1>\n"
+                        f"<p><strong>Gerado em:</strong> {gerado_em}. Últimos {dias} dias, por semana; "
+                        f"variações da última semana sobre a anterior.</p>\n"
+                        f"<h2>📈 Por bairro</h2>\n{tabelas['bairros'].to_html(index=False)}\n"
+                        f"<h2>🏠 Por tipologia (semana de {tabelas['semana']})</h2>\n"
+                        f"{tabelas['tipologias'].to_html(index=False)}\n</body>\n</html>\n")
+            else:
+                f.write(f"# {titulo}\n\n**Gerado em:** {gerado_em}\n\n---\n\n## 📈 POR BAIRRO\n\n")
+                f.write(self._tendencias_markdown(dias))
+        
+        self.logger.info(f"📈 Relatório de tendências salvo: {caminho}")
+        return caminho
+    
+    def recalcular_tendencias(self) -> int:
+        """
+        Refaz os agregados do zero a partir do dataset Parquet e dos CSVs de
+        anúncios em data_dir, em ordem cronológica; é a única operação que
+        percorre o histórico inteiro
+        """
+        rollups = self.obter_rollups()
+        rollups.limpar()
+        
+        lotes = []
+        raiz = os.path.join(self.armazem.diretorio, 'fonte=anuncios_imobiliarios')
+        if os.path.isdir(raiz):
+            for particao in os.listdir(raiz):
+                if particao.startswith('data='):
+                    dia = particao[len('data='):]
+                    lotes.append((dia, lambda dia=dia: self.armazem.ler('anuncios_imobiliarios',
+                                                                          data_inicio=dia, data_fim=dia)))
+        for arquivo in os.listdir(self.data_dir):
+            correspondencia = re.fullmatch(r'anuncios_maceio_(\d{4})(\d{2})(\d{2})_\d{6}\.csv', arquivo)
+            if correspondencia:
+                dia = '-'.join(correspondencia.groups())
+                caminho = os.path.join(self.data_dir, arquivo)
+                lotes.append((dia, lambda caminho=caminho: pd.read_csv(caminho, encoding='utf-8-sig',
+                                                                       dtype={'id': str})))
+        
+        total = 0
+        for _, ler in sorted(lotes, key=lambda lote: lote[0]):
+            total += rollups.atualizar(ler())
+        self.logger.info(f"📈 Agregados de tendências recalculados: {total} anúncios em {len(lotes)} lotes")
+        return total
+    
+    def _lotes_arquivo(self, desde: Optional[str], ate: Optional[str], tamanho_lote: int) -> Iterator[List[Dict]]:
+        """
+        Capturas do arquivo bruto em lotes de no máximo tamanho_lote, sem misturar dias
+        """
+        lote, dia = [], None
+        for captura in self.arquivo_bruto.capturas(desde=desde, ate=ate):
+            dia_captura = datetime.fromtimestamp(captura['capturado_em']).date()
+            if lote and (dia_captura != dia or len(lote) >= tamanho_lote):
+                yield lote
+                lote = []
+            lote.append(captura)
+            dia = dia_captura
+        if lote:
+            yield lote
+    
+    def reprocessar_arquivo(self, destino: Optional[str] = None, desde: Optional[str] = None,
+                            ate: Optional[str] = None, processos: Optional[int] = None,
+                            tamanho_lote: int = 200) -> Dict:
+        """
+        Reinterpreta as respostas do arquivo bruto com os parsers atuais, sem
+        acessar a rede, e grava os registros em um dataset Parquet novo
+        
+        Os lotes são parseados em processos separados (processos=None usa
+        todos os núcleos) e gravados com o instante da sua primeira captura,
+        de modo que as partições por data reproduzem as das coletas originais.
+        desde e ate (AAAA-MM-DD, inclusivas) restringem o período.
+        """
+        if self.arquivo_bruto is None:
+            raise RuntimeError("Arquivo bruto desativado: não há respostas para reprocessar")
+        
+        destino = destino or os.path.join(self.data_dir, f"reprocessado_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        armazem = ArmazemParquet(destino)
+        processos = processos or os.cpu_count() or 1
+        diretorio = self.arquivo_bruto.diretorio
+        estatisticas = {'capturas': 0, 'reconhecidas': 0, 'erros': 0, 'lotes': 0, 'registros': {}}
+        
+        def gravar(lote: List[Dict], resultado: Dict) -> None:
+            coletado_em = datetime.fromtimestamp(lote[0]['capturado_em'])
+            for fonte, registros in resultado['registros'].items():
+                armazem.gravar(fonte, registros, coletado_em=coletado_em)
+                estatisticas['registros'][fonte] = estatisticas['registros'].get(fonte, 0) + len(registros)
+            estatisticas['capturas'] += len(lote)
+            estatisticas['reconhecidas'] += resultado['reconhecidas']
+            estatisticas['erros'] += resultado['erros']
+            estatisticas['lotes'] += 1
+        
+        inicio = time.perf_counter()
+        lotes = self._lotes_arquivo(desde, ate, tamanho_lote)
+        if processos == 1:
+            for lote in lotes:
+                gravar(lote, reinterpretar_lote(diretorio, lote, self.urls_reais, self.sites_imobiliarios))
+        else:
+            # No máximo dois lotes por processo em voo: o arquivo pode ter milhões de capturas
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+                pendentes = {}
+                for lote in lotes:
+                    futuro = executor.submit(reinterpretar_lote, diretorio, lote, self.urls_reais,
+                                             self.sites_imobiliarios)
+                    pendentes[futuro] = lote
+                    if len(pendentes) >= 2 * processos:
+                        concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                        for futuro in concluidos:
+                            gravar(pendentes.pop(futuro), futuro.result())
+                for futuro in list(pendentes):
+                    gravar(pendentes.pop(futuro), futuro.result())
+        
+        estatisticas['tempo'] = time.perf_counter() - inicio
+        estatisticas['destino'] = destino
+        self.logger.info(f"🗄️ Arquivo reprocessado: {estatisticas['capturas']} capturas "
+                         f"({estatisticas['reconhecidas']} reconhecidas, {estatisticas['erros']} erros) "
+                         f"em {estatisticas['tempo']:.1f}s com {processos} processos → {destino}")
+        return estatisticas
+
+class AgendadorColeta:
+    """
+    Modo daemon: cada fonte é coletada no seu próprio intervalo, com jitter,
+    por um pool de trabalhadores, e os registros vão para o dataset Parquet
+    
+    O estado (último sucesso, falhas seguidas, próxima execução) é gravado em
+    <data_dir>/agendador/estado.json após cada execução, de modo que um
+    reinício não recoleta fontes ainda dentro do intervalo. Fontes que falham
+    (exceção ou nenhum registro) são repetidas com backoff exponencial.
+    """
+    
+    # Fonte -> (intervalo em segundos, jitter relativo)
+    INTERVALOS = {
+        'portal_cidadao_maceio': (24 * 3600, 0.1),
+        'sefaz_maceio': (24 * 3600, 0.1),
+        'ibge_oficial': (30 * 24 * 3600, 0.1),
+        'agregados_ibge': (30 * 24 * 3600, 0.1),
+        'transparencia_alagoas': (24 * 3600, 0.1),
+        'cartorios_reais': (7 * 24 * 3600, 0.1),
+        'sites_imobiliarios': (3600, 0.2),
+        'anuncios_imobiliarios': (3600, 0.2)
+    }
+    
+    def __init__(self, scraper: 'MaceioCondominiosScraperReal', intervalos: Optional[Dict[str, tuple]] = None,
+                 trabalhadores: int = 3, incluir_anuncios: bool = False, max_paginas: Optional[int] = None,
+                 backoff_inicial: float = 60.0, backoff_maximo: float = 6 * 3600,
+                 metricas: Optional[str] = None, semente: Optional[int] = None):
+        """
+        intervalos sobrescreve entradas de INTERVALOS; metricas ('json' ou
+        'prometheus') exporta as métricas após cada execução
+        """
+        self.scraper = scraper
+        self.logger = scraper.logger
+        self.intervalos = {**self.INTERVALOS, **(intervalos or {})}
+        self.trabalhadores = trabalhadores
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.metricas = metricas
+        self._aleatorio = random.Random(semente)
+        
+        self.tarefas = self._montar_tarefas(incluir_anuncios, max_paginas)
+        
+        self.caminho_estado = os.path.join(scraper.data_dir, 'agendador', 'estado.json')
+        os.makedirs(os.path.dirname(self.caminho_estado), exist_ok=True)
+        salvo = scraper._ler_json(self.caminho_estado, {})
+        self.estado = {nome: self._carregar_estado(salvo.get(nome, {})) for nome in self.tarefas}
+        
+        self._lock = threading.Lock()
+        self._em_execucao = set()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+    
+    def _montar_tarefas(self, incluir_anuncios: bool, max_paginas: Optional[int]) -> Dict[str, Callable[[], int]]:
+        """
+        Cada tarefa coleta uma fonte, grava no dataset e retorna o total de registros
+        """
+        scraper = self.scraper
+        tarefas = {
+            nome: (lambda nome=nome, funcao=funcao: self._coletar_e_gravar(nome, funcao))
+            for nome, funcao in scraper.fontes_coleta().items()
+        }
+        tarefas['agregados_ibge'] = lambda: self._coletar_e_gravar(
+            'agregados_ibge', lambda: scraper.buscar_agregados_ibge().to_dict('records'))
+        if incluir_anuncios:
+            tarefas['anuncios_imobiliarios'] = lambda: self._crawler_e_gravar(max_paginas)
+        return tarefas
+    
+    def _coletar_e_gravar(self, nome: str, funcao: Callable[[], List[Dict]]) -> int:
+        prazo = time.monotonic() + self.scraper.prazos_fontes.get(nome, 30)
+        registros = self.scraper._executar_fonte(nome, funcao, prazo)
+        self.scraper.armazem.gravar(nome, registros)
+        return len(registros)
+    
+    def _crawler_e_gravar(self, max_paginas: Optional[int]) -> int:
+        inicio = time.perf_counter()
+        total = self.scraper.exportar_anuncios(self.scraper.crawler_anuncios(max_paginas=max_paginas),
+                                               formato='parquet')
+        self.scraper.metricas.registrar_fonte('anuncios_imobiliarios', time.perf_counter() - inicio, total)
+        return total
+    
+    @staticmethod
+    def _carregar_estado(salvo: Dict) -> Dict:
+        """
+        Estado em memória usa epoch; em disco os instantes ficam em ISO para leitura humana
+        """
+        def epoch(valor: Optional[str]) -> Optional[float]:
+            return datetime.fromisoformat(valor).timestamp() if valor else None
+        
+        return {
+            'ultimo_sucesso': epoch(salvo.get('ultimo_sucesso')),
+            'ultima_tentativa': epoch(salvo.get('ultima_tentativa')),
+            'proxima_execucao': epoch(salvo.get('proxima_execucao')) or 0.0,
+            'falhas_seguidas': salvo.get('falhas_seguidas', 0),
+            'registros': salvo.get('registros'),
+            'ultimo_erro': salvo.get('ultimo_erro')
+        }
+    
+    def _salvar_estado(self) -> None:
+        def iso(valor: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(valor).isoformat(timespec='seconds') if valor else None
+        
+        conteudo = {
+            nome: {**estado, **{campo: iso(estado[campo])
+                                for campo in ('ultimo_sucesso', 'ultima_tentativa', 'proxima_execucao')}}
+            for nome, estado in self.estado.items()
+        }
+        self.scraper._gravar_json_atomico(self.caminho_estado, conteudo)
+    
+    def _sortear(self, segundos: float, jitter: float) -> float:
+        return segundos * self._aleatorio.uniform(1 - jitter, 1 + jitter)
+    
+    def _executar_tarefa(self, nome: str) -> None:
+        """
+        Executa a tarefa e agenda a próxima: intervalo normal em caso de
+        sucesso, backoff exponencial (limitado ao intervalo) em caso de falha
+        """
+        inicio = time.time()
+        self.scraper.metricas.reiniciar_fonte(nome)
+        self.logger.info(f"⏰ Agendador: coletando {nome}...")
+        try:
+            registros = self.tarefas[nome]()
+            erro = None if registros else 'nenhum registro coletado'
+        except Exception as e:
+            registros, erro = 0, str(e)
+        
+        intervalo, jitter = self.intervalos[nome]
+        with self._lock:
+            estado = self.estado[nome]
+            estado['ultima_tentativa'] = inicio
+            if erro is None:
+                estado.update(ultimo_sucesso=time.time(), falhas_seguidas=0, registros=registros, ultimo_erro=None)
+                espera = intervalo
+            else:
+                estado['falhas_seguidas'] += 1
+                estado['ultimo_erro'] = erro
+                espera = min(self.backoff_inicial * 2 ** (estado['falhas_seguidas'] - 1),
+                             self.backoff_maximo, intervalo)
+            estado['proxima_execucao'] = time.time() + self._sortear(espera, jitter)
+            self._salvar_estado()
+            self._em_execucao.discard(nome)
+        
+        proxima = datetime.fromtimestamp(estado['proxima_execucao']).strftime('%d/%m %H:%M:%S')
+        if erro is None:
+            self.logger.info(f"✅ Agendador: {nome} com {registros} registros; próxima coleta em {proxima}")
+        else:
+            self.logger.warning(f"⚠️ Agendador: {nome} falhou ({erro}), "
+                                f"{estado['falhas_seguidas']} falha(s) seguida(s); nova tentativa em {proxima}")
+        
+        if self.metricas:
+            try:
+                self.scraper.exportar_metricas(self.metricas)
+            except Exception as e:
+                self.logger.warning(f"Erro ao exportar métricas do agendador: {e}")
+        self._acordar.set()
+    
+    def executar(self, duracao: Optional[float] = None) -> None:
+        """
+        Laço principal: dispara as tarefas vencidas e dorme até a próxima
+        vencer ou uma tarefa terminar. Roda até parar() ou, se informada,
+        até `duracao` segundos; as tarefas em andamento são aguardadas.
+        """
+        fim = None if duracao is None else time.time() + duracao
+        self._parar.clear()
+        self._em_execucao.clear()
+        self.logger.info(f"⏰ Agendador iniciado com {len(self.tarefas)} fontes e {self.trabalhadores} trabalhadores")
+        
+        executor = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix='agendador')
+        try:
+            while not self._parar.is_set():
+                agora = time.time()
+                if fim is not None and agora >= fim:
+                    break
+                
+                with self._lock:
+                    for nome, estado in self.estado.items():
+                        if nome not in self._em_execucao and estado['proxima_execucao'] <= agora:
+                            self._em_execucao.add(nome)
+                            executor.submit(self._executar_tarefa, nome)
+                    livres = [e['proxima_execucao'] for n, e in self.estado.items() if n not in self._em_execucao]
+                
+                espera = max(min(livres, default=agora + 3600) - agora, 0.0)
+                if fim is not None:
+                    espera = min(espera, fim - agora)
+                self._acordar.wait(espera)
+                self._acordar.clear()
+        finally:
+            # Tarefas ainda na fila continuam vencidas no estado e rodam no próximo início
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        self.logger.info("⏹️ Agendador encerrado")
+    
+    def parar(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+    
+    def resumo(self) -> Dict[str, Dict]:
+        """
+        Situação de cada fonte: último sucesso, falhas seguidas e próxima execução
+        """
+        with self._lock:
+            return {nome: dict(estado) for nome, estado in self.estado.items()}
+
+
+def reinterpretar_captura(captura: Dict, corpo: bytes, urls: Dict[str, str],
+                          sites: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Aplica à resposta arquivada o parser da página de origem (reconhecida
+    pela URL e, quando a mesma página serve a mais de uma tarefa, pela
+    fonte da captura) e devolve os registros por fonte do dataset; páginas
+    sem parser devolvem um dicionário vazio
+    """
+    scraper = MaceioCondominiosScraperReal
+    url = captura['url']
+    instante = datetime.fromtimestamp(captura['capturado_em']).isoformat()
+    partes = urllib.parse.urlsplit(url)
+    sem_consulta = urllib.parse.urlunsplit(partes._replace(query='', fragment=''))
+    parametros = dict(urllib.parse.parse_qsl(partes.query))
+    
+    for site in sites:
+        if sem_consulta == site['url'].split('?')[0]:
+            pagina = int(parametros.get(site['parametro_pagina'], 1))
+            cartoes = extrair_html(corpo, scraper._especificacao_anuncios(site))['anuncios']
+            anuncios = scraper._anuncios_dos_cartoes(cartoes, site, url, pagina)
+            if captura.get('fonte') == 'sites_imobiliarios':
+                # Primeira página baixada só para conferir o site (buscar_dados_sites_imobiliarios_real)
+                return {'sites_imobiliarios': [scraper._registro_site_imobiliario(site, len(anuncios), instante)]}
+            for anuncio in anuncios:
+                anuncio['data_coleta'] = instante
+            return {'anuncios_imobiliarios': anuncios}
+    
+    if sem_consulta == f"{urls['portal_cidadao']}1/ver_servico/69/unidade/ficha+cadastral+de+imoveis/":
+        extraido = extrair_html(corpo, ESPECIFICACOES_EXTRACAO['portal_cidadao_maceio'])
+        return {'portal_cidadao_maceio': scraper._registros_portal_cidadao(extraido)}
+    
+    if sem_consulta == f"{urls['portal_cidadao']}{scraper.CAMINHO_BUSCA_INSCRICAO}":
+        return {'sefaz_maceio': [scraper._registro_busca_inscricao(url)]}
+    
+    if sem_consulta == urls['transparencia_estado']:
+        extraido = extrair_html(corpo, ESPECIFICACOES_EXTRACAO['transparencia_alagoas'])
+        return {'transparencia_alagoas': scraper._registros_transparencia(extraido, url, instante)}
+    
+    if sem_consulta == urls['cnr']:
+        return {'cartorios_reais': scraper._registros_cartorios(url)}
+    
+    if sem_consulta == f"{urls['sefaz_maceio']}n/iptu2022/" and captura['metodo'] == 'GET':
+        extraido = extrair_html(corpo, ESPECIFICACOES_EXTRACAO['sefaz_maceio'])
+        return {'sefaz_maceio': [scraper._registro_sistema_iptu(extraido, url)]}
+    
+    if url.startswith(urls['sefaz_maceio']):
+        # Consulta do IPTU: a inscrição está no corpo do POST ou na query string do GET
+        dados = dict(urllib.parse.parse_qsl(captura['requisicao'] or '')) if captura['metodo'] == 'POST' else parametros
+        inscricao = next((valor for campo, valor in dados.items() if 'inscri' in campo.lower()), None)
+        if inscricao is None:
+            return {}
+        registro = scraper._normalizar_iptu(inscricao, extrair_html(corpo, ESPECIFICACOES_EXTRACAO['sefaz_iptu_resultado']))
+        if registro is None:
+            return {}
+        registro['exercicio'] = registro['exercicio'] or next(
+            (valor for campo, valor in dados.items() if 'exerc' in campo.lower()), None)
+        registro['data_consulta'] = instante
+        return {'iptu_inscricoes': [registro]}
+    
+    if sem_consulta.startswith(urls['ibge_api']) and re.search(r'/localidades/municipios/\d+$', partes.path):
+        return {'ibge_oficial': [scraper._registro_municipio_ibge(json.loads(corpo))]}
+    
+    agregado = re.search(r'/agregados/(\d+)/periodos/', partes.path)
+    if url.startswith(urls['ibge_agregados']) and agregado:
+        tabela = normalizar_agregados_ibge(json.loads(corpo), int(agregado.group(1)))
+        registros = {'agregados_ibge': tabela.to_dict('records')}
+        if int(agregado.group(1)) == 793 and not tabela.empty:
+            # Domicílios do Censo 2010 consultados por buscar_dados_ibge_real
+            registros['ibge_oficial'] = [scraper._registro_domicilios_ibge(tabela)]
+        return registros
+    
+    return {}
+
+
+def reinterpretar_lote(diretorio: str, capturas: List[Dict], urls: Dict[str, str], sites: List[Dict]) -> Dict:
+    """
+    Ponto de entrada de um processo do reprocessamento: lê os corpos direto
+    do disco e reinterpreta cada captura; erros de uma captura não derrubam o lote
+    """
+    logger = logging.getLogger(__name__)
+    registros = {}
+    reconhecidas = erros = 0
+    for captura in capturas:
+        try:
+            corpo = ArquivoRespostas.ler_objeto(diretorio, captura['sha256'], captura['compressao'])
+            resultado = reinterpretar_captura(captura, corpo, urls, sites)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao reprocessar {captura['metodo']} {captura['url']}: {e}")
+            erros += 1
+            continue
+        reconhecidas += bool(resultado)
+        for fonte, novos in resultado.items():
+            registros.setdefault(fonte, []).extend(novos)
+    return {'registros': registros, 'reconhecidas': reconhecidas, 'erros': erros}
+
+
+def configurar_logging(nivel: int = logging.INFO, arquivo: Optional[str] = 'maceio_condominios_real.log') -> None:
+    """
+    Log no console e em arquivo para os pontos de entrada (CLI e processos
+    trabalhadores); não faz nada se o processo já configurou o logging
+    """
+    if logging.getLogger().handlers:
+        return
+    handlers = [logging.StreamHandler()]
+    if arquivo:
+        handlers.insert(0, logging.FileHandler(arquivo, encoding='utf-8'))
+    logging.basicConfig(level=nivel, format='%(asctime)s - %(levelname)s - %(message)s', handlers=handlers)
+
+
+def executar_trabalhador_fila(diretorio: str, urls: Optional[Dict[str, str]] = None,
+                              data_dir: str = 'dados_condominios_maceio_real', usar_navegador: bool = True,
+                              limites: Optional[Dict] = None, **kwargs) -> Dict[str, int]:
+    """
+    Ponto de entrada de um processo trabalhador: fila, limite de taxa,
+    dataset, agregados de tendências e arquivo bruto ficam no diretório compartilhado,
+    cache HTTP e logs no data_dir local
+    
+    limites sobrescreve taxa, rajada e por_host do LimitadorTaxaCompartilhado
+    (por padrão os mesmos do scraper); kwargs vão para trabalhar_fila.
+    """
+    configurar_logging()
+    taxa, rajada = MaceioCondominiosScraperReal.TAXA_PADRAO
+    limites = {'taxa': taxa, 'rajada': rajada, 'por_host': MaceioCondominiosScraperReal.TAXA_POR_HOST, **(limites or {})}
+    limitador = LimitadorTaxaCompartilhado(os.path.join(diretorio, 'taxa.sqlite3'), **limites)
+    scraper = MaceioCondominiosScraperReal(limitador=limitador, usar_navegador=usar_navegador,
+                                           data_dir=data_dir, urls=urls, arquivar_respostas=False)
+    scraper.armazem = ArmazemParquet(os.path.join(diretorio, 'dataset'))
+    scraper.rollups = RollupsAnuncios(os.path.join(diretorio, 'analise'))
+    scraper.arquivo_bruto = ArquivoRespostas(os.path.join(diretorio, 'arquivo_bruto'))
+    fila = FilaTrabalho(os.path.join(diretorio, 'fila.sqlite3'))
+    try:
+        return scraper.trabalhar_fila(fila, **kwargs)
+    finally:
+        fila.fechar()
+        scraper.encerrar()
+        limitador.fechar()
+
+
+# Opções da linha de comando anterior aos subcomandos e quantos valores cada uma recebe
+OPCOES_ANTIGAS = {
+    '--concorrente': 0, '--sem-cache': 0, '--anuncios': 0, '--sem-navegador': 0, '--incremental': 0,
+    '--reconstruir': 0, '--deduplicar': 0, '--indexar': 0, '--recalcular-tendencias': 0, '--reprocessar': 0,
+    '--sem-arquivo': 0, '--recomecar': 0, '--agendador': 0, '--planejar': 0, '--trabalhar': 0,
+    '--max-paginas': 1, '--formato': 1, '--output-format': 1, '--compressao': 1, '--agregados-ibge': 1,
+    '--buscar': 1, '--tendencias': 1, '--dias-tendencias': 1, '--iptu-lote': 1, '--saida-iptu': 1,
+    '--concorrencia-iptu': 1, '--taxa-iptu': 1, '--exercicio': 1, '--desde': 1, '--ate': 1, '--metricas': 1,
+    '--trabalhadores': 1, '--fila': 1, '--paginas-por-unidade': 1, '--processos': 1, '--data-dir': 1,
+    '--fontes': '+', '--sources': '+', '--sites': '+', '--bairros': '+'
+}
+
+# Opções antigas que escolhiam outra tarefa em vez da coleta
+MODOS_ANTIGOS = ('--buscar', '--iptu-lote', '--reprocessar', '--tendencias', '--recalcular-tendencias',
+                 '--agendador', '--planejar', '--trabalhar', '--reconstruir', '--agregados-ibge')
+
+
+def traduzir_argumentos_antigos(argv: List[str]) -> List[List[str]]:
+    """
+    Converte uma chamada no formato antigo (--buscar, --iptu-lote,
+    --agendador, --fila --planejar etc.) nas chamadas equivalentes com
+    subcomandos, na ordem em que a versão antiga as executava
+    
+    Chamadas que já usam subcomandos, ou que só trazem opções da coleta,
+    voltam inalteradas. Opções antigas que não se aplicam à tarefa escolhida
+    são ignoradas, como antes.
+    """
+    if not argv or not argv[0].startswith('-') or not any(a.split('=')[0] in MODOS_ANTIGOS for a in argv):
+        return [argv]
+    
+    opcoes, sobras = {}, []
+    restantes = list(argv)
+    while restantes:
+        argumento = restantes.pop(0)
+        nome, igual, valor = argumento.partition('=')
+        if not nome.startswith('--'):
+            sobras.append(argumento)
+            continue
+        aridade = OPCOES_ANTIGAS.get(nome, 0)
+        if igual:
+            valores = [valor]
+        elif aridade == '+':
+            valores = []
+            while restantes and not restantes[0].startswith('-'):
+                valores.append(restantes.pop(0))
+        else:
+            valores, restantes = restantes[:aridade], restantes[aridade:]
+        opcoes[nome] = valores
+    
+    def repassar(*nomes: str, como: Optional[str] = None) -> List[str]:
+        for nome in nomes:
+            if nome in opcoes:
+                return [como or nome, *opcoes[nome]]
+        return []
+    
+    comuns = [argumento for nome in ('--data-dir', '--sem-cache', '--sem-navegador', '--sem-arquivo', '--metricas')
+              for argumento in repassar(nome)]
+    formato = (opcoes.get('--formato') or opcoes.get('--output-format') or [None])[0]
+    
+    if '--buscar' in opcoes:
+        chamadas = [['buscar', *opcoes['--buscar']]]
+    elif '--iptu-lote' in opcoes:
+        chamadas = [['iptu', *opcoes['--iptu-lote'], *repassar('--saida-iptu', como='--saida'),
+                     *repassar('--concorrencia-iptu', como='--concorrencia'), *repassar('--taxa-iptu', como='--taxa'),
+                     *repassar('--exercicio')]]
+    elif '--reprocessar' in opcoes:
+        chamadas = [['reprocessar', *repassar('--desde'), *repassar('--ate'), *repassar('--processos')]]
+    elif '--tendencias' in opcoes or '--recalcular-tendencias' in opcoes:
+        chamadas = [['tendencias', *repassar('--tendencias', como='--formato'),
+                     *repassar('--dias-tendencias', como='--dias'),
+                     *repassar('--recalcular-tendencias', como='--recalcular')]]
+    elif '--agendador' in opcoes:
+        chamadas = [['agendador', *repassar('--trabalhadores'), *repassar('--anuncios'), *repassar('--max-paginas')]]
+    elif '--planejar' in opcoes or '--trabalhar' in opcoes:
+        chamadas = []
+        if '--planejar' in opcoes:
+            chamadas.append(['planejar', *repassar('--fila'), *repassar('--max-paginas'), *repassar('--bairros'),
+                             *repassar('--paginas-por-unidade')])
+        if '--trabalhar' in opcoes:
+            chamadas.append(['trabalhar', *repassar('--fila'), *repassar('--processos')])
+    elif '--reconstruir' in opcoes:
+        chamadas = [['reconstruir', *repassar('--formato', '--output-format')]]
+    else:
+        chamadas = [['coletar', *repassar('--fontes', '--sources'), *repassar('--sites'),
+                     *repassar('--formato', '--output-format'), *repassar('--compressao'), *repassar('--concorrente'),
+                     *repassar('--anuncios'), *repassar('--max-paginas'), *repassar('--incremental'),
+                     *repassar('--deduplicar'), *repassar('--indexar'), *repassar('--recomecar')]]
+        if '--agregados-ibge' in opcoes:
+            # A versão antiga baixava os agregados depois da coleta, no formato tabular dela
+            chamadas.append(['ibge', *opcoes['--agregados-ibge'], '--formato',
+                             'parquet' if formato == 'parquet' else 'csv'])
+    
+    chamadas = [chamada[:1] + comuns + chamada[1:] for chamada in chamadas]
+    chamadas[0].extend(sobras)
+    equivalente = ' && '.join(shlex.join(['python', 'maceioCondominios.py', *chamada]) for chamada in chamadas)
+    print(f"⚠️ Opções obsoletas: use os subcomandos. Equivalente: {equivalente}", file=sys.stderr)
+    return chamadas
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    """
+    Linha de comando com um subcomando por tarefa; sem subcomando, executa
+    `coletar` (compatível com as chamadas antigas, como --anuncios --max-paginas 20).
+    As opções antigas que escolhiam outra tarefa passam por traduzir_argumentos_antigos
+    """
+    fontes = list(MaceioCondominiosScraperReal.METODOS_FONTES) + ['anuncios_imobiliarios']
+    
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument('--data-dir', default='dados_condominios_maceio_real',
+                       help='Diretório dos dados, caches e índices')
+    comum.add_argument('--sem-cache', action='store_true',
+                       help='Ignora o cache HTTP em disco e baixa todas as páginas novamente')
+    comum.add_argument('--sem-navegador', action='store_true',
+                       help='Não usa o Chrome headless quando o HTML estático vem sem os anúncios')
+    comum.add_argument('--sem-arquivo', action='store_true',
+                       help='Não guarda as respostas baixadas no arquivo bruto')
+    comum.add_argument('--metricas', choices=['json', 'prometheus'], default=None,
+                       help='Exporta as métricas de desempenho por fonte em <data_dir>/metricas/')
+    
+    parser = argparse.ArgumentParser(description='Coletor de dados reais de condomínios de Maceió')
+    subcomandos = parser.add_subparsers(dest='comando', metavar='COMANDO')
+    
+    coletar = subcomandos.add_parser('coletar', parents=[comum], help='Coleta as fontes e salva os dados (padrão)')
+    coletar.add_argument('--fontes', '--sources', nargs='+', choices=fontes, default=None, metavar='FONTE',
+                         help=f"Fontes a coletar (padrão: todas, sem anúncios): {', '.join(fontes)}")
+    coletar.add_argument('--sites', nargs='+', default=None,
+                         help='Marketplaces consultados (VivaReal, ZapImóveis); padrão: todos')
+    coletar.add_argument('--formato', '--output-format', choices=['json', 'parquet', 'ndjson'], default='json',
+                         help='Formato de saída: JSON/CSV por execução, dataset Parquet particionado '
+                              'ou NDJSON por fonte gravado em streaming')
+    coletar.add_argument('--compressao', choices=['gzip', 'zstd'], default=None,
+                         help='Compressão dos arquivos NDJSON')
+    coletar.add_argument('--concorrente', action='store_true',
+                         help='Consulta todas as fontes em paralelo, cada uma com seu prazo')
+    coletar.add_argument('--anuncios', action='store_true',
+                         help='Percorre todas as páginas dos marketplaces e salva os anúncios '
+                              '(o mesmo que incluir anuncios_imobiliarios em --fontes)')
+    coletar.add_argument('--max-paginas', type=int, default=None,
+                         help='Limita o número de páginas por marketplace no crawler de anúncios')
+    coletar.add_argument('--incremental', action='store_true',
+                         help='Grava apenas os registros adicionados, alterados e removidos desde a última coleta')
+    coletar.add_argument('--deduplicar', action='store_true',
+                         help='Com os anúncios, agrupa os anúncios repetidos e os do mesmo prédio')
+    coletar.add_argument('--indexar', action='store_true',
+                         help='Atualiza o índice SQLite local com cartórios, anúncios e prédios da coleta')
+    coletar.add_argument('--recomecar', action='store_true',
+                         help='Descarta o progresso de uma coleta interrompida em vez de retomá-la')
+    
+    reconstruir = subcomandos.add_parser('reconstruir', parents=[comum],
+                                         help='Reconstrói o estado completo a partir dos deltas, sem coletar')
+    reconstruir.add_argument('--formato', '--output-format', choices=['json', 'parquet'], default='json')
+    
+    buscar = subcomandos.add_parser('buscar', parents=[comum],
+                                    help='Consulta o índice local (endereços, títulos e nomes) sem coletar')
+    buscar.add_argument('texto')
+    
+    ibge = subcomandos.add_parser('ibge', parents=[comum],
+                                  help='Baixa em lote os agregados do IBGE de todos os municípios do recorte')
+    ibge.add_argument('recorte', choices=sorted(LOCALIDADES_IBGE))
+    ibge.add_argument('--formato', '--output-format', choices=['csv', 'parquet'], default='csv')
+    
+    iptu = subcomandos.add_parser('iptu', parents=[comum],
+                                  help='Consulta na SEFAZ as inscrições imobiliárias de um arquivo, sem coletar')
+    iptu.add_argument('arquivo', help='Uma inscrição por linha ou CSV com a coluna inscricao')
+    iptu.add_argument('--saida', default=None,
+                      help='NDJSON de resultados (padrão: <data_dir>/iptu/<arquivo>.ndjson); '
+                           'uma execução interrompida é retomada na mesma saída')
+    iptu.add_argument('--concorrencia', type=int, default=8, help='Consultas simultâneas')
+    iptu.add_argument('--taxa', type=float, default=None,
+                      help='Orçamento de consultas por segundo no host da SEFAZ (padrão: o do limitador)')
+    iptu.add_argument('--exercicio', default=None,
+                      help='Exercício (ano) das consultas; padrão: o pré-selecionado no formulário')
+    
+    tendencias = subcomandos.add_parser('tendencias', parents=[comum],
+                                        help='Gera o relatório de tendências por bairro a partir dos agregados')
+    tendencias.add_argument('--formato', '--output-format', choices=['md', 'html'], default='md')
+    tendencias.add_argument('--dias', type=int, default=90, help='Janela (em dias) do relatório')
+    tendencias.add_argument('--recalcular', action='store_true',
+                            help='Refaz antes os agregados a partir de todo o histórico de anúncios')
+    
+    agendador = subcomandos.add_parser('agendador', parents=[comum],
+                                       help='Modo daemon: coleta cada fonte no seu intervalo e grava no dataset Parquet')
+    agendador.add_argument('--trabalhadores', type=int, default=3,
+                           help='Número de fontes coletadas ao mesmo tempo')
+    agendador.add_argument('--anuncios', action='store_true', help='Inclui o crawler de anúncios')
+    agendador.add_argument('--max-paginas', type=int, default=None)
+    
+    planejar = subcomandos.add_parser('planejar', parents=[comum],
+                                      help='Enfileira as unidades de crawl (site, bairro, faixa de páginas)')
+    planejar.add_argument('--fila', metavar='DIRETORIO', required=True,
+                          help='Diretório compartilhado (fila de crawl, limite de taxa global e dataset)')
+    planejar.add_argument('--max-paginas', type=int, required=True)
+    planejar.add_argument('--bairros', nargs='+', default=None, help='Divide o crawl por estes bairros')
+    planejar.add_argument('--paginas-por-unidade', type=int, default=5)
+    
+    trabalhar = subcomandos.add_parser('trabalhar', parents=[comum],
+                                       help='Consome unidades da fila até ela esvaziar')
+    trabalhar.add_argument('--fila', metavar='DIRETORIO', required=True)
+    trabalhar.add_argument('--processos', type=int, default=1,
+                           help='Número de processos trabalhadores nesta máquina')
+    
+    reprocessar = subcomandos.add_parser('reprocessar', parents=[comum],
+                                         help='Reinterpreta o arquivo bruto com os parsers atuais, sem acessar a rede')
+    reprocessar.add_argument('--desde', metavar='AAAA-MM-DD', default=None,
+                             help='Primeira data de captura incluída')
+    reprocessar.add_argument('--ate', metavar='AAAA-MM-DD', default=None,
+                             help='Última data de captura incluída')
+    reprocessar.add_argument('--processos', type=int, default=None,
+                             help='Processos de parse (padrão: um por núcleo)')
+    return parser
+
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """
     Execução principal do script com dados REAIS
     """
+    parser = criar_parser()
+    chamadas = traduzir_argumentos_antigos(list(sys.argv[1:] if argv is None else argv))
+    if len(chamadas) > 1:
+        for chamada in chamadas:
+            main(chamada)
+        return
+    argv = chamadas[0]
+    if not argv or (argv[0].startswith('-') and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'coletar')
+    args = parser.parse_args(argv)
+    
+    configurar_logging()
     print("🏢 COLETOR DE DADOS REAIS DE CONDOMÍNIOS - MACEIÓ")
     print("=" * 60)
     print("📍 Fontes: Portal do Cidadão, SEFAZ, IBGE, Transparência AL")
     print("=" * 60)
     
-    scraper = MaceioCondominiosScraperReal()
+    scraper = MaceioCondominiosScraperReal(usar_cache=not args.sem_cache, usar_navegador=not args.sem_navegador,
+                                           data_dir=args.data_dir, arquivar_respostas=not args.sem_arquivo)
+    diario = None
     
     try:
-        # Coletar dados reais
-        print("\n🔍 Iniciando coleta de dados reais...")
-        dados = scraper.coletar_todos_dados_reais()
+        if args.comando == 'buscar':
+            resultados = scraper.obter_indice().buscar(args.texto)
+            for tabela, registros in resultados.items():
+                print(f"\n🔎 {tabela.title()}: {len(registros)} resultado(s)")
+                for registro in registros:
+                    detalhes = [registro.get(campo) for campo in ('titulo', 'nome', 'endereco', 'bairro')]
+                    preco = f" | R$ {registro['preco']:,.0f}" if registro.get('preco') else ''
+                    print(f"   • {' | '.join(str(d) for d in detalhes if d)}{preco}")
+            return
+        
+        if args.comando == 'iptu':
+            if args.taxa:
+                host = urllib.parse.urlsplit(scraper.urls_reais['sefaz_maceio']).hostname
+                scraper.limitador.por_host[host] = (args.taxa, max(1, int(args.taxa)))
+            nome = os.path.splitext(os.path.basename(args.arquivo))[0]
+            saida = args.saida or os.path.join(scraper.data_dir, 'iptu', f'{nome}.ndjson')
+            print(f"\n🧾 Consultando IPTU das inscrições de {args.arquivo}...")
+            resumo = scraper.consultar_iptu_em_lote(ler_inscricoes(args.arquivo), saida,
+                                                    concorrencia=args.concorrencia, exercicio=args.exercicio)
+            print(f"   {resumo['consultadas']} consultas em {resumo['tempo']:.1f}s ({resumo['por_segundo']:.1f}/s): "
+                  f"{resumo['encontrada']} encontradas, {resumo['nao_encontrada']} não encontradas, "
+                  f"{resumo['erro']} erros, {resumo['ja_gravadas']} já gravadas")
+            print(f"   📁 {saida}")
+            if resumo['erro']:
+                print("   ⚠️ Execute o mesmo comando de novo para repetir só as inscrições com erro")
+            if args.metricas:
+                print(f"\n⏱️ Métricas exportadas em: {scraper.exportar_metricas(args.metricas)}")
+            return
+        
+        if args.comando == 'reprocessar':
+            if scraper.arquivo_bruto is None:
+                parser.error('reprocessar não combina com --sem-arquivo')
+            print(f"\n🗄️ Reprocessando o arquivo bruto ({scraper.arquivo_bruto.resumo()['capturas']} capturas)...")
+            resumo = scraper.reprocessar_arquivo(desde=args.desde, ate=args.ate, processos=args.processos)
+            for fonte, total in sorted(resumo['registros'].items()):
+                print(f"   {fonte:<24} {total} registros")
+            print(f"   {resumo['capturas']} capturas ({resumo['reconhecidas']} reconhecidas, {resumo['erros']} erros) "
+                  f"em {resumo['tempo']:.1f}s")
+            print(f"   📁 {resumo['destino']}")
+            return
+        
+        if args.comando == 'tendencias':
+            if args.recalcular:
+                print(f"\n📈 Agregados recalculados: {scraper.recalcular_tendencias()} anúncios")
+            caminho = scraper.gerar_relatorio_tendencias(args.formato, dias=args.dias)
+            print(f"\n📈 Relatório de tendências: {caminho or 'sem anúncios agregados ainda'}")
+            return
+        
+        if args.comando == 'ibge':
+            print(f"\n📈 Baixando agregados do IBGE ({args.recorte})...")
+            tabela = scraper.buscar_agregados_ibge(localidades=LOCALIDADES_IBGE[args.recorte])
+            print(f"   📁 {scraper.exportar_agregados_ibge(tabela, args.recorte, formato=args.formato)}")
+            if args.metricas:
+                print(f"\n⏱️ Métricas exportadas em: {scraper.exportar_metricas(args.metricas)}")
+            return
+        
+        if args.comando == 'agendador':
+            agendador = AgendadorColeta(scraper, trabalhadores=args.trabalhadores, incluir_anuncios=args.anuncios,
+                                        max_paginas=args.max_paginas, metricas=args.metricas)
+            signal.signal(signal.SIGTERM, lambda *_: agendador.parar())
+            print(f"\n⏰ Modo agendador ({agendador.caminho_estado}); Ctrl-C para encerrar")
+            for nome, estado in agendador.resumo().items():
+                intervalo = agendador.intervalos[nome][0]
+                proxima = datetime.fromtimestamp(max(estado['proxima_execucao'], time.time()))
+                print(f"   {nome:<24} a cada {intervalo / 3600:g} h, próxima em {proxima:%d/%m %H:%M}")
+            try:
+                agendador.executar()
+            except KeyboardInterrupt:
+                agendador.parar()
+                print("\n⏹️ Agendador encerrado; o estado das fontes foi mantido para o próximo início")
+            return
+        
+        if args.comando == 'planejar':
+            fila = FilaTrabalho(os.path.join(args.fila, 'fila.sqlite3'))
+            scraper.planejar_unidades_anuncios(fila, args.max_paginas, bairros=args.bairros,
+                                               paginas_por_unidade=args.paginas_por_unidade)
+            print(f"\n🧮 Fila em {args.fila}: {fila.resumo()}")
+            fila.fechar()
+            return
+        
+        if args.comando == 'trabalhar':
+            print(f"\n👷 Iniciando {args.processos} trabalhador(es) na fila {args.fila}...")
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=args.processos, mp_context=contexto) as executor:
+                futuros = [executor.submit(executar_trabalhador_fila, args.fila,
+                                           usar_navegador=not args.sem_navegador)
+                           for _ in range(args.processos)]
+                totais = [futuro.result() for futuro in futuros]
+            print(f"   {sum(t['unidades'] for t in totais)} unidades, {sum(t['paginas'] for t in totais)} páginas, "
+                  f"{sum(t['anuncios'] for t in totais)} anúncios gravados em {os.path.join(args.fila, 'dataset')}")
+            return
+        
+        if args.comando == 'reconstruir':
+            print("\n♻️ Reconstruindo estado completo a partir dos snapshots incrementais...")
+            dados = scraper.reconstruir_snapshot()
+            
+            print("\n💾 Salvando dados reconstruídos...")
+            scraper.salvar_dados_reais(dados, formato=args.formato)
+            print(f"📁 Dados salvos em: {scraper.data_dir}")
+            return
+        
+        # coletar: sem --fontes, todas as fontes; anúncios com --anuncios ou anuncios_imobiliarios em --fontes
+        fontes = [f for f in args.fontes or MaceioCondominiosScraperReal.METODOS_FONTES if f != 'anuncios_imobiliarios']
+        anuncios_selecionados = args.anuncios or 'anuncios_imobiliarios' in (args.fontes or [])
+        if args.sites:
+            try:
+                scraper.selecionar_sites(args.sites)
+            except ValueError as e:
+                parser.error(str(e))
+        
+        # Uma coleta interrompida deixa o diário em <data_dir>/retomada/ e é retomada automaticamente
+        diario = DiarioColeta(os.path.join(scraper.data_dir, 'retomada'))
+        if args.recomecar:
+            diario.descartar()
+        elif diario.retomando:
+            print(f"\n♻️ Retomando coleta interrompida: {diario.resumo()}")
         
-        # Salvar dados
-        print("\n💾 Salvando dados coletados...")
-        scraper.salvar_dados_reais(dados)
+        if args.formato == 'ndjson':
+            print("\n🔍 Iniciando coleta de dados reais em streaming...")
+            metadados = scraper.coletar_em_stream(compressao=args.compressao, concorrente=args.concorrente,
+                                                  incluir_anuncios=anuncios_selecionados, max_paginas=args.max_paginas,
+                                                  diario=diario, fontes=fontes)
+            dados = {'metadados': metadados}
+        elif fontes:
+            # Coletar dados reais
+            print("\n🔍 Iniciando coleta de dados reais...")
+            dados = scraper.coletar_todos_dados_reais(concorrente=args.concorrente, diario=diario, fontes=fontes)
+            
+            # Salvar dados
+            print("\n💾 Salvando dados coletados...")
+            scraper.salvar_dados_reais(dados, incremental=args.incremental, formato=args.formato)
+        else:
+            dados = {}
+        
+        if args.indexar:
+            cartorios = dados.get('cartorios_reais')
+            if cartorios is None and 'cartorios_reais' in dados.get('metadados', {}).get('arquivos', {}):
+                cartorios = ler_ndjson(dados['metadados']['arquivos']['cartorios_reais'])
+            print(f"\n🗂️ Cartórios indexados: {scraper.obter_indice().indexar_cartorios(cartorios or [])}")
+            if anuncios_selecionados and args.formato == 'ndjson':
+                anuncios = ler_ndjson(dados['metadados']['arquivos']['anuncios_imobiliarios'])
+                print(f"🗂️ Anúncios indexados: {scraper.obter_indice().indexar_anuncios(anuncios)}")
+        
+        if anuncios_selecionados and args.formato != 'ndjson':
+            print("\n🕷️ Percorrendo anúncios dos marketplaces...")
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            caminho_anuncios = os.path.join(scraper.data_dir, f'anuncios_maceio_{timestamp}.csv')
+            inicio_anuncios = datetime.now()
+            anuncios = scraper.crawler_anuncios(max_paginas=args.max_paginas, diario=diario)
+            if args.indexar:
+                anuncios = scraper.obter_indice().repassar_anuncios(anuncios)
+            scraper.exportar_anuncios(anuncios, caminho=caminho_anuncios,
+                                      formato='parquet' if args.formato == 'parquet' else 'csv')
+        
+        if anuncios_selecionados and args.deduplicar:
+            print("\n🧩 Deduplicando anúncios...")
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            if args.formato == 'ndjson':
+                anuncios = ler_ndjson(metadados['arquivos']['anuncios_imobiliarios'])
+            elif args.formato == 'parquet':
+                anuncios = scraper.armazem.ler('anuncios_imobiliarios', filtros=[
+                    ('coletado_em', '>=', pd.Timestamp(inicio_anuncios.replace(microsecond=0)))
+                ], data_inicio=inicio_anuncios.strftime('%Y-%m-%d'))
+            else:
+                anuncios = pd.read_csv(caminho_anuncios, encoding='utf-8-sig', dtype={'id': str})
+            deduplicados = scraper.deduplicar_anuncios(anuncios)
+            caminho_deduplicados = os.path.join(scraper.data_dir, f'anuncios_deduplicados_{timestamp}.csv')
+            deduplicados.to_csv(caminho_deduplicados, index=False, encoding='utf-8-sig')
+            print(f"   {deduplicados['cluster_id'].nunique()} imóveis distintos em "
+                  f"{deduplicados['predio_id'].nunique()} prédios: {caminho_deduplicados}")
+            if args.indexar:
+                print(f"   🗂️ Prédios indexados: {scraper.obter_indice().indexar_condominios(deduplicados)}")
         
-        print(f"\n✅ COLETA CONCLUÍDA COM SUCESSO!")
+        # Tudo gravado nos destinos finais: o diário só é apagado se nada ficou pendente
+        if diario.incompleto(scraper.fontes_coleta(fontes)):
+            print(f"\n⚠️ COLETA CONCLUÍDA COM PENDÊNCIAS: {diario.resumo()}")
+            print("   Execute o mesmo comando de novo para tentar só o que faltou (ou use --recomecar)")
+            diario.fechar()
+        else:
+            diario.descartar()
+            print(f"\n✅ COLETA CONCLUÍDA COM SUCESSO!")
         print(f"📁 Dados salvos em: {scraper.data_dir}")
         
         # Mostrar estatísticas
@@ -539,10 +5590,15 @@ def main():
         print(f"   📄 Total de registros: {metadados.get('total_registros', 0)}")
         
         print(f"\n🔍 DETALHES POR FONTE:")
-        for fonte, registros in dados.items():
-            if fonte != 'metadados':
-                status = "✅" if registros else "⚠️"
-                print(f"   {status} {fonte.replace('_', ' ').title()}: {len(registros)} registros")
+        contagens = metadados.get('registros_por_fonte') or {
+            fonte: len(registros) for fonte, registros in dados.items() if fonte != 'metadados'
+        }
+        for fonte, total in contagens.items():
+            status = "✅" if total else "⚠️"
+            print(f"   {status} {fonte.replace('_', ' ').title()}: {total} registros")
+        
+        if args.metricas:
+            print(f"\n⏱️ Métricas exportadas em: {scraper.exportar_metricas(args.metricas)}")
         
         print(f"\n🚀 Próximos passos:")
         print(f"   1. Revisar arquivo de log para detalhes técnicos")
@@ -550,11 +5606,18 @@ def main():
         print(f"   3. Validar dados coletados")
         print(f"   4. Configurar coletas automatizadas se necessário")
     
+    except KeyboardInterrupt:
+        print("\n⏸️ Coleta interrompida: execute novamente para retomar de onde parou (ou use --recomecar)")
+        logging.warning("Coleta interrompida pelo usuário")
+    
     except Exception as e:
         print(f"❌ Erro durante a execução: {e}")
         logging.error(f"Erro na execução principal: {e}")
     
     finally:
+        if diario is not None:
+            diario.fechar()
+        scraper.encerrar()
         print(f"\n📋 Verifique o arquivo de log para informações detalhadas")
 
 if __name__ == "__main__":
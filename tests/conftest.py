@@ -0,0 +1,80 @@
+"""
+Fixtures compartilhadas dos testes: scraper isolado em diretório temporário
+(sem cache, sem Chrome, sem arquivo bruto) e servidor de replay local
+"""
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+import maceioCondominios  # noqa: E402
+from maceioCondominios import LimitadorTaxa, MaceioCondominiosScraperReal  # noqa: E402
+from servidor_replay import ServidorReplay  # noqa: E402
+
+
+class RelogioFalso:
+    """
+    Substituto do módulo time no maceioCondominios: o tempo só anda com
+    avancar() ou sleep(), que registra as esperas em vez de dormir
+    """
+
+    def __init__(self, inicio: float = 1_700_000_000.0):
+        self.agora = inicio
+        self.esperas = []
+
+    def time(self) -> float:
+        return self.agora
+
+    monotonic = perf_counter = time
+
+    def sleep(self, segundos: float) -> None:
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorReplay(semente=42).iniciar()
+    yield servidor
+    servidor.parar()
+
+
+@pytest.fixture
+def criar_scraper(tmp_path):
+    """
+    Fábrica de scrapers que grava tudo em tmp_path; os criados são encerrados ao fim do teste
+    """
+    criados = []
+
+    def criar(**kwargs):
+        kwargs.setdefault('usar_cache', False)
+        kwargs.setdefault('usar_navegador', False)
+        kwargs.setdefault('arquivar_respostas', False)
+        kwargs.setdefault('limitador', LimitadorTaxa(taxa=1000, rajada=1000))
+        kwargs.setdefault('data_dir', str(tmp_path / 'dados'))
+        scraper = MaceioCondominiosScraperReal(**kwargs)
+        criados.append(scraper)
+        return scraper
+
+    yield criar
+    for scraper in criados:
+        scraper.encerrar()
+
+
+@pytest.fixture
+def scraper(criar_scraper):
+    return criar_scraper()
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = RelogioFalso()
+    monkeypatch.setattr(maceioCondominios, 'time', relogio)
+    return relogio
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from maceioCondominios import AgendadorColeta
+
+
+class FonteFalsa:
+    def __init__(self, registros=5):
+        self.registros = registros
+        self.chamadas = 0
+
+    def __call__(self):
+        self.chamadas += 1
+        if isinstance(self.registros, Exception):
+            raise self.registros
+        return self.registros
+
+
+@pytest.fixture
+def criar_agendador(scraper, relogio):
+    def criar(intervalos=None, **kwargs):
+        # Sem jitter: as próximas execuções ficam exatas
+        intervalos = {**{nome: (3600, 0.0) for nome in AgendadorColeta.INTERVALOS}, **(intervalos or {})}
+        agendador = AgendadorColeta(scraper, intervalos=intervalos, trabalhadores=8, **kwargs)
+        agendador.tarefas = {nome: FonteFalsa() for nome in agendador.tarefas}
+        return agendador
+
+    return criar
+
+
+def rodada(agendador):
+    # Uma volta do laço de executar(): dispara as fontes vencidas, espera todas terminarem e encerra
+    def esperar(segundos):
+        while agendador._em_execucao:
+            time.sleep(0.01)
+        agendador.parar()
+
+    agendador._acordar.wait = esperar
+    agendador.executar()
+    return {nome: tarefa.chamadas for nome, tarefa in agendador.tarefas.items() if tarefa.chamadas}
+
+
+def test_reinicio_nao_recoleta_fonte_dentro_do_intervalo(criar_agendador, relogio):
+    intervalos = {'portal_cidadao_maceio': (600, 0.0), 'cartorios_reais': (7 * 24 * 3600, 0.0)}
+    primeiro = criar_agendador(intervalos)
+    assert set(rodada(primeiro)) == set(primeiro.tarefas)
+
+    relogio.avancar(1800)
+    reiniciado = criar_agendador(intervalos)
+
+    assert rodada(reiniciado) == {'portal_cidadao_maceio': 1}
+    assert reiniciado.resumo()['cartorios_reais']['proxima_execucao'] == primeiro.resumo()['cartorios_reais'][
+        'proxima_execucao']
+
+
+def test_fonte_com_falha_recua_exponencialmente_ate_o_intervalo(criar_agendador, relogio):
+    agendador = criar_agendador({'cartorios_reais': (600, 0.0)}, backoff_inicial=60)
+    agendador.tarefas['cartorios_reais'] = FonteFalsa(RuntimeError('HTTP 503'))
+
+    esperas = []
+    for _ in range(6):
+        agendador._executar_tarefa('cartorios_reais')
+        esperas.append(agendador.resumo()['cartorios_reais']['proxima_execucao'] - relogio.time())
+
+    assert esperas == [60, 120, 240, 480, 600, 600]
+    assert agendador.resumo()['cartorios_reais']['falhas_seguidas'] == 6
+
+
+def test_sucesso_zera_as_falhas_seguidas(criar_agendador, relogio):
+    agendador = criar_agendador({'cartorios_reais': (600, 0.0)}, backoff_inicial=60)
+    agendador.tarefas['cartorios_reais'] = FonteFalsa(0)
+    for _ in range(3):
+        agendador._executar_tarefa('cartorios_reais')
+    assert agendador.resumo()['cartorios_reais']['ultimo_erro'] == 'nenhum registro coletado'
+
+    agendador.tarefas['cartorios_reais'].registros = 7
+    agendador._executar_tarefa('cartorios_reais')
+    estado = agendador.resumo()['cartorios_reais']
+    assert (estado['falhas_seguidas'], estado['registros'], estado['ultimo_erro']) == (0, 7, None)
+    assert estado['proxima_execucao'] - relogio.time() == 600
+
+    agendador.tarefas['cartorios_reais'].registros = 0
+    agendador._executar_tarefa('cartorios_reais')
+    assert agendador.resumo()['cartorios_reais']['proxima_execucao'] - relogio.time() == 60
+    assert criar_agendador().resumo()['cartorios_reais']['falhas_seguidas'] == 1
@@ -0,0 +1,96 @@
+import math
+import numbers
+import os
+from datetime import datetime
+
+import pytest
+
+from maceioCondominios import ArmazemParquet, ArquivoRespostas, ler_ndjson
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    arquivo = ArquivoRespostas(str(tmp_path / 'arquivo_bruto'), compressao='gzip')
+    yield arquivo
+    arquivo.fechar()
+
+
+def comparaveis(registros, campos):
+    # O dataset tipa as colunas pelo esquema (quartos é inteiro, no crawler é float; None volta como NaN)
+    def valor(v):
+        if isinstance(v, numbers.Number) and not isinstance(v, bool):
+            return None if math.isnan(v) else float(v)
+        return v
+    return sorted(tuple(str(valor(registro.get(campo))) for campo in campos) for registro in registros)
+
+
+def test_corpos_iguais_sao_gravados_uma_vez(arquivo):
+    primeiro = arquivo.guardar('https://exemplo/a', b'<html>igual</html>', fonte='teste')
+    segundo = arquivo.guardar('https://exemplo/b', b'<html>igual</html>', fonte='teste')
+    arquivo.guardar('https://exemplo/a', b'<html>outro</html>', fonte='teste')
+
+    resumo = arquivo.resumo()
+    assert primeiro == segundo
+    assert (resumo['capturas'], resumo['objetos']) == (3, 2)
+    assert arquivo.ler(primeiro) == b'<html>igual</html>'
+    assert len(os.listdir(os.path.join(arquivo.diretorio, 'objetos', primeiro[:2]))) == 1
+
+
+def test_capturas_por_periodo_e_url(arquivo):
+    arquivo.guardar('https://exemplo/a', b'1', capturado_em=datetime(2024, 1, 1, 12).timestamp())
+    fevereiro = arquivo.guardar('https://exemplo/a', b'2', capturado_em=datetime(2024, 2, 1, 12).timestamp())
+    arquivo.guardar('https://exemplo/b', b'3', capturado_em=datetime(2024, 3, 1, 12).timestamp())
+
+    assert [c['sha256'] for c in arquivo.capturas(desde='2024-01-15', ate='2024-02-01')] == [fevereiro]
+    assert [c['url'] for c in arquivo.capturas(url='https://exemplo/a')] == ['https://exemplo/a'] * 2
+
+
+def test_reprocessar_reproduz_os_anuncios_e_o_iptu_da_coleta(criar_scraper, servidor, tmp_path):
+    scraper = criar_scraper(urls=servidor.urls(), arquivar_respostas=True)
+    scraper.selecionar_sites(['VivaReal'])
+    anuncios = list(scraper.crawler_anuncios())
+    scraper.consultar_iptu_em_lote(['01.001.001-0', '01.002.002-0'], str(tmp_path / 'iptu.ndjson'))
+
+    estatisticas = scraper.reprocessar_arquivo(destino=str(tmp_path / 'reprocessado'), processos=1)
+
+    reprocessado = ArmazemParquet(estatisticas['destino'])
+    iptu = list(ler_ndjson(str(tmp_path / 'iptu.ndjson')))
+    campos_anuncio = [campo for campo in anuncios[0] if campo != 'data_coleta']
+    campos_iptu = [campo for campo in iptu[0] if campo not in ('data_consulta', 'tentativas')]
+    assert estatisticas['erros'] == 0
+    assert comparaveis(reprocessado.ler('anuncios_imobiliarios').to_dict('records'), campos_anuncio) == \
+        comparaveis(anuncios, campos_anuncio)
+    assert comparaveis(reprocessado.ler('iptu_inscricoes').to_dict('records'), campos_iptu) == \
+        comparaveis(iptu, campos_iptu)
+
+
+def test_objeto_ausente_conta_como_erro_sem_derrubar_o_reprocessamento(criar_scraper, servidor, tmp_path):
+    scraper = criar_scraper(urls=servidor.urls(), arquivar_respostas=True)
+    scraper.selecionar_sites(['VivaReal'])
+    list(scraper.crawler_anuncios(max_paginas=2))
+    primeira = next(scraper.arquivo_bruto.capturas())
+    os.remove(ArquivoRespostas.caminho_objeto(scraper.arquivo_bruto.diretorio, primeira['sha256'],
+                                              primeira['compressao']))
+
+    estatisticas = scraper.reprocessar_arquivo(destino=str(tmp_path / 'reprocessado'), processos=1)
+
+    assert estatisticas['erros'] == 1
+    assert estatisticas['registros']['anuncios_imobiliarios'] == 20
+
+
+@pytest.mark.parametrize('fonte', ['sefaz_maceio', 'ibge_oficial', 'cartorios_reais', 'sites_imobiliarios'])
+def test_reprocessar_reproduz_as_fontes_da_coleta(criar_scraper, servidor, tmp_path, fonte):
+    scraper = criar_scraper(urls=servidor.urls(), arquivar_respostas=True)
+    scraper.selecionar_sites(['VivaReal'])
+    coletados = scraper._executar_fonte(fonte, scraper.fontes_coleta([fonte])[fonte])
+
+    estatisticas = scraper.reprocessar_arquivo(destino=str(tmp_path / 'reprocessado'), processos=1)
+
+    # Os registros da coleta passam pelo mesmo armazém para serializar as colunas JSON igual
+    coleta = ArmazemParquet(str(tmp_path / 'coleta'))
+    coleta.gravar(fonte, coletados)
+    reprocessado = ArmazemParquet(estatisticas['destino'])
+    campos = sorted({campo for registro in coletados for campo in registro} - {'data_acesso', 'data_consulta'})
+    assert coletados and estatisticas['erros'] == 0
+    assert comparaveis(reprocessado.ler(fonte).to_dict('records'), campos) == \
+        comparaveis(coleta.ler(fonte).to_dict('records'), campos)
@@ -0,0 +1,94 @@
+import requests
+
+from maceioCondominios import AdaptadorHTTPCache, CacheHTTP
+
+
+def sessao_com_cache(cache):
+    sessao = requests.Session()
+    sessao.mount('http://', AdaptadorHTTPCache(cache))
+    return sessao
+
+
+def requisicoes(servidor, fonte):
+    return servidor.estatisticas.get(fonte, {}).get('requisicoes', 0)
+
+
+def test_ttl_zero_revalida_com_etag(tmp_path, servidor):
+    cache = CacheHTTP(str(tmp_path))
+    sessao = sessao_com_cache(cache)
+    url = servidor.urls()['cnr']
+
+    primeira = sessao.get(url)
+    segunda = sessao.get(url)
+
+    assert primeira.cache_status == 'falha'
+    assert segunda.cache_status == 'revalidado'
+    assert segunda.content == primeira.content
+    assert requisicoes(servidor, 'cartorios_reais') == 2
+    assert cache.estatisticas['revalidacoes'] == 1
+
+
+def test_entrada_fresca_nao_vai_a_rede(tmp_path, servidor):
+    cache = CacheHTTP(str(tmp_path), ttls=[(r'/cnr/', None)])
+    sessao = sessao_com_cache(cache)
+    url = servidor.urls()['cnr']
+
+    sessao.get(url)
+    resposta = sessao.get(url)
+
+    assert resposta.cache_status == 'acerto'
+    assert requisicoes(servidor, 'cartorios_reais') == 1
+
+
+def test_no_cache_na_requisicao_ignora_o_cache(tmp_path, servidor):
+    cache = CacheHTTP(str(tmp_path), ttls=[(r'/cnr/', None)])
+    sessao = sessao_com_cache(cache)
+    url = servidor.urls()['cnr']
+
+    sessao.get(url)
+    resposta = sessao.get(url, headers={'Cache-Control': 'no-cache'})
+
+    assert not hasattr(resposta, 'cache_status')
+    assert requisicoes(servidor, 'cartorios_reais') == 2
+
+
+def test_stream_so_entra_no_cache_se_lido_ate_o_fim(tmp_path, servidor):
+    cache = CacheHTTP(str(tmp_path))
+    sessao = sessao_com_cache(cache)
+    url = servidor.urls()['cnr']
+
+    with sessao.get(url, stream=True) as resposta:
+        next(resposta.iter_content(64))
+    assert cache.obter(url) is None
+
+    with sessao.get(url, stream=True) as resposta:
+        corpo = resposta.content
+        resposta.armazenar_no_cache(corpo)
+    assert cache.obter(url)['corpo'] == corpo
+
+
+def test_descarte_lru_respeita_o_tamanho_maximo(tmp_path):
+    cache = CacheHTTP(str(tmp_path), tamanho_maximo=250)
+    cache.armazenar('http://a/', 200, {}, b'a' * 100)
+    cache.armazenar('http://b/', 200, {}, b'b' * 100)
+    cache.obter('http://a/')
+    cache.armazenar('http://c/', 200, {}, b'c' * 100)
+
+    assert cache.obter('http://b/') is None
+    assert cache.obter('http://a/') is not None
+    assert cache.obter('http://c/') is not None
+    assert cache.estatisticas['descartes'] == 1
+
+
+def test_304_renova_a_entrada_e_mescla_cabecalhos(tmp_path):
+    cache = CacheHTTP(str(tmp_path))
+    cache.armazenar('http://a/', 200, {'ETag': '"v1"', 'Content-Encoding': 'gzip', 'X-Antigo': '1'}, b'corpo')
+    armazenada = cache.obter('http://a/')['armazenado_em']
+
+    cache.renovar('http://a/', {'ETag': '"v2"', 'X-Novo': '2'})
+    entrada = cache.obter('http://a/')
+
+    assert entrada['etag'] == '"v2"'
+    assert entrada['cabecalhos'] == {'ETag': '"v2"', 'X-Antigo': '1', 'X-Novo': '2'}
+    assert entrada['armazenado_em'] >= armazenada
+    assert entrada['corpo'] == b'corpo'
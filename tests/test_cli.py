@@ -0,0 +1,52 @@
+import pytest
+
+import maceioCondominios
+from maceioCondominios import criar_parser, traduzir_argumentos_antigos
+
+
+@pytest.mark.parametrize('antigos, novos', [
+    (['--buscar', 'ponta verde'], [['buscar', 'ponta verde']]),
+    (['--iptu-lote', 'inscricoes.txt', '--taxa-iptu', '2', '--saida-iptu', 'saida.ndjson', '--sem-cache'],
+     [['iptu', '--sem-cache', 'inscricoes.txt', '--saida', 'saida.ndjson', '--taxa', '2']]),
+    (['--reprocessar', '--desde=2024-01-01', '--processos', '2'],
+     [['reprocessar', '--desde', '2024-01-01', '--processos', '2']]),
+    (['--tendencias', 'html', '--dias-tendencias', '30', '--recalcular-tendencias'],
+     [['tendencias', '--formato', 'html', '--dias', '30', '--recalcular']]),
+    (['--agendador', '--anuncios', '--max-paginas', '5', '--metricas', 'json'],
+     [['agendador', '--metricas', 'json', '--anuncios', '--max-paginas', '5']]),
+    (['--fila', '/compartilhado', '--planejar', '--trabalhar', '--max-paginas', '20', '--bairros', 'Farol', 'Jatiúca'],
+     [['planejar', '--fila', '/compartilhado', '--max-paginas', '20', '--bairros', 'Farol', 'Jatiúca'],
+      ['trabalhar', '--fila', '/compartilhado']]),
+    (['--reconstruir', '--formato', 'parquet', '--incremental'], [['reconstruir', '--formato', 'parquet']]),
+    (['--anuncios', '--agregados-ibge', 'metropolitana', '--formato', 'parquet'],
+     [['coletar', '--formato', 'parquet', '--anuncios'], ['ibge', 'metropolitana', '--formato', 'parquet']]),
+])
+def test_opcoes_antigas_viram_subcomandos_validos(antigos, novos, capsys):
+    assert traduzir_argumentos_antigos(antigos) == novos
+    assert 'Opções obsoletas' in capsys.readouterr().err
+    for chamada in novos:
+        criar_parser().parse_args(chamada)
+
+
+@pytest.mark.parametrize('argv', [['--anuncios', '--max-paginas', '20'], ['coletar', '--anuncios'],
+                                  ['buscar', '--sem-cache', 'farol'], []])
+def test_chamadas_atuais_nao_sao_alteradas(argv, capsys):
+    assert traduzir_argumentos_antigos(argv) == [argv]
+    assert capsys.readouterr().err == ''
+
+
+def test_main_executa_as_chamadas_traduzidas_em_ordem(monkeypatch):
+    executadas = []
+    principal = maceioCondominios.main
+
+    def main(argv=None):
+        if argv and not argv[0].startswith('-'):
+            executadas.append(argv[0])
+            return None
+        return principal(argv)
+
+    monkeypatch.setattr(maceioCondominios, 'main', main)
+
+    main(['--fila', '/compartilhado', '--planejar', '--trabalhar', '--max-paginas', '20'])
+
+    assert executadas == ['planejar', 'trabalhar']
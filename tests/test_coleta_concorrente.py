@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from maceioCondominios import PrazoFonteExcedido
+
+
+def test_fonte_lenta_excede_o_prazo_sem_atrasar_as_demais(scraper):
+    scraper.prazos_fontes = {'lenta': 0.2, 'rapida': 5}
+    fontes = {
+        'lenta': lambda: time.sleep(1) or [{'id': 1}],
+        'rapida': lambda: [{'id': 2}]
+    }
+    observacoes = []
+
+    inicio = time.monotonic()
+    resultados = scraper._coletar_fontes_concorrente(observacoes, fontes)
+
+    assert time.monotonic() - inicio < 0.9
+    assert resultados == {'lenta': [], 'rapida': [{'id': 2}]}
+    assert observacoes == ['lenta: prazo de 0.2s excedido']
+
+
+def test_erro_em_uma_fonte_vira_observacao(scraper):
+    def quebrada():
+        raise ValueError('html inesperado')
+
+    observacoes = []
+    resultados = scraper._coletar_fontes_concorrente(observacoes, {'quebrada': quebrada, 'ok': lambda: [{'id': 1}]})
+
+    assert resultados == {'quebrada': [], 'ok': [{'id': 1}]}
+    assert observacoes == ['quebrada: erro inesperado (html inesperado)']
+
+
+def test_requisicao_apos_o_prazo_e_recusada(scraper, servidor):
+    scraper._contexto.prazo = time.monotonic() - 1
+    with pytest.raises(PrazoFonteExcedido):
+        scraper._get(servidor.urls()['portal_cidadao'], timeout=5)
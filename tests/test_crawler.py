@@ -0,0 +1,67 @@
+import pytest
+import requests
+
+
+@pytest.fixture
+def scraper_replay(criar_scraper, servidor):
+    scraper = criar_scraper(urls=servidor.urls())
+    scraper.selecionar_sites(['VivaReal'])
+    return scraper
+
+
+def falhar_paginas(scraper, paginas):
+    baixar = scraper._baixar_pagina_anuncios
+    baixadas = []
+
+    def baixar_ou_falhar(site, pagina, bairro=None):
+        baixadas.append(pagina)
+        if pagina in paginas:
+            raise requests.HTTPError('HTTP 503')
+        return baixar(site, pagina, bairro)
+
+    scraper._baixar_pagina_anuncios = baixar_ou_falhar
+    return baixadas
+
+
+def test_primeira_pagina_vazia_encerra_o_site(scraper_replay):
+    anuncios = list(scraper_replay.crawler_anuncios())
+
+    assert len(anuncios) == 5 * 20
+    assert {a['pagina'] for a in anuncios} == {1, 2, 3, 4, 5}
+
+
+def test_pagina_com_falha_e_pulada_sem_encerrar_o_site(scraper_replay):
+    falhar_paginas(scraper_replay, {2})
+
+    anuncios = list(scraper_replay.crawler_anuncios())
+
+    assert {a['pagina'] for a in anuncios} == {1, 3, 4, 5}
+
+
+def test_falhas_seguidas_interrompem_o_site(scraper_replay):
+    baixadas = falhar_paginas(scraper_replay, set(range(2, 100)))
+
+    anuncios = list(scraper_replay.crawler_anuncios(concorrencia=1, max_falhas_seguidas=3))
+
+    assert {a['pagina'] for a in anuncios} == {1}
+    assert baixadas == [1, 2, 3, 4]
+
+
+def test_status_diferente_de_200_levanta_erro(scraper_replay, servidor):
+    site = dict(scraper_replay.sites_imobiliarios[0], url=servidor.url_base + '/inexistente/')
+
+    with pytest.raises(requests.HTTPError):
+        scraper_replay._baixar_pagina_anuncios(site, 1)
+
+
+def test_pagina_de_resultados_vazia_nao_e_renderizada(scraper_replay, servidor):
+    renderizadas = []
+    scraper_replay.renderizar_pagina = lambda url, seletor: renderizadas.append(url)
+    site = scraper_replay.sites_imobiliarios[0]
+
+    assert scraper_replay._baixar_pagina_anuncios(site, 6) == []
+    assert renderizadas == []
+
+    casca = b'<html><body><div id="app"></div><script src="/app.js"></script></body></html>'
+    assert scraper_replay._extrair_anuncios_com_fallback(casca, site, site['url'], 1) == []
+    assert renderizadas == [site['url']]
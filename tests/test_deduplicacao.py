@@ -0,0 +1,68 @@
+import pandas as pd
+
+from maceioCondominios import DeduplicadorAnuncios, _UniaoBusca
+
+
+def anuncio(id_anuncio, site, endereco, preco, area=80, quartos=3, condominio=600,
+            titulo='Apartamento 3 quartos vista mar Ponta Verde'):
+    return {'id': id_anuncio, 'site': site, 'titulo': titulo, 'endereco': endereco, 'bairro': 'Ponta Verde',
+            'preco': preco, 'condominio': condominio, 'area_m2': area, 'quartos': quartos}
+
+
+def test_uniao_transitiva_e_rotulos_compactos():
+    uniao = _UniaoBusca(5)
+    uniao.unir(0, 3)
+    uniao.unir(3, 4)
+
+    assert not uniao.unir(0, 4)
+    assert list(uniao.rotulos()) == [0, 1, 2, 0, 0]
+
+
+def test_rotulos_diferentes_nunca_se_unem_nem_por_um_intermediario():
+    uniao = _UniaoBusca(3, rotulos=['rua a 10', None, 'rua b 20'])
+
+    assert uniao.unir(0, 1)
+    assert not uniao.unir(1, 2)
+    assert uniao.raiz(2) == 2
+
+
+def test_normalizar_expande_abreviacoes_e_remove_acentos():
+    normalizados = DeduplicadorAnuncios.normalizar(pd.Series(['Av. Dr. Antônio Gouveia, 1.200', None]))
+
+    assert list(normalizados) == ['avenida doutor antonio gouveia 1 200', '']
+
+
+def test_mesmo_imovel_em_dois_sites_vira_um_cluster():
+    tabela = DeduplicadorAnuncios().deduplicar(pd.DataFrame([
+        anuncio('v1', 'VivaReal', 'Rua Exemplo, 100 - Ponta Verde, Maceió - AL', 500000),
+        anuncio('z1', 'ZapImóveis', 'R. Exemplo, 100 - Ponta Verde, Maceió - AL', 505000),
+        anuncio('v2', 'VivaReal', 'Rua Exemplo, 100 - Ponta Verde, Maceió - AL', 900000, area=150, quartos=4,
+                condominio=1200, titulo='Cobertura duplex 4 suítes')
+    ]))
+
+    clusters = tabela.set_index('id')['cluster_id']
+    assert clusters['v1'] == clusters['z1'] != clusters['v2']
+    assert tabela['predio_id'].nunique() == 1
+    assert tabela.set_index('id').loc['v1', 'tamanho_cluster'] == 2
+
+
+def test_anuncio_sem_numero_nao_une_dois_enderecos():
+    tabela = DeduplicadorAnuncios().deduplicar(pd.DataFrame([
+        anuncio('a', 'VivaReal', 'Rua Exemplo, 100 - Ponta Verde, Maceió - AL', 500000),
+        anuncio('b', 'ZapImóveis', 'Rua Exemplo - Ponta Verde, Maceió - AL', 500000),
+        anuncio('c', 'VivaReal', 'Rua Exemplo, 200 - Ponta Verde, Maceió - AL', 500000)
+    ]))
+
+    clusters = tabela.set_index('id')['cluster_id']
+    assert clusters['a'] != clusters['c']
+    assert clusters['b'] in (clusters['a'], clusters['c'])
+    assert tabela['predio_id'].nunique() == 2
+
+
+def test_bairros_diferentes_nao_sao_comparados():
+    outro_bairro = dict(anuncio('b', 'ZapImóveis', 'Rua Exemplo, 100 - Jatiúca, Maceió - AL', 500000), bairro='Jatiúca')
+    tabela = DeduplicadorAnuncios().deduplicar(pd.DataFrame([
+        anuncio('a', 'VivaReal', 'Rua Exemplo, 100 - Ponta Verde, Maceió - AL', 500000), outro_bairro
+    ]))
+
+    assert tabela['cluster_id'].nunique() == 2
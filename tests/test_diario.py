@@ -0,0 +1,106 @@
+import json
+
+import requests
+
+from maceioCondominios import DiarioColeta
+
+
+def test_linha_cortada_e_descartada_ao_reabrir(tmp_path):
+    diario = DiarioColeta(str(tmp_path))
+    diario.concluir_pagina('VivaReal', 1, [{'site': 'VivaReal', 'id': '1'}])
+    diario.fechar()
+    with open(tmp_path / 'diario.jsonl', 'a', encoding='utf-8') as f:
+        f.write('{"evento": "pagina", "site": "VivaReal", "pag')
+
+    reaberto = DiarioColeta(str(tmp_path))
+
+    assert reaberto.paginas_concluidas == {'VivaReal': {1}}
+    assert [a['id'] for a in reaberto.anuncios_salvos()] == ['1']
+
+
+def test_pagina_com_falha_continua_pendente_ate_ser_concluida(tmp_path):
+    diario = DiarioColeta(str(tmp_path))
+    diario.pagina_pendente('VivaReal', 2, 'http://x/?pagina=2')
+    diario.pagina_falhou('VivaReal', 2, 'HTTP 503')
+    diario.fechar()
+
+    reaberto = DiarioColeta(str(tmp_path))
+    assert reaberto.retomando and reaberto.incompleto()
+    assert reaberto.falhas == {('VivaReal', 2): 'HTTP 503'}
+
+    reaberto.concluir_pagina('VivaReal', 2, [])
+    assert not reaberto.incompleto()
+
+
+def test_fonte_com_falha_ou_nao_concluida_deixa_o_diario_incompleto(tmp_path):
+    diario = DiarioColeta(str(tmp_path))
+    diario.fonte_falhou('ibge_oficial', 'nenhum registro')
+
+    assert diario.incompleto()
+    diario.concluir_fonte('ibge_oficial', [{'codigo_ibge': 2704302}])
+    assert not diario.incompleto()
+    assert diario.incompleto(['ibge_oficial', 'cartorios_reais'])
+    assert DiarioColeta(str(tmp_path)).carregar_fonte('ibge_oficial') == [{'codigo_ibge': 2704302}]
+
+
+def test_fontes_vazias_ou_com_erro_sao_registradas_como_falha(scraper, tmp_path):
+    diario = DiarioColeta(str(tmp_path / 'retomada'))
+
+    def quebrada():
+        raise ValueError('html inesperado')
+
+    fontes = scraper._fontes_com_diario({'vazia': lambda: [], 'quebrada': quebrada, 'ok': lambda: [{'id': 1}]},
+                                        diario, [])
+    for nome, funcao in fontes.items():
+        try:
+            funcao()
+        except ValueError:
+            pass
+
+    assert diario.fontes_com_falha == {'vazia': 'nenhum registro', 'quebrada': 'html inesperado'}
+    assert diario.fontes_concluidas == {'ok': 1}
+
+
+def test_retomada_baixa_so_as_paginas_que_falharam(criar_scraper, servidor, tmp_path):
+    diario = DiarioColeta(str(tmp_path / 'retomada'))
+    scraper = criar_scraper(urls=servidor.urls())
+    scraper.selecionar_sites(['VivaReal'])
+    baixar = scraper._baixar_pagina_anuncios
+
+    def falhar_pagina_3(site, pagina, bairro=None):
+        if pagina == 3:
+            raise requests.HTTPError('HTTP 503')
+        return baixar(site, pagina, bairro)
+
+    scraper._baixar_pagina_anuncios = falhar_pagina_3
+    primeira = list(scraper.crawler_anuncios(diario=diario))
+    diario.fechar()
+
+    assert {a['pagina'] for a in primeira} == {1, 2, 4, 5}
+    reaberto = DiarioColeta(str(tmp_path / 'retomada'))
+    assert reaberto.incompleto() and set(reaberto.falhas) == {('VivaReal', 3)}
+
+    paginas_baixadas = []
+
+    def registrar(site, pagina, bairro=None):
+        paginas_baixadas.append(pagina)
+        return baixar(site, pagina, bairro)
+
+    scraper._baixar_pagina_anuncios = registrar
+    segunda = list(scraper.crawler_anuncios(diario=reaberto))
+
+    assert 3 in paginas_baixadas and not {1, 2, 4, 5} & set(paginas_baixadas)
+    assert len(segunda) == 5 * 20
+    assert len({a['id'] for a in segunda}) == len(segunda)
+    assert not reaberto.incompleto()
+    reaberto.fechar()
+
+
+def test_diario_e_jsonl_um_evento_por_linha(tmp_path):
+    diario = DiarioColeta(str(tmp_path))
+    diario.pagina_pendente('ZapImóveis', 1, 'http://x/')
+    diario.pagina_falhou('ZapImóveis', 1, 'timeout')
+    diario.fechar()
+
+    eventos = [json.loads(linha)['evento'] for linha in open(tmp_path / 'diario.jsonl', encoding='utf-8')]
+    assert eventos == ['pendente', 'falha']
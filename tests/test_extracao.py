@@ -0,0 +1,71 @@
+from maceioCondominios import ESPECIFICACOES_EXTRACAO, ExtratorHTMLIncremental, extrair_html
+
+
+def portal(servicos, rodape=0):
+    links = ''.join(f'<li><a href="/servico/{i}">Certidão de imóvel {i}</a></li>' for i in range(servicos))
+    outros = ''.join(f'<a href="/imovel/rodape/{i}">Imóveis em destaque {i}</a>' for i in range(rodape))
+    return (f'<html><body><main><ul>{links}</ul><form action="/consulta/cadastro-imovel"></form></main>'
+            f'<footer>{outros}</footer></body></html>').encode()
+
+
+def extrair_em_blocos(conteudo, especificacao, tamanho=512):
+    extrator = ExtratorHTMLIncremental(especificacao)
+    lidos = 0
+    for inicio in range(0, len(conteudo), tamanho):
+        bloco = conteudo[inicio:inicio + tamanho]
+        extrator.alimentar(bloco)
+        lidos += len(bloco)
+        if extrator.concluido:
+            break
+    return extrator.finalizar(), extrator.concluido, lidos
+
+
+def test_portal_para_de_ler_quando_o_conteudo_principal_fecha():
+    conteudo = portal(250, rodape=2000)
+
+    resultado, concluido, lidos = extrair_em_blocos(conteudo, ESPECIFICACOES_EXTRACAO['portal_cidadao_maceio'])
+
+    assert concluido
+    assert lidos < len(conteudo) / 2
+    assert len(resultado['servicos']) == 250
+    assert resultado['formularios'] == [{'action': '/consulta/cadastro-imovel'}]
+
+
+def test_transparencia_para_de_ler_quando_o_conteudo_principal_fecha():
+    datasets = ''.join(f'<a href="/patrimonio/{i}">Patrimônio {i}</a>' for i in range(100))
+    conteudo = f'<html><body><main>{datasets}</main><footer>{"<p>rodapé</p>" * 3000}</footer></body></html>'.encode()
+
+    resultado, concluido, lidos = extrair_em_blocos(conteudo, ESPECIFICACOES_EXTRACAO['transparencia_alagoas'])
+
+    assert concluido and lidos < len(conteudo)
+    assert len(resultado['datasets']) == 100
+
+
+def test_streaming_e_documento_inteiro_extraem_o_mesmo():
+    conteudo = portal(120, rodape=50)
+    especificacao = ESPECIFICACOES_EXTRACAO['portal_cidadao_maceio']
+
+    assert extrair_em_blocos(conteudo, especificacao)[0] == extrair_html(conteudo, especificacao)
+
+
+def test_grupo_sem_limite_nem_fim_impede_a_parada_antecipada():
+    especificacao = {
+        'primeiro': {'itens': 'a[href]', 'campos': {'url': {'xpath': '.', 'atributo': 'href'}}, 'limite': 1},
+        'formularios': {'itens': 'form', 'campos': {'action': {'xpath': '.', 'atributo': 'action'}}}
+    }
+
+    resultado, concluido, _ = extrair_em_blocos(portal(50), especificacao)
+
+    assert not concluido
+    assert resultado['primeiro'] == [{'url': '/servico/0'}]
+    assert len(resultado['formularios']) == 1
+
+
+def test_todos_os_grupos_com_limite_param_cedo():
+    especificacao = {'primeiro': {'itens': 'a[href]', 'campos': {'url': {'xpath': '.', 'atributo': 'href'}},
+                                  'limite': 1}}
+
+    resultado, concluido, _ = extrair_em_blocos(portal(200), especificacao)
+
+    assert concluido
+    assert resultado['primeiro'] == [{'url': '/servico/0'}]
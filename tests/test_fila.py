@@ -0,0 +1,150 @@
+import sqlite3
+
+import pytest
+import requests
+
+from maceioCondominios import FilaTrabalho
+
+
+def unidade(chave, grupo='VivaReal|*', ordem=1):
+    return {'chave': chave, 'grupo': grupo, 'ordem': ordem, 'dados': {'chave': chave}}
+
+
+@pytest.fixture
+def criar_fila(tmp_path):
+    filas = []
+
+    def criar(**kwargs):
+        fila = FilaTrabalho(str(tmp_path / 'fila.sqlite'), **kwargs)
+        filas.append(fila)
+        return fila
+
+    yield criar
+    for fila in filas:
+        fila.fechar()
+
+
+def test_enfileirar_de_novo_nao_duplica(criar_fila):
+    fila = criar_fila()
+
+    assert fila.enfileirar([unidade('a'), unidade('b', ordem=2)]) == 2
+    assert fila.enfileirar([unidade('a'), unidade('c', ordem=3)]) == 1
+    assert fila.resumo() == {'pendente': 3}
+
+
+def test_lease_expirado_volta_a_ser_reivindicavel(criar_fila):
+    fila = criar_fila(duracao_lease=0.0)
+    fila.enfileirar([unidade('a')])
+
+    primeira = fila.reivindicar('t1')
+    segunda = fila.reivindicar('t2')
+
+    assert segunda['chave'] == 'a' and segunda['tentativas'] == 2
+    assert not fila.concluir(primeira, 't1')
+    assert not fila.renovar(primeira, 't1')
+
+
+def test_lease_expirado_sem_tentativas_restantes_falha(criar_fila):
+    fila = criar_fila(duracao_lease=0.0, max_tentativas=1)
+    fila.enfileirar([unidade('a')])
+
+    fila.reivindicar('t1')
+
+    assert fila.reivindicar('t2') is None
+    assert fila.resumo() == {'falhou': 1}
+
+
+def test_falhar_devolve_a_unidade_ate_esgotar_as_tentativas(criar_fila):
+    fila = criar_fila(max_tentativas=2, backoff_inicial=0)
+    fila.enfileirar([unidade('a')])
+
+    assert fila.falhar(fila.reivindicar('t1'), 't1', 'HTTP 503')
+    assert fila.resumo() == {'pendente': 1}
+    assert fila.falhar(fila.reivindicar('t1'), 't1', 'HTTP 503')
+    assert fila.resumo() == {'falhou': 1}
+    assert fila.reivindicar('t1') is None
+
+
+def test_unidade_que_falhou_espera_o_backoff_antes_de_voltar(criar_fila, relogio):
+    fila = criar_fila(max_tentativas=5, backoff_inicial=10, backoff_maximo=25)
+    fila.enfileirar([unidade('a'), unidade('b', ordem=2)])
+
+    fila.falhar(fila.reivindicar('t1'), 't1', 'HTTP 503')
+
+    assert fila.reivindicar('t1')['chave'] == 'b'
+    relogio.avancar(4.9)
+    assert fila.reivindicar('t1') is None
+    relogio.avancar(10.2)
+    segunda = fila.reivindicar('t1')
+    assert (segunda['chave'], segunda['tentativas']) == ('a', 2)
+
+    fila.falhar(segunda, 't1', 'HTTP 503')
+    relogio.avancar(30.1)
+    # Terceira falha: 10·2² = 40 s, limitado a 25 s (± 50% de jitter)
+    fila.falhar(fila.reivindicar('t1'), 't1', 'HTTP 503')
+    relogio.avancar(12.4)
+    assert fila.reivindicar('t1') is None
+    relogio.avancar(25.1)
+    assert fila.reivindicar('t1')['tentativas'] == 4
+
+
+def test_fila_antiga_ganha_a_coluna_do_backoff(tmp_path):
+    caminho = str(tmp_path / 'fila.sqlite')
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("CREATE TABLE unidades (id INTEGER PRIMARY KEY, chave TEXT NOT NULL UNIQUE, grupo TEXT, "
+                    "ordem INTEGER NOT NULL DEFAULT 0, dados TEXT NOT NULL, estado TEXT NOT NULL DEFAULT 'pendente', "
+                    "trabalhador TEXT, lease_ate REAL, tentativas INTEGER NOT NULL DEFAULT 0, resultado TEXT, "
+                    "erro TEXT, atualizado_em REAL)")
+    conexao.execute("INSERT INTO unidades (chave, dados) VALUES ('a', '{}')")
+    conexao.commit()
+    conexao.close()
+
+    fila = FilaTrabalho(caminho)
+
+    assert fila.reivindicar('t1')['chave'] == 'a'
+    fila.fechar()
+
+
+def test_descartar_grupo_so_atinge_pendentes_posteriores(criar_fila):
+    fila = criar_fila()
+    fila.enfileirar([unidade('a1', ordem=1), unidade('a2', ordem=2), unidade('a3', ordem=3),
+                     unidade('b2', grupo='ZapImóveis|*', ordem=2)])
+    fila.reivindicar('t1')
+
+    assert fila.descartar_grupo('VivaReal|*', 1) == 2
+    assert fila.resumo() == {'em_andamento': 1, 'descartada': 2, 'pendente': 1}
+
+
+def test_trabalhador_percorre_a_serie_ate_a_pagina_vazia(criar_scraper, servidor, criar_fila):
+    scraper = criar_scraper(urls=servidor.urls())
+    scraper.selecionar_sites(['VivaReal'])
+    fila = criar_fila()
+    scraper.planejar_unidades_anuncios(fila, max_paginas=15, paginas_por_unidade=3)
+
+    estatisticas = scraper.trabalhar_fila(fila, esperar=False)
+
+    assert (estatisticas['paginas'], estatisticas['anuncios'], estatisticas['falhas']) == (5, 100, 0)
+    assert fila.resumo() == {'concluida': 2, 'descartada': 3}
+
+
+def test_falha_de_download_devolve_a_unidade_em_vez_de_encerrar_a_serie(criar_scraper, servidor, criar_fila):
+    scraper = criar_scraper(urls=servidor.urls())
+    scraper.selecionar_sites(['VivaReal'])
+    fila = criar_fila(max_tentativas=3, backoff_inicial=0)
+    scraper.planejar_unidades_anuncios(fila, max_paginas=6, paginas_por_unidade=3)
+    baixar = scraper._baixar_pagina_anuncios
+    falhas = {2: 1}
+
+    def baixar_com_falha(site, pagina, bairro=None):
+        if falhas.get(pagina):
+            falhas[pagina] -= 1
+            raise requests.HTTPError('HTTP 503')
+        return baixar(site, pagina, bairro)
+
+    scraper._baixar_pagina_anuncios = baixar_com_falha
+
+    estatisticas = scraper.trabalhar_fila(fila, esperar=False)
+
+    assert estatisticas['falhas'] == 1
+    assert fila.resumo() == {'concluida': 2}
+    assert len(scraper.armazem.ler('anuncios_imobiliarios')) == 100
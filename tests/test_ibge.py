@@ -0,0 +1,50 @@
+import json
+
+import pandas as pd
+
+from maceioCondominios import (COLUNAS_AGREGADOS_IBGE, LOCALIDADES_IBGE, MUNICIPIOS_METROPOLITANA_MACEIO,
+                               normalizar_agregados_ibge)
+
+
+def test_agregados_da_metropolitana_trazem_os_municipios_certos(criar_scraper, servidor):
+    scraper = criar_scraper(urls=servidor.urls())
+
+    tabela = scraper.buscar_agregados_ibge(localidades=LOCALIDADES_IBGE['metropolitana'])
+
+    municipios = dict(zip(tabela['codigo_ibge'].astype(str), tabela['municipio']))
+    assert municipios == MUNICIPIOS_METROPOLITANA_MACEIO
+    assert set(tabela['agregado']) == {4714, 4712, 6579}
+
+
+def test_simbolos_do_ibge_viram_nan():
+    resposta = [{
+        'id': '96', 'variavel': 'Domicílios', 'unidade': 'Unidades',
+        'resultados': [{'classificacoes': [], 'series': [
+            {'localidade': {'id': '2704302', 'nome': 'Maceió - AL'}, 'serie': {'2010': '...'}}]}]
+    }]
+
+    tabela = normalizar_agregados_ibge(resposta, 793)
+
+    assert list(tabela.columns) == COLUNAS_AGREGADOS_IBGE
+    assert (tabela.loc[0, 'municipio'], tabela.loc[0, 'uf'], tabela.loc[0, 'periodo']) == ('Maceió', 'AL', '2010')
+    assert pd.isna(tabela.loc[0, 'valor'])
+
+
+def test_domicilios_sem_valor_geram_json_valido(criar_scraper, servidor, monkeypatch):
+    scraper = criar_scraper(urls=servidor.urls())
+    sem_valor = pd.DataFrame([{'agregado': 793, 'codigo_ibge': 2704302, 'valor': float('nan')}])
+    monkeypatch.setattr(scraper, 'buscar_agregados_ibge', lambda *args, **kwargs: sem_valor)
+
+    registros = scraper.buscar_dados_ibge_real()
+
+    assert registros[1]['total_domicilios'] == 'N/A'
+    json.dumps(registros, allow_nan=False)
+
+
+def test_domicilios_com_valor(criar_scraper, servidor):
+    scraper = criar_scraper(urls=servidor.urls())
+
+    registros = scraper.buscar_dados_ibge_real()
+
+    assert registros[0]['codigo_ibge'] == 2704302
+    assert registros[1]['total_domicilios'] == 269415.0
@@ -0,0 +1,52 @@
+def cartorio(nome, telefone, data_acesso='2024-01-01'):
+    return {'fonte': 'CNR', 'nome': nome, 'telefone': telefone, 'data_acesso': data_acesso}
+
+
+def test_delta_registra_adicionados_alterados_e_removidos(scraper):
+    primeira = scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '1111'),
+                                                               cartorio('2º Ofício', '2222')]})
+    segunda = scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '9999'),
+                                                              cartorio('3º Ofício', '3333')]})
+
+    assert (primeira['adicionados'], primeira['alterados'], primeira['removidos']) == (2, 0, 0)
+    assert (segunda['adicionados'], segunda['alterados'], segunda['removidos']) == (1, 1, 1)
+    assert segunda['total_registros'] == 2
+
+
+def test_campos_volateis_nao_geram_delta(scraper):
+    scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '1111', '2024-01-01')]})
+    entrada = scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '1111', '2024-02-01')]})
+
+    assert entrada['arquivo_delta'] is None
+    assert (entrada['adicionados'], entrada['alterados'], entrada['removidos']) == (0, 0, 0)
+
+
+def test_reconstruir_aplica_os_deltas_em_ordem(scraper):
+    scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '1111'), cartorio('2º Ofício', '2222')]})
+    scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '9999'), cartorio('3º Ofício', '3333')]})
+
+    estado = scraper.reconstruir_snapshot()
+
+    assert sorted((r['nome'], r['telefone']) for r in estado['cartorios_reais']) == [
+        ('1º Ofício', '9999'), ('3º Ofício', '3333')]
+    assert estado['ibge_oficial'] == []
+
+
+def test_fonte_vazia_mantem_o_ultimo_estado(scraper):
+    registros = [cartorio('1º Ofício', '1111'), cartorio('2º Ofício', '2222')]
+    scraper.salvar_incremental({'cartorios_reais': registros})
+
+    falha = scraper.salvar_incremental({'cartorios_reais': []})
+    recuperada = scraper.salvar_incremental({'cartorios_reais': registros})
+
+    assert (falha['removidos'], falha['total_registros'], falha['arquivo_delta']) == (0, 2, None)
+    assert (recuperada['adicionados'], recuperada['removidos']) == (0, 0)
+    assert len(scraper.reconstruir_snapshot()['cartorios_reais']) == 2
+
+
+def test_fonte_ausente_mantem_o_ultimo_estado(scraper):
+    scraper.salvar_incremental({'cartorios_reais': [cartorio('1º Ofício', '1111')]})
+    entrada = scraper.salvar_incremental({'ibge_oficial': [{'fonte': 'IBGE', 'tipo': 'municipio', 'codigo_ibge': 1}]})
+
+    assert entrada['removidos'] == 0
+    assert len(scraper.reconstruir_snapshot()['cartorios_reais']) == 1
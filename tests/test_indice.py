@@ -0,0 +1,70 @@
+import pytest
+
+from maceioCondominios import IndiceLocal
+
+
+def anuncio(id_anuncio, preco, bairro='Ponta Verde', condominio=600.0, titulo='Apartamento vista mar',
+            endereco='Rua Exemplo, 100 - Ponta Verde, Maceió - AL'):
+    return {'site': 'VivaReal', 'id': id_anuncio, 'titulo': titulo, 'endereco': endereco, 'bairro': bairro,
+            'preco': preco, 'condominio': condominio, 'area_m2': 80.0, 'quartos': 3,
+            'data_coleta': '2024-01-01T00:00:00'}
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = IndiceLocal(str(tmp_path))
+    yield indice
+    indice.fechar()
+
+
+def test_filtro_sem_ordenacao_explicita_inclui_anuncios_sem_preco(indice):
+    indice.indexar_anuncios([anuncio('1', 500000.0), anuncio('2', None), anuncio('3', 300000.0),
+                             anuncio('4', 400000.0, condominio=1500.0)])
+
+    resultado = indice.buscar_anuncios(bairro='Ponta Verde', condominio_max=800)
+
+    assert [a['id'] for a in resultado] == ['3', '1', '2']
+
+
+def test_anuncios_sem_valor_completam_o_limite(indice):
+    indice.indexar_anuncios([anuncio('1', None), anuncio('2', 200000.0), anuncio('3', 100000.0)])
+
+    assert [a['id'] for a in indice.buscar_anuncios(limite=2)] == ['3', '2']
+    assert [a['id'] for a in indice.buscar_anuncios(limite=3)] == ['3', '2', '1']
+    assert len(indice.buscar_anuncios(ordenar=None)) == 3
+
+
+def test_ordenacao_invalida(indice):
+    with pytest.raises(ValueError):
+        indice.buscar_anuncios(ordenar='titulo; DROP TABLE anuncios')
+
+
+def test_upsert_atualiza_e_mantem_a_primeira_coleta(indice):
+    indice.indexar_anuncios([anuncio('1', 500000.0)])
+    primeira = indice.buscar_anuncios()[0]['primeira_coleta']
+
+    indice.indexar_anuncios([dict(anuncio('1', 450000.0), data_coleta='2024-02-01T00:00:00')])
+
+    [atualizado] = indice.buscar_anuncios()
+    assert (atualizado['preco'], atualizado['primeira_coleta']) == (450000.0, primeira)
+    assert indice.contar()['anuncios'] == 1
+
+
+def test_busca_textual_ignora_acentos_e_acompanha_atualizacoes(indice):
+    indice.indexar_anuncios([anuncio('1', 500000.0, endereco='Av. Álvaro Otacílio, 1200 - Ponta Verde')])
+
+    assert len(indice.buscar_anuncios(texto='alvaro otacilio')) == 1
+
+    indice.indexar_anuncios([anuncio('1', 500000.0, endereco='Rua Jangadeiros Alagoanos, 50 - Pajuçara')])
+
+    assert indice.buscar_anuncios(texto='alvaro otacilio') == []
+    assert len(indice.buscar_anuncios(texto='jangadeiros')) == 1
+
+
+def test_busca_de_cartorios_por_nome(indice):
+    indice.indexar_cartorios([{'fonte': 'CNR', 'nome': '1º Ofício de Notas de Maceió', 'endereco': 'Centro',
+                               'cnpj': '00.000.000/0001-00'}])
+
+    [cartorio] = indice.buscar_cartorios('oficio notas')
+    assert cartorio['nome'] == '1º Ofício de Notas de Maceió'
+    assert '"cnpj"' in cartorio['dados']
@@ -0,0 +1,53 @@
+from maceioCondominios import MaceioCondominiosScraperReal, ler_ndjson
+
+
+def test_lote_grava_cada_inscricao_e_retoma_do_ponto(criar_scraper, servidor, tmp_path):
+    scraper = criar_scraper(urls=servidor.urls())
+    saida = str(tmp_path / 'iptu.ndjson')
+    inscricoes = [f'01.{i:03d}.{i * 7 % 1000:03d}-0' for i in range(20)]
+
+    primeira = scraper.consultar_iptu_em_lote(inscricoes[:12], saida, concorrencia=4)
+    segunda = scraper.consultar_iptu_em_lote(inscricoes, saida, concorrencia=4)
+
+    assert (primeira['consultadas'], primeira['erro']) == (12, 0)
+    assert (segunda['consultadas'], segunda['ja_gravadas']) == (8, 12)
+    assert sorted(r['inscricao'] for r in ler_ndjson(saida)) == sorted(inscricoes)
+
+
+def test_erro_de_leitura_de_uma_ficha_nao_interrompe_o_lote(criar_scraper, servidor, tmp_path, monkeypatch):
+    scraper = criar_scraper(urls=servidor.urls())
+    saida = str(tmp_path / 'iptu.ndjson')
+    normalizar = MaceioCondominiosScraperReal._normalizar_iptu.__func__
+
+    def normalizar_com_defeito(cls, inscricao, extraido):
+        if inscricao == 'defeituosa':
+            raise ValueError('ficha com layout inesperado')
+        return normalizar(cls, inscricao, extraido)
+
+    monkeypatch.setattr(MaceioCondominiosScraperReal, '_normalizar_iptu', classmethod(normalizar_com_defeito))
+
+    estatisticas = scraper.consultar_iptu_em_lote(['01.001.001-0', 'defeituosa', '01.002.002-0'], saida,
+                                                  concorrencia=2)
+
+    assert (estatisticas['consultadas'], estatisticas['erro']) == (3, 1)
+    assert sorted(r['inscricao'] for r in ler_ndjson(saida)) == ['01.001.001-0', '01.002.002-0']
+
+
+def test_erro_inesperado_vira_registro_de_erro_sem_novas_tentativas(criar_scraper, servidor, monkeypatch):
+    scraper = criar_scraper(urls=servidor.urls())
+    monkeypatch.setattr(scraper, '_extrair', lambda *args, **kwargs: {})
+
+    registro = scraper.consultar_iptu('01.001.001-0')
+
+    assert (registro['status'], registro['tentativas']) == ('erro', 1)
+    assert registro['mensagem'].startswith('KeyError')
+
+
+def test_servico_indisponivel_custa_uma_requisicao_por_tentativa(criar_scraper, servidor):
+    scraper = criar_scraper(urls=servidor.urls())
+    servidor.rotas['/sefaz/n/iptu2022/']['taxa_erro'] = 1.0
+
+    registro = scraper.consultar_iptu('01.001.001-0', tentativas=2)
+
+    assert (registro['status'], registro['tentativas']) == ('erro', 2)
+    assert servidor.estatisticas['sefaz_maceio']['requisicoes'] == 2
@@ -0,0 +1,75 @@
+import pytest
+import requests
+
+from maceioCondominios import AdaptadorHTTP, LimitadorTaxa, LimitadorTaxaCompartilhado
+
+
+@pytest.fixture
+def criar_compartilhado(tmp_path):
+    limitadores = []
+
+    def criar(**kwargs):
+        limitador = LimitadorTaxaCompartilhado(str(tmp_path / 'limites.sqlite3'), **kwargs)
+        limitadores.append(limitador)
+        return limitador
+
+    yield criar
+    for limitador in limitadores:
+        limitador.fechar()
+
+
+def test_rajada_passa_sem_espera_e_depois_segue_a_taxa(relogio):
+    limitador = LimitadorTaxa(taxa=2, rajada=3)
+
+    esperas = [limitador.adquirir('exemplo') for _ in range(5)]
+
+    assert esperas == [0.0, 0.0, 0.0, 0.5, 0.5]
+    assert relogio.esperas == [0.5, 0.5]
+
+
+def test_fichas_sao_repostas_com_o_tempo_ate_a_rajada(relogio):
+    limitador = LimitadorTaxa(taxa=2, rajada=3)
+    for _ in range(3):
+        limitador.adquirir('exemplo')
+
+    relogio.avancar(1.0)
+    assert [limitador.adquirir('exemplo') for _ in range(3)] == [0.0, 0.0, 0.5]
+
+    relogio.avancar(3600)
+    assert [limitador.adquirir('exemplo') for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+def test_hosts_tem_baldes_independentes(relogio):
+    limitador = LimitadorTaxa(taxa=1, rajada=1, por_host={'lento': (1 / 3, 1)})
+
+    assert [limitador.adquirir('a'), limitador.adquirir('a')] == [0.0, 1.0]
+    assert limitador.adquirir('b') == 0.0
+    assert [limitador.adquirir('lento'), limitador.adquirir('lento')] == [0.0, pytest.approx(3.0)]
+
+
+def test_instancias_compartilhadas_dividem_o_mesmo_orcamento(criar_compartilhado, relogio):
+    primeiro = criar_compartilhado(taxa=2, rajada=2)
+    segundo = criar_compartilhado(taxa=2, rajada=2)
+
+    assert [primeiro.adquirir('exemplo'), segundo.adquirir('exemplo')] == [0.0, 0.0]
+    assert segundo.adquirir('exemplo') == 0.5
+    assert primeiro.adquirir('exemplo') == 0.5
+    assert primeiro.adquirir('outro') == 0.0
+
+    relogio.avancar(1.0)
+    assert [segundo.adquirir('exemplo'), primeiro.adquirir('exemplo'), segundo.adquirir('exemplo')] == \
+        [0.0, 0.0, 0.5]
+
+
+def test_adaptador_consome_uma_ficha_do_host_por_requisicao(servidor, relogio):
+    sessao = requests.Session()
+    sessao.mount('http://', AdaptadorHTTP(LimitadorTaxa(taxa=1, rajada=1)))
+    outro_host = servidor.url_base.replace('127.0.0.1', 'localhost')
+
+    with sessao:
+        assert sessao.get(servidor.url_base + '/inexistente').status_code == 404
+        assert sessao.get(outro_host + '/inexistente').status_code == 404
+        assert relogio.esperas == []
+        sessao.get(servidor.url_base + '/inexistente')
+
+    assert relogio.esperas == [1.0]
@@ -0,0 +1,70 @@
+import pytest
+
+from maceioCondominios import RollupsAnuncios
+
+
+def anuncio(id_anuncio, dia, preco=500000.0, bairro='Ponta Verde'):
+    return {'site': 'VivaReal', 'id': id_anuncio, 'bairro': bairro, 'preco': preco, 'area_m2': 100.0,
+            'quartos': 3, 'condominio': 600.0, 'data_coleta': f'{dia}T10:00:00'}
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    rollups = RollupsAnuncios(str(tmp_path), dias_vistos=14)
+    yield rollups
+    rollups.fechar()
+
+
+def contagens(rollups):
+    return rollups.ler().groupby('dia')['anuncios'].sum().to_dict()
+
+
+def test_mesmo_anuncio_no_mesmo_dia_e_contado_uma_vez(rollups):
+    assert rollups.atualizar([anuncio('1', '2024-03-01'), anuncio('2', '2024-03-01')]) == 2
+    assert rollups.atualizar([anuncio('1', '2024-03-01'), anuncio('1', '2024-03-02')]) == 1
+
+    assert contagens(rollups) == {'2024-03-01': 2, '2024-03-02': 1}
+
+
+def test_reprocessar_dia_antigo_dentro_da_janela_nao_reconta(rollups):
+    rollups.atualizar([anuncio('1', '2024-03-01'), anuncio('2', '2024-03-01')])
+    rollups.atualizar([anuncio('1', '2024-03-10')])
+
+    assert rollups.atualizar([anuncio('1', '2024-03-01'), anuncio('2', '2024-03-01')]) == 0
+    assert contagens(rollups) == {'2024-03-01': 2, '2024-03-10': 1}
+
+
+def test_dias_fora_da_janela_sao_ignorados(rollups):
+    rollups.atualizar([anuncio('1', '2024-03-01'), anuncio('2', '2024-03-01')])
+    rollups.atualizar([anuncio('1', '2024-04-01')])
+
+    assert rollups.atualizar([anuncio('1', '2024-03-01'), anuncio('3', '2024-03-01'),
+                              anuncio('3', '2024-04-01')]) == 1
+    assert contagens(rollups) == {'2024-03-01': 2, '2024-04-01': 2}
+
+
+def test_lote_antigo_nao_descarta_hashes_dos_dias_recentes(rollups):
+    rollups.atualizar([anuncio('1', '2024-04-01')])
+    rollups.atualizar([anuncio('2', '2024-03-25')])
+
+    assert rollups.atualizar([anuncio('1', '2024-04-01')]) == 0
+
+
+def test_recalcular_do_zero_em_ordem_cronologica(rollups):
+    rollups.atualizar([anuncio('1', '2024-04-01')])
+    rollups.limpar()
+
+    for dia in ('2024-01-01', '2024-02-01', '2024-03-01'):
+        assert rollups.atualizar([anuncio('1', dia)]) == 1
+    assert contagens(rollups) == {'2024-01-01': 1, '2024-02-01': 1, '2024-03-01': 1}
+
+
+def test_medias_por_periodo(rollups):
+    rollups.atualizar([anuncio('1', '2024-03-04', preco=400000.0), anuncio('2', '2024-03-05', preco=600000.0)])
+
+    somas = rollups.ler().groupby('bairro')[RollupsAnuncios.SOMAS].sum()
+    somas['dias'] = 2
+    medias = RollupsAnuncios._medias(somas).loc['Ponta Verde']
+
+    assert (medias['anuncios_por_dia'], medias['preco_medio'], medias['preco_m2']) == (1.0, 500000.0, 5000.0)
+    assert medias['preco_m2_desvio'] == pytest.approx(1000.0)